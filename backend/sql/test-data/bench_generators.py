@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据生成器基准测试
+按多个数据规模（订单数）分阶段测量 generate_realistic_data.py 的吞吐和内存：
+行/秒、字节/秒、峰值RSS。结果写成JSON，可与保存的基线对比，发现性能回退。
+
+每个 (阶段, 规模) 在独立子进程中运行，峰值RSS互不影响；重复 --repeat 次取最好的一次，
+耗时短于 --min-seconds 的阶段只报告吞吐变化，不判定回退（计时噪声大于回退幅度）。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不统计内存
+    resource = None
+
+import generate_realistic_data as gen
+from datagen.writer import SQLBatchWriter
+
+# ==================== 配置 ====================
+DEFAULT_SCALES = '1k,100k,10m'
+STAGES = ('users', 'merchants', 'orders_points', 'sql', 'stream')
+IN_MEMORY_STAGES = ('users', 'merchants', 'orders_points', 'sql')  # 数据全部保留在内存中的阶段
+IN_MEMORY_LIMIT = 1_000_000  # 超过该订单数时跳过内存阶段（只测流式）
+OUTPUT_FILE = 'bench_results.json'
+TOLERANCE = 0.15  # 吞吐下降或内存增长超过15%视为回退
+REPEAT = 3  # 每个阶段运行的次数，取最快的一次
+MIN_SECONDS = 0.5  # 耗时短于该值的阶段不判定吞吐回退
+SEED = 20250930
+
+SCALE_UNITS = {'k': 1_000, 'm': 1_000_000}
+
+# ==================== 辅助函数 ====================
+
+def parse_scale(text):
+    """'1k' / '100k' / '10m' / '5000' -> 订单数"""
+    text = text.strip().lower()
+    if text[-1:] in SCALE_UNITS:
+        return int(float(text[:-1]) * SCALE_UNITS[text[-1]])
+    return int(text)
+
+def scale_label(orders):
+    """订单数 -> '1k' / '10m' 形式"""
+    for unit, size in sorted(SCALE_UNITS.items(), key=lambda item: -item[1]):
+        if orders >= size and orders % size == 0:
+            return f"{orders // size}{unit}"
+    return str(orders)
+
+def users_for(orders):
+    """达到目标订单数需要的用户数（按 ORDERS_PER_USER 的均值估算）"""
+    low, high = gen.ORDERS_PER_USER
+    return max(1, round(orders / ((low + high) / 2)))
+
+def peak_rss_mb():
+    """当前进程的峰值RSS（MB）；不支持时返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 为字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def write_sql(filename, tables):
+    """把内存中的各表数据序列化为SQL文件（与 generate_sql() 相同的写法）"""
+    with open(filename, 'w', encoding='utf-8') as f:
+        writer = SQLBatchWriter(f, gen.TABLE_COLUMNS, None)
+        for table, rows in tables:
+            writer.write_rows(table, gen.table_rows(table, rows))
+            writer.flush(table)
+        writer.close()
+
+# ==================== 单个阶段（子进程） ====================
+
+def run_stage(stage, orders, engine='python'):
+    """
+    运行一个阶段并返回测量结果
+
+    各阶段先准备输入（不计时），再只对阶段本身计时：
+    users / merchants / orders_points 为内存生成，sql 为序列化已生成的数据，
+    stream 为端到端流式生成SQL文件。
+    """
+    gen.NUM_USERS = users_for(orders)
+    gen.reset_generator(SEED, datetime.strptime(gen.REFERENCE_TIME, '%Y-%m-%d %H:%M:%S'))
+    workdir = tempfile.mkdtemp(prefix='bench_')
+    filename = os.path.join(workdir, 'bench.sql')
+    rows = 0
+    size = None
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if stage in ('orders_points', 'sql'):
+            users = gen.generate_users()
+            merchants = gen.generate_merchants()
+        if stage == 'sql':
+            orders_rows, points_rows, user_points = gen.generate_orders_and_points(users, merchants)
+            tables = [('users', users), ('merchants', merchants), ('payment_orders', orders_rows),
+                      ('points_records', points_rows), ('user_points', user_points)]
+
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        if stage == 'users':
+            rows = len(gen.generate_users())
+        elif stage == 'merchants':
+            rows = len(gen.generate_merchants())
+        elif stage == 'orders_points':
+            rows = sum(len(part) for part in gen.generate_orders_and_points(users, merchants))
+        elif stage == 'sql':
+            write_sql(filename, tables)
+            rows = sum(len(part) for _, part in tables)
+            size = os.path.getsize(filename)
+        elif stage == 'stream':
+            gen.generate_sql_stream(filename, engine=engine)
+            size = os.path.getsize(filename)
+            with open(filename, encoding='utf-8') as f:
+                rows = sum(1 for line in f if line.startswith('('))
+        seconds = time.perf_counter() - start
+        rss_after = peak_rss_mb()
+
+    if os.path.exists(filename):
+        os.remove(filename)
+    os.rmdir(workdir)
+
+    return {
+        'stage': stage,
+        'scale': scale_label(orders),
+        'orders': orders,
+        'engine': engine if stage == 'stream' else 'python',
+        'rows': rows,
+        'bytes': size,
+        'seconds': round(seconds, 4),
+        'rows_per_sec': round(rows / seconds, 1) if seconds else None,
+        'bytes_per_sec': round(size / seconds, 1) if size and seconds else None,
+        'peak_rss_mb': None if rss_after is None else round(rss_after, 1),
+        'stage_rss_mb': None if rss_after is None else round(rss_after - rss_before, 1),
+    }
+
+# ==================== 调度与对比 ====================
+
+def run_in_subprocess(stage, orders, engine):
+    """在独立子进程中运行一个阶段，返回测量结果"""
+    command = [sys.executable, os.path.abspath(__file__), '--run-stage', stage,
+               '--scales', str(orders), '--engine', engine]
+    result = subprocess.run(command, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(f"阶段 {stage} @ {scale_label(orders)} 失败:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run_repeated(stage, orders, engine, repeat=REPEAT):
+    """
+    运行 repeat 次，返回最快一次的结果
+
+    另记各次耗时（seconds_runs）和中位数；峰值RSS取各次的最小值（其他进程的干扰只会让它变大）
+    """
+    runs = [run_in_subprocess(stage, orders, engine) for _ in range(repeat)]
+    result = dict(min(runs, key=lambda r: r['seconds']))
+    result['repeat'] = repeat
+    result['seconds_runs'] = [r['seconds'] for r in runs]
+    result['seconds_median'] = round(statistics.median(result['seconds_runs']), 4)
+    peaks = [r['peak_rss_mb'] for r in runs if r['peak_rss_mb'] is not None]
+    if peaks:
+        result['peak_rss_mb'] = min(peaks)
+    return result
+
+def compare_with_baseline(results, baseline, tolerance=TOLERANCE, min_seconds=MIN_SECONDS):
+    """
+    与基线对比，返回回退列表
+
+    按 (阶段, 订单数, 引擎) 匹配；吞吐（行/秒）下降或峰值RSS增长超过 tolerance 视为回退。
+    本次或基线耗时短于 min_seconds 时只记录吞吐变化，不判定回退（throughput_gated 为 False）。
+    """
+    previous = {(r['stage'], r['orders'], r['engine']): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        base = previous.get((r['stage'], r['orders'], r['engine']))
+        if base is None:
+            continue
+        r['baseline_rows_per_sec'] = base['rows_per_sec']
+        if base['rows_per_sec'] and r['rows_per_sec']:
+            change = r['rows_per_sec'] / base['rows_per_sec'] - 1
+            r['throughput_change'] = round(change, 4)
+            r['throughput_gated'] = min(r['seconds'], base['seconds']) >= min_seconds
+            if r['throughput_gated'] and change < -tolerance:
+                regressions.append(f"{r['stage']} @ {r['scale']}: 吞吐 {change:+.1%}")
+        if base.get('peak_rss_mb') and r['peak_rss_mb']:
+            change = r['peak_rss_mb'] / base['peak_rss_mb'] - 1
+            r['rss_change'] = round(change, 4)
+            if change > tolerance:
+                regressions.append(f"{r['stage']} @ {r['scale']}: 峰值内存 {change:+.1%}")
+    return regressions
+
+def print_result(r):
+    """打印一行结果"""
+    rate = f"{r['rows_per_sec']:>12,.0f} 行/秒" if r['rows_per_sec'] else f"{'-':>17}"
+    throughput = f"{r['bytes_per_sec'] / 1024 / 1024:>8.1f} MB/秒" if r['bytes_per_sec'] else f"{'-':>13}"
+    rss = f"{r['peak_rss_mb']:>8.1f} MB" if r['peak_rss_mb'] is not None else ''
+    print(f"  {r['stage']:<14}{r['scale']:>6}{r['rows']:>12,} 行{rate}{throughput}{rss}")
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='数据生成器基准测试（吞吐、内存、基线对比）')
+    parser.add_argument('--scales', default=DEFAULT_SCALES,
+                        help=f'数据规模（订单数），逗号分隔，支持 k / m 后缀（默认 {DEFAULT_SCALES}）')
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f'要测量的阶段，逗号分隔（默认全部：{",".join(STAGES)}）')
+    parser.add_argument('--engine', choices=['python', 'numpy'], default='python',
+                        help='stream 阶段使用的订单生成引擎')
+    parser.add_argument('--output', default=OUTPUT_FILE, help=f'结果JSON文件（默认 {OUTPUT_FILE}）')
+    parser.add_argument('--baseline', default=None, help='基线JSON文件：对比并在回退时以状态码1退出')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help=f'允许的性能波动比例（默认 {TOLERANCE}）')
+    parser.add_argument('--repeat', type=int, default=REPEAT,
+                        help=f'每个阶段运行的次数，取最快的一次（默认 {REPEAT}）')
+    parser.add_argument('--min-seconds', type=float, default=MIN_SECONDS,
+                        help=f'耗时短于该秒数的阶段不判定吞吐回退（默认 {MIN_SECONDS}）')
+    parser.add_argument('--run-stage', choices=STAGES, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    stages = args.stages.split(',')
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"未知阶段: {', '.join(unknown)}")
+    if args.repeat < 1:
+        parser.error("--repeat 至少为1")
+    args.stages = stages
+    args.scales = [parse_scale(s) for s in args.scales.split(',')]
+    return args
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.run_stage:
+        # 子进程：只运行一个阶段，最后一行输出JSON结果
+        print(json.dumps(run_stage(args.run_stage, args.scales[0], args.engine)))
+        sys.exit(0)
+
+    print("\n" + "="*60)
+    print("🚀 开始基准测试")
+    print("="*60 + "\n")
+
+    results = []
+    for orders in args.scales:
+        for stage in args.stages:
+            if stage in IN_MEMORY_STAGES and orders > IN_MEMORY_LIMIT:
+                print(f"  ⏭️  {stage} @ {scale_label(orders)}: 超过 {scale_label(IN_MEMORY_LIMIT)} 订单，跳过内存阶段")
+                continue
+            result = run_repeated(stage, orders, args.engine, args.repeat)
+            results.append(result)
+            print_result(result)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance, args.min_seconds)
+        print(f"\n📊 与基线对比: {args.baseline}")
+        for r in results:
+            if 'throughput_change' in r:
+                rss_change = f"，内存 {r['rss_change']:+.1%}" if 'rss_change' in r else ''
+                short = '' if r['throughput_gated'] else f"（耗时不足 {args.min_seconds}s，吞吐不判定）"
+                print(f"  {r['stage']:<14}{r['scale']:>6}  吞吐 {r['throughput_change']:+.1%}{rss_change}{short}")
+
+    report = {
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'baseline': args.baseline,
+        'regressions': regressions,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 结果已保存: {args.output}")
+
+    if regressions:
+        print(f"\n❌ 发现 {len(regressions)} 项性能回退（超过 {args.tolerance:.0%}）:")
+        for item in regressions:
+            print(f"  - {item}")
+        sys.exit(1)
+    if args.baseline:
+        print("✅ 与基线相比无性能回退")
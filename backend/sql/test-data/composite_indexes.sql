@@ -0,0 +1,11 @@
+-- 查询基准用的复合索引方案（query_bench.py --indexes composite_indexes.sql）
+-- 覆盖三种主要访问模式，MySQL 和 SQLite 通用；基准结束后自动删除（--keep-indexes 保留）
+
+-- 用户订单列表（最新在前）：WHERE user_id = ? ORDER BY created_at DESC
+CREATE INDEX idx_user_created ON payment_orders (user_id, created_at);
+
+-- 商户按日收入：WHERE merchant_id = ? AND created_at >= ? GROUP BY DATE(created_at)
+CREATE INDEX idx_merchant_created ON payment_orders (merchant_id, created_at);
+
+-- 按用户和类型的积分记录：WHERE user_id = ? AND record_type = ? ORDER BY created_at DESC
+CREATE INDEX idx_user_type_created ON points_records (user_id, record_type, created_at);
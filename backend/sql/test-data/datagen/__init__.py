@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+"""
+测试数据生成公共组件
+供 generate_realistic_data.py / generate_test_data.py 共用
+"""
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+预编译的目录缓存
+商户名称、姓名、城市等目录原来每次运行都由 MERCHANT_TYPES、SURNAMES 等现场展开。
+目录变大后（真实商户列表、城市区县表），展开会占满小规模冒烟运行的启动时间。
+
+Catalog 把展开后的各表（字符串列表）写成二进制缓存文件，之后的运行直接 mmap 映射：
+- 缓存文件名和文件头带数据源的哈希（数据源内容 + 源文件字节），数据源一改就换一个文件重新展开
+- 惰性加载：第一次取表时才计算哈希、映射文件；取值时才解码对应的字符串，没用到的表和行不占内存
+- 分片子进程和各生成脚本映射同一个文件，共享页缓存
+
+缓存目录为环境变量 DATAGEN_CACHE_DIR，默认是本检出目录下的 test-data/.cache（已在 .gitignore 中），
+不写到仓库之外，不同检出、不同分支的缓存互不影响；DATAGEN_CACHE_DIR 设为空时不写缓存，
+目录写不进去时也退回内存中的列表，结果相同。旧的缓存文件不会自动删除（别的进程可能正映射着），
+需要时直接删除整个目录。
+
+文件格式（本机字节序，字节序和格式版本计入哈希）：
+    文件头   MAGIC(8) | sha256(32) | 表数(4)
+    目录     每个表：名称长度(2) | 名称(UTF-8) | 行数(8) | 偏移数组位置(8) | 字符串区位置(8)
+    各表     偏移数组（行数 + 1 个 uint32，8字节对齐） | 字符串区（UTF-8，按偏移切分）
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import Sequence
+
+CATALOG_MAGIC = b'DGCATLG\x00'
+CATALOG_FORMAT = 1
+CATALOG_SUFFIX = '.cat'
+CACHE_DIR_ENV = 'DATAGEN_CACHE_DIR'
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+HEADER = struct.Struct('<8s32sI')
+ENTRY = struct.Struct('<QQQ')
+NAME_LENGTH = struct.Struct('<H')
+MAX_BLOB_BYTES = 2 ** 32 - 1  # 偏移为 uint32，每个表的字符串区不超过 4GB
+
+
+def cache_directory():
+    """目录缓存所在目录，None 表示不写缓存"""
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if directory is not None:
+        return directory or None
+    return DEFAULT_CACHE_DIR
+
+
+def source_digest(sources, files=()):
+    """
+    数据源的 sha256（十六进制）
+
+    sources: 可 JSON 序列化的数据源（键的顺序计入哈希，目录按它展开）
+    files: 数据源文件路径，按文件内容计入哈希
+    """
+    digest = hashlib.sha256(f"{CATALOG_FORMAT}:{sys.byteorder}:".encode('ascii'))
+    digest.update(json.dumps(sources, ensure_ascii=False).encode('utf-8'))
+    for path in files:
+        digest.update(b'\x00' + os.path.basename(path).encode('utf-8') + b'\x00')
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ==================== 文件读写 ====================
+
+def _padding(position):
+    return -position % 8
+
+
+def write_catalog(path, digest, tables):
+    """把 {表名: 字符串列表} 写入缓存文件（先写临时文件再改名，并发写入时不会读到半个文件）"""
+    directory = os.path.dirname(path) or '.'
+    blobs = {}
+    for name, values in tables.items():
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = array('I', [0])
+        total = 0
+        for value in encoded:
+            total += len(value)
+            if total > MAX_BLOB_BYTES:
+                raise ValueError(f"目录表 {name} 超过 4GB，无法缓存")
+            offsets.append(total)
+        blobs[name] = (len(encoded), offsets.tobytes(), b''.join(encoded))
+
+    names = [name.encode('utf-8') for name in blobs]
+    position = HEADER.size + sum(NAME_LENGTH.size + len(name) + ENTRY.size for name in names)
+    entries = []
+    for count, offsets, blob in blobs.values():
+        position += _padding(position)
+        entries.append((count, position, position + len(offsets)))
+        position += len(offsets) + len(blob)
+
+    fd, temp_path = tempfile.mkstemp(prefix='.catalog-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(CATALOG_MAGIC, bytes.fromhex(digest), len(names)))
+            for name, entry in zip(names, entries):
+                f.write(NAME_LENGTH.pack(len(name)) + name + ENTRY.pack(*entry))
+            for (count, offsets, blob), (_, offsets_position, _) in zip(blobs.values(), entries):
+                f.write(b'\x00' * (offsets_position - f.tell()))
+                f.write(offsets)
+                f.write(blob)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_catalog(path, digest):
+    """映射缓存文件，返回 {表名: MappedStrings}；文件不存在、损坏或哈希不符时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    view = memoryview(buffer)
+    try:
+        magic, stored, count = HEADER.unpack_from(view)
+        if magic != CATALOG_MAGIC or stored.hex() != digest:
+            return None
+        tables = {}
+        position = HEADER.size
+        for _ in range(count):
+            (length,) = NAME_LENGTH.unpack_from(view, position)
+            position += NAME_LENGTH.size
+            name = str(view[position:position + length], 'utf-8')
+            position += length
+            rows, offsets_position, blob_position = ENTRY.unpack_from(view, position)
+            position += ENTRY.size
+            tables[name] = MappedStrings(view, rows, offsets_position, blob_position)
+        return tables
+    except (struct.error, ValueError, TypeError):
+        return None
+
+
+class MappedStrings(Sequence):
+    """
+    映射在缓存文件上的只读字符串列表
+
+    支持 len()、下标、切片和迭代，可直接用于 random.choice / random.sample；
+    按下标取值时才解码，解码过的值留在字典里，热循环中重复抽取不再解码
+    """
+
+    def __init__(self, view, count, offsets_position, blob_position):
+        self._count = count
+        self._offsets = view[offsets_position:blob_position].cast('I')
+        end = self._offsets[count] if len(self._offsets) == count + 1 else -1
+        if end < 0 or blob_position + end > len(view):
+            raise ValueError("目录缓存文件已截断")
+        self._blob = view[blob_position:blob_position + end]
+        self._decoded = {}
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        try:
+            return self._decoded[index]
+        except (KeyError, TypeError):
+            pass
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        position = index + self._count if index < 0 else index
+        if not 0 <= position < self._count:
+            raise IndexError('catalog index out of range')
+        value = str(self._blob[self._offsets[position]:self._offsets[position + 1]], 'utf-8')
+        self._decoded[index] = value
+        return value
+
+    def __iter__(self):
+        """顺序遍历（不留解码缓存，遍历大表不会把整表留在内存里）"""
+        offsets, blob = self._offsets, self._blob
+        for position in range(self._count):
+            yield str(blob[offsets[position]:offsets[position + 1]], 'utf-8')
+
+
+# ==================== 目录 ====================
+
+class Catalog:
+    """
+    一组由数据源展开的表：catalog[表名] -> 字符串序列
+
+    name: 缓存文件名前缀（各生成脚本取不同的名字）
+    sources: 可 JSON 序列化的数据源，缓存未命中时传给 build
+    build: build(sources) -> {表名: 字符串列表}
+    files: 数据源文件（内容变化时缓存失效）；directory: 缓存目录，默认 cache_directory()
+    构造时不做任何事，第一次取表时才打开缓存或展开
+    """
+
+    def __init__(self, name, sources, build, files=(), directory=None):
+        self.name = name
+        self.sources = sources
+        self.build = build
+        self.files = tuple(files)
+        self.directory = cache_directory() if directory is None else directory
+        self.path = None
+        self.cached = False  # 是否从缓存文件映射（False 为本次展开）
+        self._tables = None
+
+    def __getitem__(self, table):
+        if self._tables is None:
+            self._tables = self._load()
+        return self._tables[table]
+
+    def _load(self):
+        digest = source_digest(self.sources, self.files)
+        if self.directory:
+            self.path = os.path.join(self.directory, f"{self.name}-{digest[:16]}{CATALOG_SUFFIX}")
+            tables = read_catalog(self.path, digest)
+            if tables is not None:
+                self.cached = True
+                return tables
+        tables = {name: list(values) for name, values in self.build(self.sources).items()}
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                write_catalog(self.path, digest, tables)
+            except OSError:
+                return tables  # 缓存目录不可写：本次直接用展开的列表
+            mapped = read_catalog(self.path, digest)
+            if mapped is not None:
+                return mapped
+        return tables
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+按列存储的内存表
+非流式路径（generate_sql、基准测试）需要把整张表留在内存中。每行一个字典时，
+重复的键、每个值的对象头和逐行复制的商户名称/分类会让千万级订单占用数GB。
+ColumnStore 按列保存：
+
+- int：整数，array('q')，每个值8字节
+- code：低基数字符串（状态、分类、商户名称、支付方式等）按字典编码，
+  每个值存2字节编号（超过65535种取值时自动改为4字节），相同字符串只保留一份
+- text：其他字符串（ID、时间、昵称等），UTF-8 连续存放在一个 bytearray 中，
+  另存结束位置，每个值约为字符串长度 + 8字节
+
+读取时按列解码；rows() 按字段顺序产出元组，可直接交给写出器。
+
+写出器的 write_columns() 也按列接收数据（见 column_values / format_column）：列可以是列表、
+numpy 数组或 CodeColumn，向量化引擎整列产出的数据不必先拆成逐行的元组；
+写出器用 column_chunks 按批切块格式化，同一时刻只有一批行的字符串在内存中。
+"""
+
+from array import array
+
+COLUMN_CHUNK_ROWS = 10000  # 写出器按列写出时每块格式化的行数
+
+
+class IntColumn:
+    """非空整数列"""
+
+    def __init__(self):
+        self.values = array('q')
+        self.append = self.values.append
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def nbytes(self):
+        return self.values.itemsize * len(self.values)
+
+
+class CodeColumn:
+    """字典编码的字符串列（可包含 None）"""
+
+    def __init__(self):
+        self.codes = array('H')
+        self.values = []  # 编号 -> 值
+        self.index = {}  # 值 -> 编号
+
+    @classmethod
+    def from_codes(cls, codes, values):
+        """
+        由现成的编号序列（numpy 数组、array 或列表）和取值表构造，只用于整列写出（不能再 append）
+
+        向量化引擎中商户、状态、用户等列本来就是下标数组，不必展开成逐行的字符串
+        """
+        column = cls.__new__(cls)
+        column.codes = codes
+        column.values = values if isinstance(values, list) else list(values)
+        column.index = None
+        return column
+
+    def append(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+            if code > 0xFFFF and self.codes.typecode == 'H':
+                self.codes = array('I', self.codes)
+        self.codes.append(code)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def nbytes(self):
+        return self.codes.itemsize * len(self.codes)
+
+
+class TextColumn:
+    """UTF-8 连续存放的字符串列（可包含 None，结束位置取反表示空值）"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array('q')
+
+    def append(self, value):
+        if value is None:
+            self.ends.append(~len(self.data))
+        else:
+            self.data += value.encode('utf-8')
+            self.ends.append(len(self.data))
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __iter__(self):
+        data = self.data
+        start = 0
+        for end in self.ends:
+            if end < 0:
+                yield None
+                start = ~end
+            else:
+                yield data[start:end].decode('utf-8')
+                start = end
+
+    def __getitem__(self, index):
+        index = range(len(self.ends))[index]
+        end = self.ends[index]
+        if end < 0:
+            return None
+        start = self.ends[index - 1] if index else 0
+        return self.data[(~start if start < 0 else start):end].decode('utf-8')
+
+    def nbytes(self):
+        return len(self.data) + self.ends.itemsize * len(self.ends)
+
+
+def as_list(values):
+    """numpy 数组 / array -> Python 列表（元素为 Python 的 int、str）；列表原样返回"""
+    if isinstance(values, list):
+        return values
+    tolist = getattr(values, 'tolist', None)
+    return tolist() if tolist is not None else list(values)
+
+
+def column_values(column):
+    """一列的值（Python 列表）；CodeColumn 按编号展开"""
+    if isinstance(column, CodeColumn):
+        return list(map(column.values.__getitem__, as_list(column.codes)))
+    return as_list(column)
+
+
+def column_chunks(columns, size):
+    """把等长的各列按 size 行切块，逐块产出 (行数, 各列切片)；CodeColumn 只切编号，取值表共享"""
+    total = len(columns[0]) if columns else 0
+    for start in range(0, total, size):
+        stop = min(start + size, total)
+        yield stop - start, [CodeColumn.from_codes(column.codes[start:stop], column.values)
+                             if isinstance(column, CodeColumn) else column[start:stop]
+                             for column in columns]
+
+
+def format_column(column, fmt):
+    """
+    逐值格式化一列（fmt 如 sql_escape、tsv_value），返回列表
+
+    CodeColumn 的取值表比行数少时每种取值只格式化一次，再按编号展开
+    """
+    if isinstance(column, CodeColumn) and len(column.values) < len(column.codes):
+        formatted = [fmt(value) for value in column.values]
+        return list(map(formatted.__getitem__, as_list(column.codes)))
+    return list(map(fmt, column_values(column)))
+
+
+COLUMN_CLASSES = {
+    'int': IntColumn,
+    'code': CodeColumn,
+    'text': TextColumn,
+}
+
+
+class ColumnStore:
+    """
+    一张表的按列存储
+
+    fields: 字段名（行字典的键），按此顺序存储和产出
+    types: {字段名: 'int' / 'code' / 'text'}，未列出的字段按 text 存储
+    """
+
+    def __init__(self, fields, types=None):
+        types = types or {}
+        self.fields = tuple(fields)
+        self.columns = {field: COLUMN_CLASSES[types.get(field, 'text')]() for field in self.fields}
+        self._appends = [self.columns[field].append for field in self.fields]
+
+    def append(self, row):
+        """追加一行（字典，多余的键忽略）"""
+        for field, append in zip(self.fields, self._appends):
+            append(row[field])
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def __len__(self):
+        return len(self.columns[self.fields[0]])
+
+    def column(self, field):
+        """按行顺序产出一列的值"""
+        return iter(self.columns[field])
+
+    def rows(self, fields=None):
+        """按 fields（默认全部字段）的顺序逐行产出元组"""
+        return zip(*(self.columns[field] for field in (fields or self.fields)))
+
+    def row(self, index):
+        """第 index 行（字典），用于调试和抽查"""
+        return {field: self.columns[field][index] for field in self.fields}
+
+    def nbytes(self):
+        """各列占用的字节数（不含字典编码的取值表）"""
+        return sum(column.nbytes() for column in self.columns.values())
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+活跃度分布
+用幂律（Zipf / Pareto）描述每个用户的订单数和商户热度，少数头部用户和连锁商户
+贡献大部分数据，用于复现 user_points 热点行和热点索引页的争用。
+离散分布预先构造 Vose 别名表，每次抽样 O(1)。
+"""
+
+DISTRIBUTIONS = ('uniform', 'zipf', 'pareto')
+
+
+class AliasTable:
+    """Vose 别名表：按任意权重在 [0, n) 中抽样，构造 O(n)，抽样 O(1)"""
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("权重不能为空或全部为0")
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        prob = [1.0] * n
+        alias = list(range(n))
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # 剩余项因浮点误差略偏离1，按1处理
+        self.prob = prob
+        self.alias = alias
+        self.n = n
+
+    def sample(self, rng):
+        """抽一个下标；rng 为 random 模块或 random.Random（每次只消耗一个随机数）"""
+        u = rng.random() * self.n
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+    def sample_array(self, np_rng, count):
+        """NumPy 批量抽样，返回下标数组"""
+        import numpy as np
+        u = np_rng.random(count) * self.n
+        i = u.astype(np.int64)
+        prob = np.asarray(self.prob)
+        alias = np.asarray(self.alias, dtype=np.int64)
+        return np.where(u - i < prob[i], i, alias[i])
+
+
+def parse_distribution(spec):
+    """
+    解析分布参数：'uniform' / 'zipf:S' / 'pareto:A'
+    返回 (名称, 参数)；参数缺省时 zipf 为 1.2，pareto 为 1.5
+    """
+    name, _, param = (spec or 'uniform').partition(':')
+    if name not in DISTRIBUTIONS:
+        raise ValueError(f"未知分布: {spec}（可选 uniform / zipf:S / pareto:A）")
+    if name == 'uniform':
+        return name, None
+    value = float(param) if param else (1.2 if name == 'zipf' else 1.5)
+    if value <= 0:
+        raise ValueError(f"分布参数必须大于0: {spec}")
+    return name, value
+
+
+def rank_weights(spec, n):
+    """
+    第 1..n 名的权重，uniform 返回 None
+
+    zipf: 1 / k^s
+    pareto: 离散化的 Pareto，P(k) = k^-a - (k+1)^-a
+    """
+    name, param = parse_distribution(spec)
+    if name == 'zipf':
+        return [k ** -param for k in range(1, n + 1)]
+    if name == 'pareto':
+        return [k ** -param - (k + 1) ** -param for k in range(1, n + 1)]
+    return None
+
+
+def alias_table(spec, n):
+    """按分布参数构造 n 个名次的别名表，uniform 返回 None（调用方沿用原有的均匀抽样）"""
+    weights = rank_weights(spec, n)
+    return None if weights is None else AliasTable(weights)
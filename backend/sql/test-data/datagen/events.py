@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+积分事件模型
+在"支付获得积分"之外按比例生成消耗积分的事件，覆盖 total_spent 和其他 record_type 的写入路径：
+
+- refund：已支付订单退款（订单状态 refunded），扣回该订单发放的积分
+- cancel：支付后取消（订单状态 cancelled，保留 paid_at），同样扣回积分
+- redeem：积分兑换（商城消费）
+- expire：积分过期
+
+事件顺序固定：扣回发生在对应订单支付之后；兑换、过期发生在用户最后一次活动之后，
+按时间依次从可用积分中扣除。扣回的积分不超过该订单发放的积分，兑换和过期只扣可用积分，
+因此余额始终不为负。
+"""
+
+from array import array
+from datetime import datetime, timedelta
+
+from datagen.state import UserBalances
+
+EVENT_KINDS = ('refund', 'cancel', 'redeem', 'expire')
+DEFAULT_RATES = {
+    'refund': 0.03,  # 已支付订单中退款的比例
+    'cancel': 0.02,  # 已支付订单中支付后取消的比例
+    'redeem': 0.4,  # 用户兑换积分的概率
+    'expire': 0.1,  # 用户有积分过期的概率
+}
+REDEEM_MAX = 3  # 每个用户最多兑换次数
+REDEEM_SHARE = (0.2, 0.8)  # 每次兑换占可用积分的比例
+MIN_REDEEM_POINTS = 10  # 可用积分少于该值时不兑换
+EXPIRE_SHARE = (0.1, 0.5)  # 过期积分占可用积分的比例
+CLAWBACK_DELAY = (3600, 7 * 86400)  # 支付到退款/取消的间隔（秒）
+
+# 退款/取消后的订单状态
+ORDER_STATUSES = {'refund': 'refunded', 'cancel': 'cancelled'}
+
+EVENT_DESCRIPTIONS = {
+    'refund': '订单退款扣回{points}积分',
+    'cancel': '订单取消扣回{points}积分',
+    'redeem': '积分商城兑换消耗{points}积分',
+    'expire': '{points}积分已过期',
+}
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+EPOCH = datetime(1970, 1, 1)
+
+
+def parse_events(spec):
+    """
+    解析事件模型参数
+
+    'none' -> None（只生成支付获得积分）；'default' -> 默认比例；
+    'refund=0.05,redeem=0.5' -> 在默认比例上覆盖指定事件的比例
+    """
+    spec = (spec or 'none').strip().lower()
+    if spec == 'none':
+        return None
+    rates = {}
+    if spec != 'default':
+        for item in spec.split(','):
+            kind, sep, value = item.partition('=')
+            kind = kind.strip()
+            if kind not in EVENT_KINDS or not sep:
+                raise ValueError(f"无法解析事件参数: {item}（格式 refund=0.03,cancel=0.02,redeem=0.4,expire=0.1）")
+            try:
+                rates[kind] = float(value)
+            except ValueError:
+                raise ValueError(f"事件比例不是数字: {item}")
+            if not 0 <= rates[kind] <= 1:
+                raise ValueError(f"事件比例需在 0~1 之间: {item}")
+    model = EventModel(rates)
+    if model.rates['refund'] + model.rates['cancel'] > 1:
+        raise ValueError("refund + cancel 不能超过 1")
+    return model
+
+
+class EventModel:
+    """各类事件的发生比例和抽样（逐行生成用 random 模块，向量化引擎见 datagen.vector）"""
+
+    def __init__(self, rates=None):
+        self.rates = dict(DEFAULT_RATES, **(rates or {}))
+
+    def paid_outcome(self, rng):
+        """已支付订单的后续：None（保持已支付）/ 'refund' / 'cancel'"""
+        r = rng.random()
+        if r < self.rates['refund']:
+            return 'refund'
+        if r < self.rates['refund'] + self.rates['cancel']:
+            return 'cancel'
+        return None
+
+    def clawback_time(self, rng, paid_at, now):
+        """退款/取消时间：支付后 CLAWBACK_DELAY 内，不晚于 now"""
+        return min(paid_at + timedelta(seconds=rng.randint(*CLAWBACK_DELAY)), now)
+
+    def balance_events(self, rng, available, start, end):
+        """
+        兑换和过期事件：返回 [(事件, 扣除积分, 时间), ...]
+
+        事件时间在 [start, end] 内均匀抽样并排序（过期排在最后），
+        依次从 available 中扣除，积分不足的事件跳过。
+        """
+        kinds = []
+        if rng.random() < self.rates['redeem']:
+            kinds += ['redeem'] * rng.randint(1, REDEEM_MAX)
+        if rng.random() < self.rates['expire']:
+            kinds.append('expire')
+        if not kinds:
+            return []
+        span = max(int((end - start).total_seconds()), 0)
+        times = sorted(start + timedelta(seconds=rng.randint(0, span)) for _ in kinds)
+        events = []
+        for kind, time in zip(kinds, times):
+            if kind == 'redeem':
+                if available < MIN_REDEEM_POINTS:
+                    continue
+                points = max(1, int(available * rng.uniform(*REDEEM_SHARE)))
+            else:
+                points = int(available * rng.uniform(*EXPIRE_SHARE))
+                if points <= 0:
+                    continue
+            available -= points
+            events.append((kind, points, time))
+        return events
+
+
+def event_description(kind, points):
+    """积分记录的描述"""
+    return EVENT_DESCRIPTIONS[kind].format(points=points)
+
+
+class PointsLedger(UserBalances):
+    """
+    运行中的积分账本：按用户序号保存余额（int64 数组，同 UserBalances）、最后活动时间
+    和首次活动顺序，替代以用户ID为键的字典，千万级用户也只占几百MB
+    """
+
+    def __init__(self, count=0):
+        super().__init__(count)
+        self.last_active = array('q', bytes(8 * count))  # 秒（自1970-01-01，本地时间），0 表示未记录
+        self.seen = bytearray(count)
+        self.order = array('q')  # 按首次活动排列的用户序号
+
+    def earn(self, index, points, when=None):
+        """获得积分"""
+        self.fields['available_points'][index] += points
+        self.fields['total_earned'][index] += points
+        self.touch(index, when)
+
+    def spend(self, index, points, when=None):
+        """扣除积分（兑换、扣回、过期都计入 total_spent）"""
+        self.fields['available_points'][index] -= points
+        self.fields['total_spent'][index] += points
+        self.touch(index, when)
+
+    def touch(self, index, when=None):
+        """记录活动（when 为 datetime 时同时更新最后活动时间）"""
+        if not self.seen[index]:
+            self.seen[index] = 1
+            self.order.append(index)
+        if when is not None:
+            seconds = int((when - EPOCH).total_seconds())
+            if seconds > self.last_active[index]:
+                self.last_active[index] = seconds
+
+    def available(self, index):
+        return self.fields['available_points'][index]
+
+    def last_active_time(self, index):
+        """最后活动时间；没有记录时返回 None"""
+        seconds = self.last_active[index]
+        return EPOCH + timedelta(seconds=seconds) if seconds else None
+
+    def active_users(self):
+        """有过积分活动的用户序号（按首次活动顺序）"""
+        return self.order
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+可插拔的ID生成策略
+legacy 为原有格式（前缀 + 时间戳 + 计数 + 随机后缀，28位），由生成脚本自己实现；
+这里提供只依赖起始时间和计数器的紧凑策略，单调递增，不需要每行取时间和随机数：
+
+  snowflake  前缀 + 64位整数（十进制约19位）：毫秒时间 | 分片号 | 序号
+  ulid       前缀 + 18位 Crockford Base32：10位毫秒时间 | 8位计数（按分片间隔取长度，ord_ 前缀共22位）
+"""
+
+from datetime import datetime
+
+from datagen.shard import SHARD_ID_STRIDE
+
+ID_STRATEGIES = ('legacy', 'snowflake', 'ulid')
+
+SNOWFLAKE_EPOCH = datetime(2020, 1, 1)  # snowflake 时间起点
+SNOWFLAKE_WORKER_BITS = 10
+SNOWFLAKE_SEQUENCE_BITS = 12
+MAX_SHARDS = 1 << SNOWFLAKE_WORKER_BITS  # snowflake / ulid 支持的分片数
+
+CROCKFORD_BASE32 = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+
+class SnowflakeIds:
+    """
+    snowflake 风格ID
+
+    计数器按 stride 拆成 (分片号, 序号)：分片号占10位；序号每满4096向毫秒时间进1，
+    相当于从起始时间开始每毫秒发4096个ID。
+    """
+
+    def __init__(self, start_time, stride=SHARD_ID_STRIDE):
+        self.start_ms = int((start_time - SNOWFLAKE_EPOCH).total_seconds() * 1000)
+        self.stride = stride
+
+    def format(self, prefix, counter):
+        worker, sequence = divmod(counter, self.stride)
+        if worker >= MAX_SHARDS:
+            raise ValueError(f"snowflake 最多支持 {MAX_SHARDS} 个分片")
+        millis = self.start_ms + (sequence >> SNOWFLAKE_SEQUENCE_BITS)
+        value = (
+            (millis << (SNOWFLAKE_WORKER_BITS + SNOWFLAKE_SEQUENCE_BITS))
+            | (worker << SNOWFLAKE_SEQUENCE_BITS)
+            | (sequence & ((1 << SNOWFLAKE_SEQUENCE_BITS) - 1))
+        )
+        return f"{prefix}{value}"
+
+    def format_many(self, prefix, start, count):
+        return [self.format(prefix, counter) for counter in range(start, start + count)]
+
+
+class UlidIds:
+    """
+    ULID 风格ID
+
+    时间部分固定为起始时间（10位），随机部分用计数器代替，
+    长度刚好容纳 MAX_SHARDS 个分片的计数区间（stride 为 10^9 时8位），字典序即生成顺序。
+    """
+
+    def __init__(self, start_time, stride=SHARD_ID_STRIDE):
+        millis = int(start_time.timestamp() * 1000) & ((1 << 48) - 1)
+        self.time_part = encode_base32(millis, 10)
+        self.counter_length = base32_length(stride * MAX_SHARDS - 1)
+        self.limit = 32 ** self.counter_length
+
+    def format(self, prefix, counter):
+        if counter >= self.limit:
+            raise ValueError(f"ulid 最多支持 {MAX_SHARDS} 个分片")
+        return f"{prefix}{self.time_part}{encode_base32(counter, self.counter_length)}"
+
+    def format_many(self, prefix, start, count):
+        if start + count > self.limit:
+            raise ValueError(f"ulid 最多支持 {MAX_SHARDS} 个分片")
+        head = f"{prefix}{self.time_part}"
+        length = self.counter_length
+        return [head + encode_base32(counter, length) for counter in range(start, start + count)]
+
+
+def base32_length(value):
+    """容纳非负整数 value 需要的 Base32 位数"""
+    return max(1, -(-value.bit_length() // 5))
+
+
+def encode_base32(value, length):
+    """非负整数 -> 定长 Crockford Base32"""
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        chars.append(CROCKFORD_BASE32[digit])
+    return ''.join(reversed(chars))
+
+
+def make_id_generator(strategy, start_time, stride=SHARD_ID_STRIDE):
+    """按名称创建ID生成器；legacy 返回 None，由调用方使用原有实现"""
+    if strategy == 'legacy':
+        return None
+    if strategy == 'snowflake':
+        return SnowflakeIds(start_time, stride)
+    if strategy == 'ulid':
+        return UlidIds(start_time, stride)
+    raise ValueError(f"未知的ID策略: {strategy}（可选 {', '.join(ID_STRATEGIES)}）")
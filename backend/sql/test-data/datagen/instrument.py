@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+性能分析工具
+在运行时包装已有函数，不改动生成代码：
+- 按表的实时进度（行数、行/秒），定期输出到 stderr
+- 按阶段（生成 / 转义 / 拼接 / 写出）累计耗时，嵌套调用只计各自的独占时间
+- 可选的 cProfile / tracemalloc 采集，结果写入文件
+
+包装本身有开销（转义按值计时），耗时比例用于定位热点，不代表未包装时的绝对速度。
+inspect、cProfile、tracemalloc 和 datagen.loader 在用到时才导入，不开启分析的运行不付出导入时间。
+"""
+
+import contextlib
+import functools
+import sys
+import time
+from collections import defaultdict
+
+from datagen import bulk, writer
+
+PROGRESS_INTERVAL = 5.0  # 进度输出间隔（秒）
+STAGES = ('generation', 'escaping', 'joining', 'writing')
+STAGE_LABELS = {
+    'generation': '生成',
+    'escaping': '转义',
+    'joining': '拼接',
+    'writing': '写出',
+}
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+PROFILE_OUTPUTS = {
+    'cprofile': 'profile.prof',
+    'tracemalloc': 'tracemalloc.txt',
+}
+TRACEMALLOC_TOP = 50  # tracemalloc 报告中列出的分配位置数
+
+
+class StageTimer:
+    """按阶段累计耗时；嵌套调用时外层阶段扣除内层耗时（独占时间）"""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self._stack = []  # [阶段, 开始时间, 内层耗时]
+
+    def enter(self, stage):
+        self._stack.append([stage, time.perf_counter(), 0.0])
+
+    def exit(self):
+        stage, start, inner = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.seconds[stage] += elapsed - inner
+        self.calls[stage] += 1
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+
+class ProgressReporter:
+    """按表统计写出行数，每隔 interval 秒输出一次累计行数和区间速率"""
+
+    def __init__(self, interval=PROGRESS_INTERVAL, out=None):
+        self.interval = interval
+        self.out = out or sys.stderr
+        self.counts = defaultdict(int)
+        self.started = time.perf_counter()
+        self._last_time = self.started
+        self._last_counts = {}
+
+    def add(self, table, rows=1):
+        self.counts[table] += rows
+        now = time.perf_counter()
+        if now - self._last_time >= self.interval:
+            self.report(now)
+
+    def report(self, now=None):
+        """输出一行进度"""
+        now = now or time.perf_counter()
+        elapsed = now - self._last_time
+        parts = []
+        for table, count in self.counts.items():
+            rate = (count - self._last_counts.get(table, 0)) / elapsed if elapsed else 0
+            parts.append(f"{table} {count:,}（{rate:,.0f} 行/秒）")
+        print(f"⏳ {now - self.started:7.1f}s | " + ' | '.join(parts), file=self.out, flush=True)
+        self._last_time = now
+        self._last_counts = dict(self.counts)
+
+
+class Instrumentation:
+    """
+    运行时包装函数和写出器方法，统计阶段耗时和进度
+
+    wrap() 替换模块或类上的属性（生成器函数按每次 next() 计时），
+    uninstall() 恢复原函数。
+    """
+
+    def __init__(self, progress_interval=PROGRESS_INTERVAL, out=None):
+        self.out = out or sys.stderr
+        self.timer = StageTimer()
+        self.progress = ProgressReporter(progress_interval, self.out)
+        self.started = time.perf_counter()
+        self._patches = []
+
+    def wrap(self, owner, name, stage):
+        """把 owner.name 包装为计入 stage 的版本"""
+        import inspect
+        original = getattr(owner, name)
+        timer = self.timer
+        if inspect.isgeneratorfunction(original):
+            @functools.wraps(original)
+            def wrapped(*args, **kwargs):
+                iterator = original(*args, **kwargs)
+                while True:
+                    timer.enter(stage)
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        timer.exit()
+                    yield item
+        else:
+            @functools.wraps(original)
+            def wrapped(*args, **kwargs):
+                timer.enter(stage)
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    timer.exit()
+        self._patch(owner, name, wrapped)
+
+    def wrap_row_writer(self, cls, stage):
+        """包装写出器的 write_row 和 write_columns：计入 stage，并按表统计进度"""
+        original = cls.write_row
+        original_columns = cls.write_columns
+        timer = self.timer
+        progress = self.progress
+
+        @functools.wraps(original)
+        def write_row(self, table, values):
+            progress.add(table)
+            timer.enter(stage)
+            try:
+                return original(self, table, values)
+            finally:
+                timer.exit()
+        self._patch(cls, 'write_row', write_row)
+
+        @functools.wraps(original_columns)
+        def write_columns(self, table, columns):
+            progress.add(table, len(columns[0]) if columns else 0)
+            timer.enter(stage)
+            try:
+                return original_columns(self, table, columns)
+            finally:
+                timer.exit()
+        self._patch(cls, 'write_columns', write_columns)
+
+    def wrap_writers(self):
+        """包装 datagen 中各写出器的热点：值转义、行拼接、批量写出"""
+        from datagen import loader
+        self.wrap(writer, 'sql_value', 'escaping')
+        self.wrap(writer, 'sql_escape', 'escaping')
+        self.wrap(bulk, 'tsv_value', 'escaping')
+        self.wrap_row_writer(writer.SQLBatchWriter, 'joining')
+        self.wrap(writer.SQLBatchWriter, 'flush', 'writing')
+        self.wrap_row_writer(bulk.TSVBulkWriter, 'writing')  # TSV 逐行直接写文件
+        self.wrap_row_writer(loader.DatabaseWriter, 'joining')
+        self.wrap(loader.DatabaseWriter, 'flush', 'writing')  # 交给写入线程，队列满时阻塞
+
+    def _patch(self, owner, name, value):
+        self._patches.append((owner, name, vars(owner)[name]))
+        setattr(owner, name, value)
+
+    def uninstall(self):
+        """恢复所有被包装的函数"""
+        for owner, name, original in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches = []
+
+    def report(self):
+        """输出各阶段累计耗时和各表总行数"""
+        total = time.perf_counter() - self.started
+        print("\n" + "="*60, file=self.out)
+        print("⏱️  阶段耗时", file=self.out)
+        print("="*60, file=self.out)
+        measured = 0.0
+        for stage in STAGES:
+            seconds = self.timer.seconds.get(stage, 0.0)
+            measured += seconds
+            share = seconds / total if total else 0
+            print(f"  {STAGE_LABELS[stage]:<4}{seconds:10.2f}s {share:7.1%}  {self.timer.calls.get(stage, 0):>12,} 次",
+                  file=self.out)
+        other = max(total - measured, 0.0)
+        print(f"  {'其他':<4}{other:10.2f}s {other / total if total else 0:7.1%}", file=self.out)
+        print(f"  {'合计':<4}{total:10.2f}s", file=self.out)
+        for table, count in self.progress.counts.items():
+            print(f"  📊 {table}: {count:,} 行（平均 {count / total if total else 0:,.0f} 行/秒）", file=self.out)
+
+
+@contextlib.contextmanager
+def profiling(mode=None, path=None):
+    """
+    可选的性能采集
+
+    mode 为 'cprofile' 时写 pstats 文件（python -m pstats 查看）；
+    'tracemalloc' 时写内存分配最多的位置和峰值内存；None 时不采集。
+    """
+    if mode is None:
+        yield
+        return
+    path = path or PROFILE_OUTPUTS[mode]
+    if mode == 'cprofile':
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+            print(f"💾 cProfile 结果已保存: {path}", file=sys.stderr)
+        return
+
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"当前内存: {current / 1024 / 1024:.1f} MB\n")
+            f.write(f"峰值内存: {peak / 1024 / 1024:.1f} MB\n\n")
+            for stat in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]:
+                f.write(f"{stat}\n")
+        print(f"💾 tracemalloc 结果已保存: {path}", file=sys.stderr)
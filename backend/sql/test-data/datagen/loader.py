@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+直接写入数据库
+生成的行通过连接池按批 executemany 写入，不再经过中间SQL文件和客户端解析。
+每张表一个写入线程：无依赖的表（users、merchants）并发写入，
+依赖表等父表全部提交后才开始写入。
+
+目标地址：
+  mysql://用户:密码@主机:端口/库名   需要 pymysql（可选依赖）
+  sqlite:///路径/文件.db            本地替身，自动建表，便于测试（三个斜杠为相对路径，
+                                   sqlite:////tmp/文件.db 四个斜杠为绝对路径）
+"""
+
+import queue
+import sqlite3
+import threading
+from urllib.parse import unquote, urlparse
+
+from datagen.columnar import column_values
+
+QUEUE_BATCHES = 8  # 每张表最多排队的批次数，生成速度超过写入速度时反压
+
+
+class MySQLBackend:
+    """MySQL 连接参数与方言"""
+
+    placeholder = '%s'
+
+    def __init__(self, url):
+        try:
+            import pymysql
+        except ImportError:
+            raise ImportError("写入MySQL需要 pymysql：pip install pymysql")
+        self.driver = pymysql
+        self.params = {
+            'host': url.hostname or '127.0.0.1',
+            'port': url.port or 3306,
+            'user': unquote(url.username or 'root'),
+            'password': unquote(url.password or ''),
+            'database': url.path.lstrip('/'),
+            'charset': 'utf8mb4',
+            'autocommit': False,
+        }
+
+    def connect(self):
+        return self.driver.connect(**self.params)
+
+    def prepare(self, conn, tables, truncate):
+        """清空旧数据"""
+        cursor = conn.cursor()
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in truncate:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        conn.commit()
+
+    def stream_rows(self, conn, sql):
+        """逐行读取查询结果（服务端游标，不把结果集整体取到客户端）"""
+        cursor = conn.cursor(self.driver.cursors.SSCursor)
+        try:
+            cursor.execute(sql)
+            yield from cursor
+        finally:
+            cursor.close()
+
+
+class SQLiteBackend:
+    """SQLite 本地替身：按列定义自动建表"""
+
+    placeholder = '?'
+
+    def __init__(self, url):
+        # 与 SQLAlchemy 相同：sqlite:///文件.db 为相对路径，sqlite:////绝对路径/文件.db 为绝对路径
+        self.path = unquote(url.path[1:])
+        if url.netloc or not self.path or self.path.endswith('/'):
+            raise ValueError("SQLite 地址应为 sqlite:///相对路径.db 或 sqlite:////绝对路径.db")
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        return conn
+
+    def prepare(self, conn, tables, truncate):
+        """建表并清空旧数据"""
+        for table, columns in tables.items():
+            definition = ', '.join([f"{columns[0]} PRIMARY KEY", *columns[1:]])
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definition})")
+        for table in truncate:
+            conn.execute(f"DELETE FROM {table}")
+        conn.commit()
+
+    def stream_rows(self, conn, sql):
+        """逐行读取查询结果"""
+        yield from conn.execute(sql)
+
+
+def open_backend(target):
+    """解析目标地址"""
+    url = urlparse(target)
+    if url.scheme in ('mysql', 'mysql+pymysql'):
+        return MySQLBackend(url)
+    if url.scheme == 'sqlite':
+        try:
+            return SQLiteBackend(url)
+        except ValueError as e:
+            raise ValueError(f"{e}: {target}") from None
+    raise ValueError(f"不支持的目标地址: {target}（支持 mysql://... 或 sqlite:///...）")
+
+
+class ConnectionPool:
+    """固定大小的连接池，连接按需创建"""
+
+    def __init__(self, connect, size):
+        self.connect = connect
+        self.idle = queue.LifoQueue()
+        self.slots = threading.Semaphore(size)
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        self.slots.acquire()
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            conn = self.connect()
+            with self.lock:
+                self.connections.append(conn)
+            return conn
+
+    def release(self, conn):
+        self.idle.put(conn)
+        self.slots.release()
+
+    def close(self):
+        for conn in self.connections:
+            conn.close()
+        self.connections = []
+
+
+class TableLoader(threading.Thread):
+    """单张表的写入线程：等待父表提交完成后，逐批 executemany 并提交"""
+
+    def __init__(self, writer, table):
+        super().__init__(name=f"load-{table}", daemon=True)
+        self.writer = writer
+        self.table = table
+        self.batches = queue.Queue(maxsize=QUEUE_BATCHES)
+        self.done = threading.Event()
+        self.error = None
+        columns = writer.tables[table]
+        values = ', '.join([writer.backend.placeholder] * len(columns))
+        self.sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values})"
+
+    def run(self):
+        try:
+            for parent in self.writer.parents.get(self.table, ()):
+                self.writer.committed[parent].wait()
+            while True:
+                batch = self.batches.get()
+                if batch is None:
+                    break
+                self._load(batch)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.writer.committed[self.table].set()
+            self.done.set()
+
+    def _load(self, batch):
+        conn = self.writer.pool.acquire()
+        try:
+            conn.cursor().executemany(self.sql, batch)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.writer.pool.release(conn)
+
+    def put(self, batch):
+        """提交一个批次；写入线程出错时抛出异常，避免生成端一直阻塞"""
+        while True:
+            if self.error is not None:
+                raise self.error
+            try:
+                self.batches.put(batch, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+
+class DatabaseWriter:
+    """
+    直接写库，接口与 SQLBatchWriter 一致
+
+    tables: {表名: (列名, ...)}
+    parents: {表名: (父表, ...)}，依赖表在父表全部提交后才开始写入
+    truncate: 写入前清空的表
+    """
+
+    def __init__(self, target, tables, parents=None, batch_rows=1000, pool_size=4, truncate=()):
+        self.backend = open_backend(target)
+        self.tables = tables
+        self.parents = {table: [p for p in deps if p in tables] for table, deps in (parents or {}).items()}
+        self.batch_rows = batch_rows
+        self.pool = ConnectionPool(self.backend.connect, pool_size)
+        self.buffers = {table: [] for table in tables}
+        self.row_counts = {table: 0 for table in tables}
+        self.committed = {table: threading.Event() for table in tables}
+        self.loaders = {}
+        self.finished = set()
+
+        conn = self.pool.acquire()
+        try:
+            self.backend.prepare(conn, tables, truncate)
+        finally:
+            self.pool.release(conn)
+
+    def _loader(self, table):
+        loader = self.loaders.get(table)
+        if loader is None:
+            loader = TableLoader(self, table)
+            loader.start()
+            self.loaders[table] = loader
+        return loader
+
+    def write_row(self, table, values):
+        """追加一行"""
+        buffer = self.buffers[table]
+        buffer.append(tuple(values))
+        self.row_counts[table] += 1
+        if len(buffer) >= self.batch_rows:
+            self.flush(table)
+
+    def write_rows(self, table, rows):
+        """追加多行"""
+        for values in rows:
+            self.write_row(table, values)
+
+    def write_columns(self, table, columns):
+        """追加整列数据（见 SQLBatchWriter.write_columns），按行交给写入线程"""
+        self.write_rows(table, zip(*map(column_values, columns)))
+
+    def flush(self, table=None):
+        """把缓冲的行交给写入线程"""
+        tables = [table] if table else list(self.buffers)
+        for name in tables:
+            if self.buffers[name]:
+                self._loader(name).put(self.buffers[name])
+                self.buffers[name] = []
+
+    def finish(self, table):
+        """该表数据已全部产出：写完后标记为已提交，依赖它的表随即开始写入"""
+        if table in self.finished:
+            return
+        self.flush(table)
+        self._loader(table).put(None)
+        self.finished.add(table)
+
+    def close(self):
+        """等待所有表写完并提交"""
+        try:
+            for table in self.tables:
+                self.finish(table)
+            for loader in self.loaders.values():
+                loader.done.wait()
+            for loader in self.loaders.values():
+                if loader.error is not None:
+                    raise loader.error
+        finally:
+            self.pool.close()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+压缩与分卷输出
+SQL文本边写边压缩（gzip / zstd），按未压缩大小轮转为 x.part-0001.sql.gz 等分卷，
+结束时写清单文件：每个分卷的各表行数、大小和 sha256。
+open_text() / manifest_files() 用于读回这些文件（如 verify_data.py）。
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+
+from datagen.shard import part_filename
+
+try:
+    import zstandard
+except ImportError:  # zstandard 是可选依赖，只有 zstd 压缩时才需要
+    zstandard = None
+
+COMPRESSIONS = ('gzip', 'zstd')
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def manifest_filename(filename):
+    """清单文件名：insert_data.sql -> insert_data.manifest.json"""
+    return f"{os.path.splitext(filename)[0]}.manifest.json"
+
+
+class HashingFile:
+    """二进制文件包装：写入时同步计算 sha256 和字节数（压缩后的实际文件内容）"""
+
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def require_compression(compression):
+    """检查压缩方式是否可用"""
+    if compression == 'zstd' and zstandard is None:
+        raise ImportError("zstd 压缩需要 zstandard：pip install zstandard")
+
+
+def open_compressor(raw, compression):
+    """在 raw 之上打开压缩流，compression 为 None 时直接写 raw"""
+    if compression is None:
+        return raw
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=GZIP_LEVEL, mtime=0)
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False)
+
+
+class RotatingOutput:
+    """
+    可压缩、可分卷的文本输出（接口同文本文件：write / close）
+
+    max_bytes 为空时只写一个文件（filename + 压缩后缀）；否则未压缩内容超过
+    max_bytes 后，在下一个语句边界切换到新分卷。语句边界由 SQLBatchWriter 在每条
+    语句（或事务）结束时调用 boundary(row_counts) 告知，保证每个分卷都是完整语句。
+    第2个及以后的分卷以 part_header 开头，可以单独导入。
+    """
+
+    def __init__(self, filename, compression=None, max_bytes=None, part_header=''):
+        require_compression(compression)
+        self.filename = filename
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.part_header = part_header
+        self.parts = []
+        self.row_counts = {}
+        self._part_start_counts = {}
+        self._stream = None
+        self._open_part()
+
+    def _part_path(self, index):
+        suffix = COMPRESSION_SUFFIXES[self.compression]
+        if self.max_bytes:
+            return part_filename(self.filename, index) + suffix
+        return self.filename + suffix
+
+    def _open_part(self):
+        path = self._part_path(len(self.parts) + 1)
+        self._raw = HashingFile(path)
+        self._stream = open_compressor(self._raw, self.compression)
+        self._path = path
+        self._bytes = 0
+        if self.parts:
+            self.write(self.part_header)
+
+    def _close_part(self):
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+        rows = {table: count - self._part_start_counts.get(table, 0)
+                for table, count in self.row_counts.items()}
+        self.parts.append({
+            'file': os.path.basename(self._path),
+            'rows': {table: count for table, count in rows.items() if count},
+            'bytes': self._bytes,
+            'compressed_bytes': self._raw.size,
+            'sha256': self._raw.sha256.hexdigest(),
+        })
+        self._part_start_counts = dict(self.row_counts)
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self._bytes += len(data)
+        self._stream.write(data)
+        return len(text)
+
+    def boundary(self, row_counts):
+        """语句边界：记录累计行数，当前分卷超过大小上限时切换到下一个分卷"""
+        self.row_counts = dict(row_counts)
+        if self.max_bytes and self._bytes >= self.max_bytes:
+            self._close_part()
+            self._open_part()
+
+    def close(self):
+        """关闭最后一个分卷并写清单"""
+        if self._stream is None:
+            return
+        self._close_part()
+        self._stream = None
+        manifest = {
+            'source': os.path.basename(self.filename),
+            'compression': self.compression,
+            'max_bytes': self.max_bytes,
+            'parts': self.parts,
+            'rows': self.row_counts,
+        }
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    @property
+    def manifest_path(self):
+        return manifest_filename(self.filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_text(path):
+    """按扩展名打开（可能压缩的）文本文件用于读取：.gz / .zst / 普通文件"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith('.zst'):
+        require_compression('zstd')
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return io.TextIOWrapper(raw, encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def manifest_files(path):
+    """清单中的分卷文件路径（按写出顺序，相对清单所在目录）"""
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    directory = os.path.dirname(path)
+    return [os.path.join(directory, part['file']) for part in manifest['parts']]
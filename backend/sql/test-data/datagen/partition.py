@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+按月分区的输出
+生产环境的 payment_orders、points_records 按 created_at 按月做 RANGE 分区，
+而生成脚本按用户顺序产出订单，每个 INSERT 批次都会落到所有分区，导入时随机写、受限于I/O。
+
+- partition_ddl：生成按月分区的DDL（主键加上 created_at，按 UNIX_TIMESTAMP(created_at) 分区）；
+  add_partitions_ddl：追加生成时从 MAXVALUE 分区拆出新月份
+- ExternalSorter：外部归并排序，内存中最多保留 run_rows 行，超过时排好序写入临时文件，
+  最后多路归并，内存占用与数据量无关
+- PartitionSorter：写出器代理，分区表的行先进排序器，close() 时按 (月份, 主键) 顺序写出，
+  导入时一次只顺序写一个分区；其他表原样转发
+"""
+
+import heapq
+import pickle
+import tempfile
+from datetime import datetime
+
+from datagen.columnar import column_values
+
+SORT_RUN_ROWS = 500000  # 每个有序段的行数（内存中最多保留的行数）
+SPILL_CHUNK_ROWS = 4096  # 临时文件中每次序列化的行数（归并时每段只读入一块）
+MAXVALUE_PARTITION = 'pmax'
+
+
+# ==================== 分区DDL ====================
+
+def month_start(value):
+    """所在月份的第一天 0 点"""
+    return datetime(value.year, value.month, 1)
+
+
+def next_month(value):
+    """下个月的第一天 0 点"""
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def month_partitions(start, end):
+    """覆盖 [start, end] 的按月分区：[(分区名, 上界时间), ...]，最后是 MAXVALUE 分区（上界 None）"""
+    partitions = []
+    month = month_start(start)
+    while month <= end:
+        upper = next_month(month)
+        partitions.append((month.strftime('p%Y%m'), upper))
+        month = upper
+    partitions.append((MAXVALUE_PARTITION, None))
+    return partitions
+
+
+def partition_clauses(partitions, column='created_at'):
+    """分区定义列表（PARTITION ... VALUES LESS THAN ...）"""
+    return ",\n".join(
+        f"  PARTITION {name} VALUES LESS THAN (UNIX_TIMESTAMP('{upper:%Y-%m-%d %H:%M:%S}'))"
+        if upper else f"  PARTITION {name} VALUES LESS THAN MAXVALUE"
+        for name, upper in partitions)
+
+
+def partition_ddl(table, partitions, column='created_at', key='id'):
+    """
+    把表改为按月分区的语句
+
+    MySQL 要求分区列包含在每个唯一键中，主键改为 (key, column)；
+    TIMESTAMP 列只能按 UNIX_TIMESTAMP() 做 RANGE 分区。
+    """
+    return [
+        f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY ({key}, {column});",
+        f"ALTER TABLE {table} PARTITION BY RANGE (UNIX_TIMESTAMP({column})) (\n"
+        f"{partition_clauses(partitions, column)}\n);",
+    ]
+
+
+def add_partitions_ddl(table, partitions):
+    """从 MAXVALUE 分区中拆出新的月份分区（partitions 为新增月份，不含 MAXVALUE 分区）"""
+    return [
+        f"ALTER TABLE {table} REORGANIZE PARTITION {MAXVALUE_PARTITION} INTO (\n"
+        f"{partition_clauses(partitions + [(MAXVALUE_PARTITION, None)])}\n);",
+    ]
+
+
+def partition_sort_key(columns, column='created_at', key='id'):
+    """行（按 columns 排列的值）的排序键：(所在月份, 主键)；时间为 'YYYY-MM-DD HH:MM:SS' 字符串"""
+    time_position = columns.index(column)
+    key_position = columns.index(key)
+    return lambda values: ((values[time_position] or '')[:7], values[key_position])
+
+
+# ==================== 外部排序 ====================
+
+class ExternalSorter:
+    """
+    外部归并排序
+
+    add() 收集行，内存中满 run_rows 行时排序并写入临时文件（一个有序段）；
+    sorted_rows() 按 key 归并所有有序段，逐行产出，结束后删除临时文件。
+    directory: 临时文件目录，None 为系统临时目录
+    """
+
+    def __init__(self, key, run_rows=SORT_RUN_ROWS, directory=None):
+        self.key = key
+        self.run_rows = run_rows
+        self.directory = directory
+        self.buffer = []
+        self.runs = []
+        self.rows = 0
+
+    def add(self, values):
+        self.buffer.append(values)
+        self.rows += 1
+        if len(self.buffer) >= self.run_rows:
+            self._spill()
+
+    def _spill(self):
+        """把内存中的行排序后写入一个临时文件"""
+        self.buffer.sort(key=self.key)
+        run = tempfile.TemporaryFile(prefix='datagen-sort-', dir=self.directory)
+        for i in range(0, len(self.buffer), SPILL_CHUNK_ROWS):
+            pickle.dump(self.buffer[i:i + SPILL_CHUNK_ROWS], run, pickle.HIGHEST_PROTOCOL)
+        run.seek(0)
+        self.runs.append(run)
+        self.buffer = []
+
+    @staticmethod
+    def _read_run(run):
+        while True:
+            try:
+                chunk = pickle.load(run)
+            except EOFError:
+                return
+            yield from chunk
+
+    def sorted_rows(self):
+        """按 key 顺序产出所有行（只能调用一次）"""
+        if not self.runs:
+            self.buffer.sort(key=self.key)
+            rows, self.buffer = self.buffer, []
+            yield from rows
+            return
+        if self.buffer:
+            self._spill()
+        try:
+            yield from heapq.merge(*(self._read_run(run) for run in self.runs), key=self.key)
+        finally:
+            for run in self.runs:
+                run.close()
+            self.runs = []
+
+
+class PartitionSorter:
+    """
+    写出器代理：分区表的行先经外部排序，close() 时按 (月份, 主键) 顺序写出，再关闭下层写出器
+
+    tables: {分区表名: 列名}，列中需包含 created_at 和 id；其他表的写入原样转发
+    """
+
+    def __init__(self, writer, tables, run_rows=SORT_RUN_ROWS, directory=None):
+        self.writer = writer
+        self.sorters = {
+            table: ExternalSorter(partition_sort_key(columns), run_rows, directory)
+            for table, columns in tables.items()
+        }
+
+    def write_row(self, table, values):
+        sorter = self.sorters.get(table)
+        if sorter is None:
+            self.writer.write_row(table, values)
+        else:
+            sorter.add(values)
+
+    def write_rows(self, table, rows):
+        sorter = self.sorters.get(table)
+        if sorter is None:
+            self.writer.write_rows(table, rows)
+            return
+        for values in rows:
+            sorter.add(values)
+
+    def write_columns(self, table, columns):
+        sorter = self.sorters.get(table)
+        if sorter is None:
+            self.writer.write_columns(table, columns)
+            return
+        for values in zip(*map(column_values, columns)):
+            sorter.add(values)
+
+    def finish(self, table):
+        if table not in self.sorters:
+            self.writer.finish(table)
+
+    def spilled_runs(self):
+        """已写入临时文件的有序段数"""
+        return sum(len(sorter.runs) for sorter in self.sorters.values())
+
+    def close(self):
+        for table, sorter in self.sorters.items():
+            self.writer.write_rows(table, sorter.sorted_rows())
+            self.writer.finish(table)
+        self.writer.close()
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+高基数字符串字段的唯一值池
+openid、手机号、商户编号、营业执照号、微信支付单号原来每行用 random.choices + join 现拼，
+既慢又不保证唯一（wechat_id、merchant_no 在表中是 UNIQUE，大数据量导入会撞键）。
+
+每个字段是编号到字符串的双射：编号 key 先经仿射置换 (a * key + b) mod space 打散，
+再按字母表编码为定宽的唯一部分；字段宽度超过唯一部分时，其余字符由编号的哈希填充（看起来随机）。
+不同编号一定得到不同的值，不需要哈希集合去重，也不需要记住已发放的值。
+编号取实体自身的全局序号（用户序号、商户序号、订单的ID计数），
+分片和追加生成各自取值也不会冲突，同一编号在任何模式下得到同一个值。
+
+值按块（POOL_BLOCK 个连续编号）整列算出并缓存，热循环只做一次下标查找；
+安装了 numpy 时整块向量化编码，否则逐个计算，两者结果相同。
+"""
+
+import zlib
+from math import gcd
+
+try:
+    import numpy as np
+except ImportError:  # numpy 是可选依赖，没有时逐个计算
+    np = None
+
+POOL_BLOCK = 65536  # 每块的编号数
+GOLDEN_RATIO = 0.6180339887  # 置换乘数取 space 的黄金分割附近，相邻编号的值相距最远
+INT64_MAX = 2 ** 63 - 1
+MASK64 = 2 ** 64 - 1
+MIX_MULTIPLIERS = (0x9E3779B97F4A7C15, 0xBF58476D1CE4E5B9, 0x94D049BB133111EB)  # splitmix64
+
+
+def affine_multiplier(space):
+    """与 space 互素、接近 space × 黄金分割比的乘数（保证置换是双射）"""
+    a = max(int(space * GOLDEN_RATIO), 1)
+    while gcd(a, space) != 1:
+        a += 1
+    return a
+
+
+def mix64(x):
+    """splitmix64 混合函数（Python 整数或 numpy uint64 数组）"""
+    if np is not None and isinstance(x, np.ndarray):
+        x = x * np.uint64(MIX_MULTIPLIERS[0])
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(MIX_MULTIPLIERS[1])
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(MIX_MULTIPLIERS[2])
+        return x ^ (x >> np.uint64(31))
+    x = (x * MIX_MULTIPLIERS[0]) & MASK64
+    x = ((x ^ (x >> 30)) * MIX_MULTIPLIERS[1]) & MASK64
+    x = ((x ^ (x >> 27)) * MIX_MULTIPLIERS[2]) & MASK64
+    return x ^ (x >> 31)
+
+
+class UniqueStringPool:
+    """
+    一个字段的唯一值池：pool[key] -> 字符串
+
+    prefixes: 前缀（多个时由唯一部分决定，如手机号段；须等长）
+    alphabet: 字符集；width: 前缀后的字符数；unique_width: 其中唯一部分的字符数（其余随机填充）
+    容量 space = len(prefixes) × len(alphabet) ** unique_width，编号须在 [0, space) 内
+    """
+
+    def __init__(self, name, prefixes, alphabet, width, unique_width, block=POOL_BLOCK):
+        if len({len(prefix) for prefix in prefixes}) != 1:
+            raise ValueError(f"字段 {name} 的前缀长度必须相同")
+        if not 0 < unique_width <= width:
+            raise ValueError(f"字段 {name} 的唯一部分宽度须在 1~{width} 之间")
+        self.name = name
+        self.prefixes = tuple(prefixes)
+        self.alphabet = alphabet
+        self.width = width
+        self.unique_width = unique_width
+        self.block = block
+        self.span = len(alphabet) ** unique_width  # 每个前缀下的唯一值数
+        self.space = len(self.prefixes) * self.span
+        self.multiplier = affine_multiplier(self.space)
+        self.salt = zlib.crc32(name.encode('utf-8'))
+        self.offset = self.salt % self.space
+        # 一个64位哈希能提供的填充字符数
+        self.chars_per_hash = max(64 // len(alphabet).bit_length(), 1)
+        self._block_index = None
+        self._values = None
+
+    def __getitem__(self, key):
+        if not 0 <= key < self.space:
+            raise ValueError(f"字段 {self.name} 的唯一值已用尽（编号 {key} 超过容量 {self.space}）")
+        index = key // self.block
+        if index != self._block_index:
+            start = index * self.block
+            self._values = self.render(start, min(self.block, self.space - start))
+            self._block_index = index
+        return self._values[key - index * self.block]
+
+    def render(self, start, count):
+        """编号 [start, start + count) 的值（列表）"""
+        if start < 0 or count < 0 or start + count > self.space:
+            raise ValueError(f"字段 {self.name} 的唯一值已用尽（编号 {start + count - 1} 超过容量 {self.space}）")
+        if np is not None:
+            return self._render_numpy(start, count)
+        return self._render_python(start, count)
+
+    def _permuted(self, start, count):
+        """仿射置换后的值（Python 整数列表）"""
+        a, b, space = self.multiplier, self.offset, self.space
+        return [(a * key + b) % space for key in range(start, start + count)]
+
+    def _render_numpy(self, start, count):
+        base = len(self.alphabet)
+        if self.multiplier * (self.space - 1) + self.offset <= INT64_MAX:
+            keys = np.arange(start, start + count, dtype=np.int64)
+            values = (keys * self.multiplier + self.offset) % self.space
+        else:
+            values = np.array(self._permuted(start, count), dtype=np.int64)
+        prefix_index, values = np.divmod(values, self.span)
+
+        # 整块编码成 (count, 总宽度) 的字节矩阵：前缀 | 随机填充 | 唯一部分
+        prefix_len = len(self.prefixes[0])
+        fill = self.width - self.unique_width
+        matrix = np.empty((count, prefix_len + self.width), dtype=np.uint8)
+        if prefix_len:
+            prefixes = np.frombuffer(''.join(self.prefixes).encode('ascii'), dtype=np.uint8)
+            matrix[:, :prefix_len] = prefixes.reshape(-1, prefix_len)[prefix_index]
+        alphabet = np.frombuffer(self.alphabet.encode('ascii'), dtype=np.uint8)
+        if fill:
+            keys = np.arange(start, start + count, dtype=np.uint64)
+            for column in range(fill):  # 填充字符：每 chars_per_hash 个取自 (编号, 组号) 的一个哈希
+                if column % self.chars_per_hash == 0:
+                    group = np.uint64(column // self.chars_per_hash)
+                    h = mix64((keys << np.uint64(8) | group) ^ np.uint64(self.salt << 32))
+                h, digit = np.divmod(h, np.uint64(base))
+                matrix[:, prefix_len + column] = alphabet[digit]
+        for column in range(prefix_len + self.width - 1, prefix_len + fill - 1, -1):
+            values, digit = np.divmod(values, base)
+            matrix[:, column] = alphabet[digit]
+        text = matrix.tobytes().decode('ascii')
+        size = prefix_len + self.width
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _render_python(self, start, count):
+        base = len(self.alphabet)
+        fill = self.width - self.unique_width
+        result = []
+        for key, value in enumerate(self._permuted(start, count), start):
+            prefix_index, value = divmod(value, self.span)
+            chars = []
+            for column in range(fill):
+                if column % self.chars_per_hash == 0:
+                    h = mix64((key << 8 | column // self.chars_per_hash) ^ self.salt << 32)
+                h, digit = divmod(h, base)
+                chars.append(self.alphabet[digit])
+            unique = []
+            for _ in range(self.unique_width):
+                value, digit = divmod(value, base)
+                unique.append(self.alphabet[digit])
+            result.append(self.prefixes[prefix_index] + ''.join(chars) + ''.join(reversed(unique)))
+        return result
+
+
+def make_pools(fields, block=POOL_BLOCK):
+    """{字段名: (前缀, 字母表, 宽度, 唯一部分宽度)} -> {字段名: UniqueStringPool}"""
+    return {name: UniqueStringPool(name, *spec, block=block) for name, spec in fields.items()}
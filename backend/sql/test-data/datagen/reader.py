@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+读回生成的数据
+逐行解析生成器写出的SQL文件（INSERT ... VALUES，可压缩/分卷）或TSV目录，
+产出 (表名, 列名, 值)，内存占用与文件大小无关。
+"""
+
+import os
+import re
+
+from datagen.bulk import tsv_unescape
+from datagen.output import manifest_filename, manifest_files, open_text
+
+_INSERT = re.compile(r"INSERT INTO `?(\w+)`?\s*\(([^)]*)\)\s*VALUES", re.I)
+# 单个值：字符串 / NULL / 数字
+_TOKEN = r"""'[^'\\]*(?:(?:''|\\.)[^'\\]*)*'|NULL|-?\d+(?:\.\d+)?"""
+_TOKENS = re.compile(_TOKEN, re.S)
+# 一整行 "(v1, v2, ...)"：先整体匹配确认完整，再用 findall 取出各值，避免逐值调用正则
+_ROW = re.compile(rf"\(\s*(?:(?:{_TOKEN})\s*,\s*)*(?:{_TOKEN})\s*\)", re.S)
+_SQL_UNESCAPE = re.compile(r"''|\\(.)", re.S)
+_SQL_UNESCAPES = {'0': '\0', 'n': '\n', 'r': '\r', 't': '\t', 'b': '\b', 'Z': '\x1a'}
+_TSV_FILE = re.compile(r"^(\w+?)(\.part-\d{4})?\.tsv$")
+
+
+def _unescape(text):
+    if "'" not in text and '\\' not in text:
+        return text
+    return _SQL_UNESCAPE.sub(lambda m: "'" if m.group(1) is None else _SQL_UNESCAPES.get(m.group(1), m.group(1)), text)
+
+
+def sql_literal(token):
+    """SQL字面量 -> Python值：'...' -> str，NULL -> None，数字 -> int / float"""
+    if token[0] == "'":
+        return _unescape(token[1:-1])
+    if token == 'NULL':
+        return None
+    return float(token) if '.' in token else int(token)
+
+
+def parse_row(text, pos=0, index=None):
+    """
+    解析 text[pos] 处的一行 "(v1, v2, ...)"，返回 (值列表, 结束位置)
+
+    index 为需要的列下标时只转换这些列（按 index 顺序）。
+    行不完整（字符串中含换行，还需要后续内容）时返回 (None, pos)。
+    """
+    m = _ROW.match(text, pos)
+    if m is None:
+        return None, pos
+    tokens = _TOKENS.findall(text, pos, m.end())
+    if index is not None:
+        tokens = [tokens[i] for i in index]
+    return [sql_literal(token) for token in tokens], m.end()
+
+
+def column_index(table, file_columns, columns):
+    """需要的列在文件列中的下标"""
+    missing = [c for c in columns if c not in file_columns]
+    if missing:
+        raise ValueError(f"{table} 缺少列: {', '.join(missing)}")
+    return [file_columns.index(c) for c in columns]
+
+
+def iter_sql_rows(lines, tables=None, columns=None):
+    """
+    逐行解析SQL文本，产出 (表名, 列名, 值列表)
+
+    只解析 INSERT INTO t (列, ...) VALUES 后的行（每行一条或一行多条均可），
+    tables 不为空时跳过其他表；columns 为 {表名: (列名, ...)} 时只取出这些列。
+    遇到 ; 或 ON DUPLICATE KEY UPDATE 结束当前语句。
+    """
+    table = None
+    names = None
+    index = None
+    buffer = ''
+    for line in lines:
+        if table is None:
+            if not line.startswith('INSERT'):
+                continue
+            m = _INSERT.match(line)
+            if m is None or (tables is not None and m.group(1) not in tables):
+                continue
+            table = m.group(1)
+            names = tuple(c.strip(' `') for c in m.group(2).split(','))
+            index = None
+            if columns is not None and table in columns:
+                index = column_index(table, names, columns[table])
+                names = tuple(columns[table])
+            buffer = line[m.end():]
+        else:
+            buffer += line
+
+        pos = 0
+        length = len(buffer)
+        while True:
+            while pos < length and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= length:
+                buffer = ''
+                break
+            if buffer[pos] != '(':
+                table = None  # ; / ON DUPLICATE KEY UPDATE：语句结束
+                buffer = ''
+                break
+            values, end = parse_row(buffer, pos, index)
+            if values is None:
+                buffer = buffer[pos:]  # 行不完整，拼上下一行再解析
+                break
+            yield table, names, values
+            pos = end
+    if buffer.strip():
+        raise ValueError(f"无法解析 {table} 的数据行: {buffer[:200]!r}")
+
+
+def sql_file_rows(path, tables=None, columns=None):
+    """读取一个SQL文件（.sql / .sql.gz / .sql.zst）"""
+    with open_text(path) as f:
+        yield from iter_sql_rows(f, tables, columns)
+
+
+def tsv_files(directory, tables=None):
+    """TSV目录中的数据文件：[(表名, 路径), ...]，包括分片的 <表名>.part-NNNN.tsv"""
+    files = []
+    for filename in sorted(os.listdir(directory)):
+        m = _TSV_FILE.match(filename)
+        if m and (tables is None or m.group(1) in tables):
+            files.append((m.group(1), os.path.join(directory, filename)))
+    return files
+
+
+def tsv_directory_rows(directory, tables, columns=None):
+    """
+    读取TSV目录，产出 (表名, 列名, 值列表)
+
+    TSV没有列名，按 tables[表名] 的列顺序解释；columns 同 iter_sql_rows()。
+    值均为字符串或 None。
+    """
+    for table, path in tsv_files(directory, tables):
+        names = tables[table]
+        index = None
+        if columns is not None and table in columns:
+            index = column_index(table, names, columns[table])
+            names = tuple(columns[table])
+        with open(path, encoding='utf-8', newline='\n') as f:
+            for line in f:
+                fields = line.rstrip('\n').split('\t')
+                if index is not None:
+                    fields = [fields[i] for i in index]
+                yield table, names, [tsv_unescape(field) for field in fields]
+
+
+def expand_inputs(paths):
+    """
+    展开输入：清单文件（.manifest.json）替换为其中的分卷，
+    文件不存在但同名清单存在时（分卷输出）改读清单。
+    返回 [(类型, 路径), ...]，类型为 'sql' 或 'tsv'（目录）。
+    """
+    inputs = []
+    for path in paths:
+        if os.path.isdir(path):
+            inputs.append(('tsv', path))
+            continue
+        if not os.path.exists(path):
+            manifest = manifest_filename(path)
+            if not os.path.exists(manifest):
+                raise FileNotFoundError(f"输入文件不存在: {path}")
+            path = manifest
+        if path.endswith('.manifest.json'):
+            inputs.extend(('sql', part) for part in manifest_files(path))
+        else:
+            inputs.append(('sql', path))
+    return inputs
+
+
+def read_input(kind, path, tables, columns=None):
+    """读取 expand_inputs() 返回的一个输入"""
+    if kind == 'tsv':
+        return tsv_directory_rows(path, tables, columns)
+    return sql_file_rows(path, tables, columns)
+
+
+def iter_input_rows(paths, tables, columns=None):
+    """
+    依次读取所有输入（SQL文件 / TSV目录 / 清单），产出 (表名, 列名, 值列表)
+
+    tables: {表名: (列名, ...)}，只读这些表（TSV按此列顺序解释）
+    columns: 可选，{表名: (列名, ...)}，只取出这些列
+    """
+    for kind, path in expand_inputs(paths):
+        yield from read_input(kind, path, tables, columns)
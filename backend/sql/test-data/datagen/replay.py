@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+接口流量回放
+把生成器产生的订单按时间表回放为对后端支付/积分接口的HTTP请求（asyncio，只用标准库）：
+
+- 会话：一笔订单对应 创建订单 -> 模拟支付成功 -> 查询结果 -> 查询积分余额 等一串依赖的请求
+- 到达时间：uniform（固定间隔）/ poisson（指数间隔）/ replay（按订单时间的形状压缩到目标QPS）
+- 开环：按时间表发起会话，不等待前一个会话完成，并发上限 concurrency，
+  排队时间单独统计（避免协调遗漏，coordinated omission）
+- 闭环：concurrency 个并发客户端依次执行会话，测最大吞吐
+- 按接口统计延迟分位数（p50/p90/p99/p99.9/max）和状态码
+
+接口路径、请求体和JWT格式与 backend/routes、backend/utils/jwt.js 一致。
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import itertools
+import json
+import os
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+DEFAULT_BASE_URL = 'http://127.0.0.1:3000/api/v1'
+# 与 backend/utils/jwt.js 的默认值相同，后端配置了 JWT_SECRET 时需设置同名环境变量
+DEFAULT_JWT_SECRET = 'default_secret_key_change_in_production_environment'
+TOKEN_TTL = 7 * 86400  # 与 JWT_EXPIRES_IN 默认值（7d）相同
+ARRIVALS = ('uniform', 'poisson', 'replay')
+MODES = ('open', 'closed')
+REQUEST_TIMEOUT = 10.0  # 单个请求超时（秒）
+PERCENTILES = (50, 90, 99, 99.9)
+
+# 接口：名称 -> (方法, 路径)
+ENDPOINTS = {
+    'create': ('POST', '/payments/create'),
+    'pay': ('POST', '/payments/mock-success'),
+    'query': ('GET', '/payments/query/{order_id}'),
+    'balance': ('GET', '/points/balance'),
+    'history': ('GET', '/points/history?page=1&pageSize=20'),
+}
+
+# ==================== JWT ====================
+
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _b64url_decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def jwt_secret():
+    return os.environ.get('JWT_SECRET', DEFAULT_JWT_SECRET)
+
+def user_token(user_id, secret=None, now=None):
+    """生成与 utils/jwt.js generateToken() 相同格式的 HS256 令牌"""
+    now = int(now or time.time())
+    header = _b64url(json.dumps({'alg': 'HS256', 'typ': 'JWT'}, separators=(',', ':')).encode())
+    payload = _b64url(json.dumps({'id': user_id, 'type': 'user', 'iat': now, 'exp': now + TOKEN_TTL},
+                                 separators=(',', ':')).encode())
+    signing_input = f"{header}.{payload}".encode('ascii')
+    signature = hmac.new((secret or jwt_secret()).encode(), signing_input, hashlib.sha256).digest()
+    return f"{header}.{payload}.{_b64url(signature)}"
+
+def verify_token(token, secret=None):
+    """校验令牌，返回 payload；签名错误或过期时抛出 ValueError（供替身服务使用）"""
+    try:
+        header, payload, signature = token.split('.')
+        expected = hmac.new((secret or jwt_secret()).encode(), f"{header}.{payload}".encode('ascii'),
+                            hashlib.sha256).digest()
+        if not hmac.compare_digest(_b64url_decode(signature), expected):
+            raise ValueError('无效的Token')
+        claims = json.loads(_b64url_decode(payload))
+    except (ValueError, TypeError):
+        raise ValueError('无效的Token')
+    if claims.get('exp', 0) < time.time():
+        raise ValueError('Token已过期')
+    return claims
+
+# ==================== 到达时间 ====================
+
+def arrival_offsets(sessions, qps, arrival='poisson', rng=None):
+    """
+    每个会话的发起时间（相对开始的秒数），平均速率为 qps
+
+    replay 按会话的 time（datetime）排序后保留时间间隔的形状（高峰、低谷），
+    整体压缩到 len(sessions) / qps 秒内；sessions 会被原地排序。
+    """
+    count = len(sessions)
+    if arrival == 'uniform':
+        return [i / qps for i in range(count)]
+    if arrival == 'poisson':
+        return list(itertools.accumulate(rng.expovariate(qps) for _ in range(count)))
+    if arrival != 'replay':
+        raise ValueError(f"未知的到达模型: {arrival}（可选 {', '.join(ARRIVALS)}）")
+    sessions.sort(key=lambda s: s['time'])
+    start = sessions[0]['time'] if sessions else None
+    span = (sessions[-1]['time'] - start).total_seconds() if sessions else 0
+    if span <= 0:
+        return [i / qps for i in range(count)]
+    scale = count / qps / span
+    return [(s['time'] - start).total_seconds() * scale for s in sessions]
+
+# ==================== HTTP客户端 ====================
+
+class HttpError(Exception):
+    """连接断开或响应无法解析"""
+
+
+class HttpConnection:
+    """一个 HTTP/1.1 keep-alive 连接"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+
+    async def request(self, method, target, host, body=None, headers=None):
+        """发送一个请求，返回 (状态码, 响应体bytes)"""
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {host}", 'Connection: keep-alive']
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        data = b''
+        if body is not None:
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            lines.append('Content-Type: application/json')
+            lines.append(f"Content-Length: {len(data)}")
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8') + data)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise HttpError('连接已关闭')
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise HttpError(f"无法解析的响应: {status_line[:100]!r}")
+        response_headers = await read_headers(self.reader)
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            payload = await read_chunked(self.reader)
+        elif 'content-length' in response_headers:
+            payload = await self.reader.readexactly(int(response_headers['content-length']))
+        else:
+            payload = await self.reader.read()
+            self.closed = True
+        if response_headers.get('connection', '').lower() == 'close':
+            self.closed = True
+        return status, payload
+
+    def close(self):
+        self.closed = True
+        self.writer.close()
+
+async def read_headers(reader):
+    """读取头部直到空行，返回 {小写名称: 值}"""
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise HttpError('连接已关闭')
+        if line in (b'\r\n', b'\n'):
+            return headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+async def read_chunked(reader):
+    """读取 chunked 编码的响应体"""
+    parts = []
+    while True:
+        size = int((await reader.readline()).split(b';')[0], 16)
+        if size == 0:
+            await read_headers(reader)  # 结尾的 trailer
+            return b''.join(parts)
+        parts.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+class HttpClient:
+    """到同一个后端的连接池：空闲连接复用，断开的连接丢弃"""
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, timeout=REQUEST_TIMEOUT):
+        url = urlsplit(base_url)
+        if url.scheme != 'http':
+            raise ValueError(f"只支持 http:// 地址: {base_url}")
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.host_header = url.netloc
+        self.prefix = url.path.rstrip('/')
+        self.timeout = timeout
+        self._idle = []
+
+    async def request(self, method, path, body=None, token=None):
+        """返回 (状态码, 解析后的JSON或None)；超时抛出 asyncio.TimeoutError"""
+        conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+            conn = HttpConnection(reader, writer)
+        headers = {'Authorization': f"Bearer {token}"} if token else None
+        try:
+            status, payload = await asyncio.wait_for(
+                conn.request(method, self.prefix + path, self.host_header, body, headers), self.timeout)
+        except BaseException:
+            conn.close()
+            raise
+        if conn.closed:
+            conn.close()
+        else:
+            self._idle.append(conn)
+        try:
+            return status, json.loads(payload) if payload else None
+        except ValueError:
+            return status, None
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+# ==================== 延迟统计 ====================
+
+def percentile(sorted_values, p):
+    """最近秩分位数"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(len(sorted_values) * p / 100 + 0.5), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LatencyRecorder:
+    """按接口记录每个请求的延迟（秒）和结果（状态码 / timeout / error）"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+        self.queue_delays = []  # 开环：计划发起时间到实际发起的等待
+        self.sessions = 0
+        self.failed_sessions = 0
+
+    def record(self, endpoint, seconds, outcome):
+        self.latencies[endpoint].append(seconds)
+        self.outcomes[endpoint][outcome] += 1
+
+    def summary(self):
+        """{接口: {count, ok, outcomes, p50, ..., max}}，延迟单位毫秒"""
+        result = {}
+        for endpoint in sorted(self.latencies, key=lambda e: list(ENDPOINTS).index(e)):
+            values = sorted(self.latencies[endpoint])
+            outcomes = dict(self.outcomes[endpoint])
+            row = {
+                'count': len(values),
+                'ok': sum(n for o, n in outcomes.items() if isinstance(o, int) and o < 400),
+                'outcomes': outcomes,
+                'mean': sum(values) / len(values) * 1000,
+            }
+            for p in PERCENTILES:
+                row[f"p{p:g}"] = percentile(values, p) * 1000
+            row['max'] = values[-1] * 1000
+            result[endpoint] = row
+        return result
+
+# ==================== 会话执行 ====================
+
+async def timed_request(client, recorder, endpoint, token, body=None, **params):
+    """发送一个接口请求并记录延迟，返回 (状态码, JSON)；超时/连接错误时返回 (None, None)"""
+    method, path = ENDPOINTS[endpoint]
+    start = time.perf_counter()
+    try:
+        status, data = await client.request(method, path.format(**params), body, token)
+    except asyncio.TimeoutError:
+        recorder.record(endpoint, time.perf_counter() - start, 'timeout')
+        return None, None
+    except (OSError, HttpError, asyncio.IncompleteReadError):
+        recorder.record(endpoint, time.perf_counter() - start, 'error')
+        return None, None
+    recorder.record(endpoint, time.perf_counter() - start, status)
+    return status, data
+
+async def run_session(client, recorder, session, token):
+    """
+    执行一个订单会话：创建订单 -> （已支付）模拟支付成功 -> 可选的查询订单、积分余额、积分记录
+    前一步失败时停止，记为失败会话
+    """
+    status, data = await timed_request(client, recorder, 'create', token,
+                                       {'merchantId': session['merchant_id'], 'amount': session['amount']})
+    ok = status == 200
+    if ok and session['pay']:
+        order_id = data['data']['orderId']
+        status, _ = await timed_request(client, recorder, 'pay', token, {'orderId': order_id})
+        ok = status == 200
+        if ok and session.get('query'):
+            status, _ = await timed_request(client, recorder, 'query', token, order_id=order_id)
+    if ok and session.get('balance'):
+        status, _ = await timed_request(client, recorder, 'balance', token)
+    if ok and session.get('history'):
+        status, _ = await timed_request(client, recorder, 'history', token)
+    recorder.sessions += 1
+    if not ok:
+        recorder.failed_sessions += 1
+
+async def run_open_loop(client, recorder, sessions, offsets, concurrency, tokens):
+    """开环：按 offsets 发起会话，同时执行的会话不超过 concurrency，超出的排队"""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = set()
+
+    async def launch(session, due):
+        async with semaphore:
+            recorder.queue_delays.append(max(loop.time() - due, 0.0))
+            await run_session(client, recorder, session, tokens[session['user_id']])
+
+    start = loop.time()
+    for session, offset in zip(sessions, offsets):
+        due = start + offset
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.ensure_future(launch(session, due))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+
+async def run_closed_loop(client, recorder, sessions, concurrency, tokens):
+    """闭环：concurrency 个客户端，每个完成一个会话后立即开始下一个"""
+    queue = iter(sessions)
+
+    async def worker():
+        for session in queue:
+            await run_session(client, recorder, session, tokens[session['user_id']])
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+async def replay(sessions, base_url=DEFAULT_BASE_URL, mode='open', qps=50.0, concurrency=32,
+                 arrival='poisson', rng=None, timeout=REQUEST_TIMEOUT, secret=None):
+    """
+    回放一组会话，返回 (LatencyRecorder, 耗时秒数)
+
+    sessions: [{'user_id', 'merchant_id', 'amount', 'pay', 'time', 可选 'query'/'balance'/'history'}, ...]
+    """
+    recorder = LatencyRecorder()
+    tokens = {}
+    for session in sessions:
+        if session['user_id'] not in tokens:
+            tokens[session['user_id']] = user_token(session['user_id'], secret)
+    offsets = arrival_offsets(sessions, qps, arrival, rng) if mode == 'open' else None
+    client = HttpClient(base_url, timeout)
+    start = time.perf_counter()
+    try:
+        if mode == 'open':
+            await run_open_loop(client, recorder, sessions, offsets, concurrency, tokens)
+        else:
+            await run_closed_loop(client, recorder, sessions, concurrency, tokens)
+    finally:
+        client.close()
+    return recorder, time.perf_counter() - start
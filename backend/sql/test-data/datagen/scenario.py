@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+场景文件
+数据规模和形态原来要改脚本顶部的常量（NUM_USERS、MERCHANT_TYPES 等）。场景文件把它们和命令行参数
+放在一起，CI 可以按名字生成可复现的大规模压测数据，不必修改源码。
+
+格式为 JSON、TOML（Python 3.11+ 自带 tomllib）或 YAML（需 pip install pyyaml），内容：
+
+    {
+      "description": "说明",
+      "settings": {"users": 1000000, "points_rate": 1, "cities": ["北京", ...], ...},
+      "options": {"seed": 1, "format": "tsv", "engine": "numpy", "shards": 16, ...}
+    }
+
+settings 为数据形态（各脚本声明自己支持的键），options 为命令行参数的默认值
+（键为参数名，如 orders_dist / --orders-dist），通过 parser.set_defaults 生效，命令行上显式给出的参数优先；
+开关参数在场景中取 true / false，命令行上可用 --no-xxx 关闭场景打开的开关。
+--scenario 取预置场景名（scenarios/ 目录下的文件名，不含扩展名）或场景文件路径。
+"""
+
+import json
+import os
+
+SCENARIO_EXTENSIONS = ('.json', '.toml', '.yaml', '.yml')
+SCENARIO_KEYS = frozenset(('description', 'settings', 'options'))
+
+
+def preset_names(directory):
+    """目录下的预置场景名（按名称排序）"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted({os.path.splitext(name)[0] for name in os.listdir(directory)
+                   if os.path.splitext(name)[1] in SCENARIO_EXTENSIONS})
+
+
+def find_scenario(spec, directory):
+    """场景名或路径 -> 场景文件路径"""
+    if os.path.isfile(spec):
+        return spec
+    for extension in SCENARIO_EXTENSIONS:
+        path = os.path.join(directory, spec + extension)
+        if os.path.isfile(path):
+            return path
+    raise ValueError(f"找不到场景: {spec}（预置场景: {', '.join(preset_names(directory)) or '无'}；或给出场景文件路径）")
+
+
+def read_scenario_file(path):
+    """按扩展名读取场景文件，返回 dict"""
+    extension = os.path.splitext(path)[1].lower()
+    # 解析器在用到时才导入（PyYAML 导入要十几毫秒），JSON 场景不付出这部分启动时间
+    if extension in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:  # PyYAML 是可选依赖，只有 YAML 场景文件需要
+            raise ImportError("读取YAML场景文件需要 PyYAML：pip install pyyaml（或改用 .json / .toml）") from None
+        with open(path, encoding='utf-8') as f:
+            data = yaml.safe_load(f)
+    elif extension == '.toml':
+        try:
+            import tomllib
+        except ImportError:  # Python 3.11 以下没有 tomllib
+            raise ImportError("读取TOML场景文件需要 Python 3.11+（或改用 .json）") from None
+        with open(path, 'rb') as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"场景文件 {path} 的内容应为对象")
+    return data
+
+
+def load_scenario(spec, directory, setting_keys, option_names, path_options=()):
+    """
+    读取并检查场景
+
+    directory: 预置场景目录；setting_keys: 支持的 settings 键；option_names: 命令行参数名（argparse dest）
+    path_options: 取值为文件路径的参数，相对路径按场景文件所在目录解析（该文件存在时）
+    返回 {'name', 'path', 'description', 'settings', 'options'}，options 的键统一为 dest 形式
+    """
+    path = find_scenario(spec, directory)
+    data = read_scenario_file(path)
+    unknown = sorted(set(data) - SCENARIO_KEYS)
+    if unknown:
+        raise ValueError(f"场景 {path} 中有未知的键: {', '.join(unknown)}（可用 {', '.join(sorted(SCENARIO_KEYS))}）")
+    settings = dict(data.get('settings') or {})
+    unknown = sorted(set(settings) - set(setting_keys))
+    if unknown:
+        raise ValueError(f"场景 {path} 中有不支持的设置: {', '.join(unknown)}（可用 {', '.join(setting_keys)}）")
+    options = {key.lstrip('-').replace('-', '_'): value for key, value in (data.get('options') or {}).items()}
+    unknown = sorted(set(options) - set(option_names))
+    if unknown:
+        raise ValueError(f"场景 {path} 中有未知的命令行参数: {', '.join(unknown)}")
+    for name in path_options:
+        value = options.get(name)
+        if isinstance(value, str) and not os.path.isabs(value):
+            candidate = os.path.join(os.path.dirname(os.path.abspath(path)), value)
+            if os.path.isfile(candidate):
+                options[name] = candidate
+    return {
+        'name': os.path.splitext(os.path.basename(path))[0],
+        'path': path,
+        'description': data.get('description', ''),
+        'settings': settings,
+        'options': options,
+    }
+
+
+def apply_option_defaults(parser, options):
+    """
+    场景中的命令行参数 -> parser 的默认值（命令行上显式给出的参数仍然优先）
+
+    None 表示沿用参数本身的默认值；开关参数取 true / false；
+    有 choices 的参数在这里检查取值（argparse 不检查默认值），字符串值由 argparse 按 type 转换
+    """
+    actions = {action.dest: action for action in parser._actions}
+    defaults = {}
+    for name, value in options.items():
+        if value is None:
+            continue
+        action = actions[name]
+        if action.nargs == 0 and not isinstance(value, bool):
+            raise ValueError(f"场景参数 {name} 为开关，取值应为 true / false: {value!r}")
+        if action.choices is not None and value not in action.choices:
+            raise ValueError(f"场景参数 {name} 的取值 {value!r} 无效（可选 {', '.join(map(str, action.choices))}）")
+        defaults[name] = value
+    parser.set_defaults(**defaults)
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+表结构定义与生成前检查
+生成脚本中各表写入的列（TABLE_COLUMNS）和枚举取值是按表结构手写的，表结构改了（列改名、
+枚举增减）而脚本没跟上时，要到导入数据库时才报错，千万级数据已经生成完了。
+这里读取表结构定义，在生成前检查：
+
+- 写入的表和列都存在
+- 按整数写出的列（COLUMN_KINDS 中的 int）在表中是整数类型
+- NOT NULL 且没有默认值的列都有写入
+- 脚本可能产出的枚举值（如订单状态、积分记录类型）都在 ENUM 允许的取值中
+
+表结构来源：
+- .sql：CREATE TABLE 语句（以及 ALTER TABLE ... ADD COLUMN），如 ../create_all_tables.sql
+- .json：没有建表脚本的库用映射文件描述，列定义写法同 DDL：
+  {"database": "库名", "tables": {"表名": {"列名": "VARCHAR(50) NOT NULL", ...}}}
+
+多个来源按顺序合并，同名表的列合并（后者覆盖前者）。
+parse_indexes 读取建表脚本中的二级索引（查询基准在没有索引的 SQLite 替身上按此建索引）。
+"""
+
+import json
+import re
+
+INTEGER_TYPES = frozenset(('TINYINT', 'SMALLINT', 'MEDIUMINT', 'INT', 'INTEGER', 'BIGINT'))
+# 表定义中不是列的项
+CONSTRAINT_KEYWORDS = ('PRIMARY', 'KEY', 'INDEX', 'UNIQUE', 'CONSTRAINT', 'FOREIGN', 'FULLTEXT', 'SPATIAL', 'CHECK')
+
+CREATE_TABLE = re.compile(r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?\s*\(', re.IGNORECASE)
+ALTER_TABLE = re.compile(r'ALTER\s+TABLE\s+`?(\w+)`?\s+(.*?);', re.IGNORECASE | re.DOTALL)
+ADD_COLUMN = re.compile(r'ADD\s+(?:COLUMN\s+)?(?:IF\s+NOT\s+EXISTS\s+)?', re.IGNORECASE)
+COLUMN_TYPE = re.compile(r'(\w+)\s*(\(([^)]*)\))?', re.IGNORECASE)
+INDEX_ITEM = re.compile(r'(?:UNIQUE\s+)?(?:INDEX|KEY)\s+`?(\w+)`?\s*\(([^)]*)\)', re.IGNORECASE)
+QUOTED = re.compile(r"'((?:[^'\\]|\\.|'')*)'")
+
+
+class SchemaError(ValueError):
+    """表结构与生成脚本不一致"""
+
+
+# ==================== 解析 ====================
+
+def strip_comments(text):
+    """去掉 -- 行注释和 /* */ 块注释（引号中的内容保留）"""
+    out = []
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c == "'":
+            j = i + 1
+            while j < n and text[j] != "'":
+                j += 2 if text[j] == '\\' else 1
+            out.append(text[i:j + 1])
+            i = j + 1
+        elif text.startswith('--', i):
+            i = text.find('\n', i)
+            i = n if i < 0 else i
+        elif text.startswith('/*', i):
+            i = text.find('*/', i)
+            i = n if i < 0 else i + 2
+        else:
+            out.append(c)
+            i += 1
+    return ''.join(out)
+
+
+def split_top_level(body):
+    """按不在括号和引号中的逗号切分"""
+    items, depth, start, quoted = [], 0, 0, False
+    for i, c in enumerate(body):
+        if quoted:
+            quoted = c != "'" or body[i - 1] == '\\'
+        elif c == "'":
+            quoted = True
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            items.append(body[start:i].strip())
+            start = i + 1
+    items.append(body[start:].strip())
+    return [item for item in items if item]
+
+
+def parse_column(definition):
+    """
+    解析一个列定义（不含列名），如 "ENUM('a','b') NOT NULL DEFAULT 'a'"
+
+    返回 {'type': 'ENUM', 'enum': ('a', 'b') 或 None, 'nullable': bool, 'has_default': bool}
+    """
+    match = COLUMN_TYPE.match(definition.strip())
+    if not match:
+        raise SchemaError(f"无法解析列定义: {definition}")
+    column_type = match.group(1).upper()
+    enum = None
+    if column_type in ('ENUM', 'SET'):
+        enum = tuple(value.replace("''", "'") for value in QUOTED.findall(match.group(3) or ''))
+    # 属性部分去掉引号中的内容（COMMENT、DEFAULT 的字符串值）再判断关键字
+    options = ' ' + QUOTED.sub("''", definition[match.end():]).upper() + ' '
+    primary = ' PRIMARY KEY' in options
+    return {
+        'type': column_type,
+        'enum': enum,
+        'nullable': ' NOT NULL' not in options and not primary,
+        'has_default': ' DEFAULT ' in options or ' AUTO_INCREMENT' in options,
+    }
+
+
+def parse_column_item(item):
+    """表定义中的一项：返回 (列名, 列定义)，索引和约束返回 None"""
+    name, _, definition = item.partition(' ')
+    if name.upper() in CONSTRAINT_KEYWORDS:
+        return None
+    return name.strip('`'), parse_column(definition)
+
+
+def table_bodies(text):
+    """产出 (表名, 括号内的表定义)；text 应已去掉注释"""
+    for match in CREATE_TABLE.finditer(text):
+        # 找到与左括号配对的右括号
+        depth, quoted, end = 1, False, None
+        for i in range(match.end(), len(text)):
+            c = text[i]
+            if quoted:
+                quoted = c != "'" or text[i - 1] == '\\'
+            elif c == "'":
+                quoted = True
+            elif c == '(':
+                depth += 1
+            elif c == ')':
+                depth -= 1
+                if not depth:
+                    end = i
+                    break
+        if end is None:
+            raise SchemaError(f"CREATE TABLE {match.group(1)} 缺少右括号")
+        yield match.group(1), text[match.end():end]
+
+
+def parse_ddl(text):
+    """解析 CREATE TABLE / ALTER TABLE ... ADD COLUMN，返回 {表名: {列名: 列定义}}（列按定义顺序）"""
+    text = strip_comments(text)
+    tables = {}
+    for table, body in table_bodies(text):
+        columns = tables.setdefault(table, {})
+        for item in split_top_level(body):
+            column = parse_column_item(item)
+            if column:
+                columns[column[0]] = column[1]
+    for match in ALTER_TABLE.finditer(text):
+        columns = tables.get(match.group(1))
+        if columns is None:
+            continue
+        for item in split_top_level(match.group(2)):
+            prefix = ADD_COLUMN.match(item)
+            if prefix:
+                column = parse_column_item(item[prefix.end():].strip())
+                if column:
+                    columns[column[0]] = column[1]
+    return tables
+
+
+def parse_indexes(text):
+    """解析 CREATE TABLE 中的二级索引（INDEX / KEY / UNIQUE），返回 {表名: [(索引名, (列名, ...)), ...]}"""
+    indexes = {}
+    for table, body in table_bodies(strip_comments(text)):
+        for item in split_top_level(body):
+            match = INDEX_ITEM.match(item)
+            if match:
+                columns = tuple(column.strip().strip('`').split('(')[0] for column in match.group(2).split(','))
+                indexes.setdefault(table, []).append((match.group(1), columns))
+    return indexes
+
+
+def parse_mapping(data):
+    """解析映射文件内容：{"tables": {表名: {列名: 列定义字符串}}}"""
+    return {
+        table: {column: parse_column(definition) for column, definition in columns.items()}
+        for table, columns in data['tables'].items()
+    }
+
+
+def load_schema(paths):
+    """按顺序读取多个表结构来源（.sql 或 .json）并合并"""
+    schema = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            if path.endswith('.json'):
+                tables = parse_mapping(json.load(f))
+            else:
+                tables = parse_ddl(f.read())
+        for table, columns in tables.items():
+            schema.setdefault(table, {}).update(columns)
+    return schema
+
+
+# ==================== 检查 ====================
+
+def schema_problems(schema, table_columns, column_kinds=None, value_domains=None):
+    """
+    对照表结构检查生成脚本，返回问题列表（空列表表示一致）
+
+    table_columns: {表名: 写入的列}
+    column_kinds: {表名: {列名: 'int' / ...}}，int 列须为整数类型
+    value_domains: {(表名, 列名): 脚本可能产出的取值}，枚举列的取值须在 ENUM 中
+    """
+    problems = []
+    for table, columns in table_columns.items():
+        defined = schema.get(table)
+        if defined is None:
+            problems.append(f"表 {table} 不存在")
+            continue
+        for column in columns:
+            if column not in defined:
+                problems.append(f"{table}.{column} 列不存在")
+        for column, spec in defined.items():
+            if column not in columns and not spec['nullable'] and not spec['has_default']:
+                problems.append(f"{table}.{column} 为 NOT NULL 且没有默认值，但没有写入")
+        for column, kind in (column_kinds or {}).get(table, {}).items():
+            spec = defined.get(column)
+            if kind == 'int' and spec and spec['type'] not in INTEGER_TYPES:
+                problems.append(f"{table}.{column} 按整数写出，但表中类型为 {spec['type']}")
+    for (table, column), values in (value_domains or {}).items():
+        spec = schema.get(table, {}).get(column)
+        if spec is None or spec['enum'] is None:
+            continue
+        invalid = sorted(set(values) - set(spec['enum']))
+        if invalid:
+            problems.append(f"{table}.{column} 不允许的取值 {', '.join(invalid)}"
+                            f"（允许 {', '.join(spec['enum'])}）")
+    return problems
+
+
+def check_schema(paths, table_columns, column_kinds=None, value_domains=None):
+    """读取表结构并检查，不一致时抛出 SchemaError（列出全部问题）"""
+    problems = schema_problems(load_schema(paths), table_columns, column_kinds, value_domains)
+    if problems:
+        raise SchemaError("表结构与生成脚本不一致：\n  " + "\n  ".join(problems))
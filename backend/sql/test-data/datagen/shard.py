@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+分片并行生成
+按用户区间切分数据，每个分片使用独立派生种子和互不重叠的ID区间，
+在进程池中生成并写出各自的分片文件。
+"""
+
+import hashlib
+import os
+
+# 每个分片可用的ID计数区间大小，分片 k 的计数器从 k * SHARD_ID_STRIDE 开始
+SHARD_ID_STRIDE = 10 ** 9
+
+
+def derive_seed(master_seed, shard_key):
+    """由主种子和分片编号派生分片种子（与进程、平台无关，保证可复现）"""
+    digest = hashlib.sha256(f"{master_seed}:{shard_key}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def split_range(total, shards):
+    """把 [0, total) 切成 shards 个连续区间，前面的区间多分1个"""
+    base, extra = divmod(total, shards)
+    ranges = []
+    start = 0
+    for i in range(shards):
+        end = start + base + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def part_filename(filename, index):
+    """分片文件名：insert_data.sql -> insert_data.part-0001.sql"""
+    root, ext = os.path.splitext(filename)
+    return f"{root}.part-{index:04d}{ext}"
+
+
+def run_shards(worker, tasks, workers=None):
+    """
+    在进程池中执行分片任务，按任务顺序返回结果
+
+    workers 为 1 时在当前进程顺序执行，便于调试；
+    分片结果只取决于任务参数，与 workers 数量无关。
+    """
+    if workers == 1:
+        return [worker(task) for task in tasks]
+    from concurrent.futures import ProcessPoolExecutor  # 导入 multiprocessing 较慢，只在真正起进程池时导入
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(worker, tasks))
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+增量生成状态
+记录一次生成结束时的ID计数器、随机数状态、时间基准、商户和每个用户的积分余额，
+下一次追加生成从这里继续，只产出新增的订单、积分记录和 user_points 增量。
+"""
+
+import base64
+import json
+import os
+import zlib
+from array import array
+
+from datagen.columnar import column_values
+
+STATE_VERSION = 1
+BALANCE_FIELDS = ('available_points', 'total_earned', 'total_spent')
+
+
+class UserBalances:
+    """按用户序号保存积分余额（每个字段一个 int64 数组），写入状态文件时压缩"""
+
+    def __init__(self, count=0):
+        self.fields = {field: array('q', bytes(8 * count)) for field in BALANCE_FIELDS}
+
+    def __len__(self):
+        return len(self.fields['available_points'])
+
+    def add(self, index, deltas):
+        """累加一个用户的增量：deltas 与 BALANCE_FIELDS 一一对应"""
+        for field, delta in zip(BALANCE_FIELDS, deltas):
+            self.fields[field][index] += delta
+
+    def get(self, index):
+        """一个用户的 (available_points, total_earned, total_spent)"""
+        return tuple(self.fields[field][index] for field in BALANCE_FIELDS)
+
+    def to_json(self):
+        return {
+            field: base64.b64encode(zlib.compress(values.tobytes())).decode('ascii')
+            for field, values in self.fields.items()
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        balances = cls()
+        for field in BALANCE_FIELDS:
+            values = array('q')
+            values.frombytes(zlib.decompress(base64.b64decode(data[field])))
+            balances.fields[field] = values
+        return balances
+
+
+class BalanceRecorder:
+    """
+    写出器代理：所有写入原样转发，同时把 user_points 行累计到 UserBalances
+
+    columns: user_points 的列名，需包含 user_id 和 BALANCE_FIELDS
+    user_index: user_index(user_id) -> 用户序号
+    """
+
+    def __init__(self, writer, balances, columns, user_index):
+        self.writer = writer
+        self.balances = balances
+        self.user_index = user_index
+        self.positions = [columns.index(field) for field in BALANCE_FIELDS]
+        self.user_position = columns.index('user_id')
+
+    def write_row(self, table, values):
+        if table == 'user_points':
+            self._record(values)
+        self.writer.write_row(table, values)
+
+    def write_rows(self, table, rows):
+        if table == 'user_points':
+            rows = list(rows)
+            for values in rows:
+                self._record(values)
+        self.writer.write_rows(table, rows)
+
+    def write_columns(self, table, columns):
+        if table == 'user_points':
+            for values in zip(*map(column_values, columns)):
+                self._record(values)
+        self.writer.write_columns(table, columns)
+
+    def _record(self, values):
+        index = self.user_index(values[self.user_position])
+        self.balances.add(index, [values[p] for p in self.positions])
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+
+def encode_random_state(state):
+    """random.getstate() -> 可JSON序列化的结构"""
+    version, internal, gauss_next = state
+    return [version, list(internal), gauss_next]
+
+
+def decode_random_state(data):
+    """encode_random_state() 的逆操作，结果可传给 random.setstate()"""
+    version, internal, gauss_next = data
+    return version, tuple(internal), gauss_next
+
+
+def save_state(path, state):
+    """写状态文件（先写临时文件再替换，中断时不会损坏旧状态）"""
+    state = dict(state, version=STATE_VERSION)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_state(path):
+    """读状态文件"""
+    with open(path, encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get('version') != STATE_VERSION:
+        raise ValueError(f"不支持的状态文件版本: {state.get('version')}（{path}）")
+    return state
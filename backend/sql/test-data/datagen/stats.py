@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+生成数据的增量统计
+在行产出的同时单遍累计，不需要保留数据或事后重扫，流式、分片、向量化引擎都适用：
+
+- 计数器：商户状态、订单状态、交易额、发放/消耗积分
+- 分组直方图：按商户分类、城市、下单日期统计订单数、已支付订单数、已支付金额
+- 金额分布：按金额（分）精确计数，得到精确分位数（金额取值范围有限，内存与数据量无关）
+
+分片的统计可以合并（merge），结果可输出为JSON报告。
+"""
+
+import json
+from collections import defaultdict
+
+AMOUNT_PERCENTILES = (50, 90, 95, 99)
+GROUPS = ('category', 'city', 'day')
+UNKNOWN = '未知'  # 缺少城市等信息时的分组名（旧状态文件中的商户没有城市）
+PAID_STATUS = 'paid'
+
+
+class StatsAggregator:
+    """单遍增量统计"""
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.groups = {group: {} for group in GROUPS}  # 分组 -> {键: [订单数, 已支付数, 已支付金额]}
+        self.amounts = defaultdict(int)  # 已支付订单金额（分） -> 订单数
+        self.cities = {}  # 商户ID -> 城市
+
+    def __getitem__(self, key):
+        return self.counts[key]
+
+    # ---------- 累计 ----------
+
+    def add_merchant(self, merchant):
+        self.counts[f"merchants_{merchant['status']}"] += 1
+        self.track_merchants([merchant])
+
+    def track_merchants(self, merchants):
+        """记录商户所在城市（只用于订单的城市分组，不计数）"""
+        for merchant in merchants:
+            self.cities[merchant['id']] = merchant.get('city') or UNKNOWN
+
+    def add_order(self, status, amount, category, merchant_id, created_at):
+        """一笔订单（created_at 为 'YYYY-MM-DD HH:MM:SS'）"""
+        self.counts[f"orders_{status}"] += 1
+        paid = status == PAID_STATUS
+        if paid:
+            self.counts['total_amount'] += amount
+            self.amounts[amount] += 1
+        for group, key in (('category', category), ('city', self.cities.get(merchant_id, UNKNOWN)),
+                           ('day', created_at[:10])):
+            bucket = self.groups[group].get(key)
+            if bucket is None:
+                bucket = self.groups[group][key] = [0, 0, 0]
+            bucket[0] += 1
+            if paid:
+                bucket[1] += 1
+                bucket[2] += amount
+
+    def add_order_totals(self, status_counts, amount_counts, merchant_totals, day_totals):
+        """
+        一批已分组汇总的订单（向量化引擎用 numpy 按块汇总），结果与逐笔 add_order 相同
+
+        status_counts: {状态: 订单数}；amount_counts: {已支付金额（分）: 订单数}
+        merchant_totals: [(商户ID, 分类, 订单数, 已支付数, 已支付金额), ...]
+        day_totals: {'YYYY-MM-DD': (订单数, 已支付数, 已支付金额)}
+        """
+        for status, count in status_counts.items():
+            self.counts[f"orders_{status}"] += count
+        for amount, count in amount_counts.items():
+            self.counts['total_amount'] += amount * count
+            self.amounts[amount] += count
+        for merchant_id, category, *totals in merchant_totals:
+            self._add_totals('category', category, totals)
+            self._add_totals('city', self.cities.get(merchant_id, UNKNOWN), totals)
+        for day, totals in day_totals.items():
+            self._add_totals('day', day, totals)
+
+    def _add_totals(self, group, key, totals):
+        bucket = self.groups[group].setdefault(key, [0, 0, 0])
+        for i, value in enumerate(totals):
+            bucket[i] += value
+
+    def add_points(self, points_change):
+        self.counts['total_points'] += points_change
+        if points_change < 0:
+            self.counts['points_spent'] -= points_change
+
+    def add_points_totals(self, total, spent):
+        """一批积分记录：total 为积分变动之和，spent 为其中扣除（负数）部分的绝对值之和"""
+        self.counts['total_points'] += total
+        self.counts['points_spent'] += spent
+
+    def add_row(self, table, row):
+        """逐行生成时按表累计（row 为行字典）"""
+        if table == 'payment_orders':
+            self.add_order(row['status'], row['amount'], row['merchant_category'], row['merchant_id'],
+                           row['created_at'])
+        elif table == 'points_records':
+            self.add_points(row['points_change'])
+
+    def merge(self, other):
+        """合并另一个分片的统计"""
+        for key, value in other.counts.items():
+            self.counts[key] += value
+        for group, buckets in other.groups.items():
+            for key, values in buckets.items():
+                bucket = self.groups[group].setdefault(key, [0, 0, 0])
+                for i, value in enumerate(values):
+                    bucket[i] += value
+        for amount, count in other.amounts.items():
+            self.amounts[amount] += count
+        self.cities.update(other.cities)
+        return self
+
+    # ---------- 结果 ----------
+
+    def amount_summary(self):
+        """已支付金额（元）的数量、均值、最小/最大值和精确分位数"""
+        total = sum(self.amounts.values())
+        if not total:
+            return {'count': 0}
+        summary = {
+            'count': total,
+            'mean': round(self.counts['total_amount'] / total / 100, 2),
+            'min': min(self.amounts) / 100,
+            'max': max(self.amounts) / 100,
+        }
+        ranks = {p: max(int(total * p / 100 + 0.5), 1) for p in AMOUNT_PERCENTILES}
+        seen = 0
+        pending = sorted(ranks.items(), key=lambda item: item[1])
+        for amount in sorted(self.amounts):
+            seen += self.amounts[amount]
+            while pending and pending[0][1] <= seen:
+                summary[f"p{pending.pop(0)[0]}"] = amount / 100
+        return summary
+
+    def report(self, row_counts=None):
+        """JSON报告（dict）：各表行数、计数器、分组直方图（按键排序）和金额分布"""
+        groups = {}
+        for group, buckets in self.groups.items():
+            groups[group] = {
+                key: {'orders': orders, 'paid': paid, 'amount': amount / 100}
+                for key, (orders, paid, amount) in sorted(buckets.items())
+            }
+        return {
+            'rows': dict(row_counts or {}),
+            'totals': {
+                'merchants_active': self.counts['merchants_active'],
+                'merchants_inactive': self.counts['merchants_inactive'],
+                'orders_paid': self.counts['orders_paid'],
+                'orders_cancelled': self.counts['orders_cancelled'],
+                'orders_refunded': self.counts['orders_refunded'],
+                'total_amount': self.counts['total_amount'] / 100,
+                'total_points': self.counts['total_points'],
+                'points_spent': self.counts['points_spent'],
+            },
+            'by_category': groups['category'],
+            'by_city': groups['city'],
+            'by_day': groups['day'],
+            'amount': self.amount_summary(),
+        }
+
+    def write_report(self, filename, row_counts=None):
+        """写出JSON报告；filename 为空时不写"""
+        if not filename:
+            return
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.report(row_counts), f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"📈 统计报告已保存: {filename}")
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+后端接口替身服务
+在内存中实现 replay 用到的支付/积分接口（路径、鉴权、请求校验和响应格式同 backend/routes），
+用于在没有 Node 后端和数据库时测试回放脚本本身，或作为回放客户端的吞吐上限参照。
+
+可选的固定延迟 latency（秒）模拟后端处理时间，不占用CPU。
+"""
+
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlsplit
+
+from datagen.replay import HttpError, read_headers, verify_token
+
+HISTORY_LIMIT = 100  # 每个用户保留的最近积分记录数
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 403: 'Forbidden', 404: 'Not Found',
+               500: 'Internal Server Error'}
+
+
+def calculate_points(amount):
+    """积分计算：1元=1分，小数舍去（同 routes/payments.js）"""
+    return amount // 100
+
+
+class StubBackend:
+    """内存中的订单、积分余额和积分记录"""
+
+    def __init__(self, merchants=None, prefix='/api/v1', latency=0.0, secret=None):
+        # merchants: {商户ID: {'merchant_name', 'status', ...}}，None 表示接受任意商户
+        self.merchants = merchants
+        self.prefix = prefix.rstrip('/')
+        self.latency = latency
+        self.secret = secret
+        self.orders = {}
+        self.points = defaultdict(lambda: [0, 0, 0])  # user_id -> [available, earned, spent]
+        self.history = defaultdict(lambda: deque(maxlen=HISTORY_LIMIT))
+        self.requests = 0
+
+    # ---------- 接口 ----------
+
+    def create_payment(self, user_id, body):
+        merchant_id = body.get('merchantId')
+        amount = body.get('amount')
+        if not isinstance(merchant_id, str) or not merchant_id:
+            return 400, {'success': False, 'message': '商户ID不能为空'}
+        if not isinstance(amount, int) or amount < 1:
+            return 400, {'success': False, 'message': '金额必须是大于0的整数'}
+        merchant = {'merchant_name': merchant_id, 'status': 'active'}
+        if self.merchants is not None:
+            merchant = self.merchants.get(merchant_id)
+            if merchant is None:
+                return 404, {'success': False, 'message': '商户不存在'}
+            if merchant['status'] != 'active':
+                return 400, {'success': False, 'message': '商户已停用，无法支付'}
+        order_id = f"order_{int(time.time() * 1000)}_{random.getrandbits(32):08x}"
+        points = calculate_points(amount)
+        self.orders[order_id] = {
+            'user_id': user_id,
+            'merchant_id': merchant_id,
+            'merchant_name': merchant['merchant_name'],
+            'amount': amount,
+            'points_awarded': points,
+            'status': 'pending',
+            'paid_at': None,
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        return 200, {'success': True, 'message': '支付订单创建成功',
+                     'data': {'orderId': order_id, 'expectedPoints': points,
+                              'merchantName': merchant['merchant_name']}}
+
+    def mock_success(self, user_id, body):
+        order = self.orders.get(body.get('orderId'))
+        if order is None or order['user_id'] != user_id or order['status'] != 'pending':
+            # 后端在事务中抛出异常，由错误处理中间件返回500
+            return 500, {'success': False, 'message': '订单不存在、权限不足或已支付'}
+        order['status'] = 'paid'
+        order['paid_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        points = order['points_awarded']
+        balance = self.points[user_id]
+        balance[0] += points
+        balance[1] += points
+        self.history[user_id].append({'pointsChange': points, 'type': 'payment_reward',
+                                      'merchantName': order['merchant_name'], 'orderAmount': order['amount'] / 100,
+                                      'description': f"在{order['merchant_name']}消费获得积分",
+                                      'createdAt': order['paid_at']})
+        return 200, {'success': True, 'message': '支付成功，积分已发放',
+                     'data': {'orderId': body['orderId'], 'pointsAwarded': points,
+                              'merchantName': order['merchant_name'], 'amount': order['amount'] / 100}}
+
+    def query_payment(self, user_id, order_id):
+        order = self.orders.get(order_id)
+        if order is None or order['user_id'] != user_id:
+            return 404, {'success': False, 'message': '订单不存在或无权限'}
+        return 200, {'success': True,
+                     'data': {'orderId': order_id, 'merchantName': order['merchant_name'],
+                              'amount': order['amount'] / 100, 'pointsAwarded': order['points_awarded'],
+                              'status': order['status'], 'paidAt': order['paid_at'],
+                              'createdAt': order['created_at']}}
+
+    def balance(self, user_id):
+        available, earned, spent = self.points.get(user_id, (0, 0, 0))
+        return 200, {'success': True, 'data': {'balance': available, 'totalEarned': earned,
+                                               'totalSpent': spent, 'expiringPoints': 0}}
+
+    def points_history(self, user_id):
+        records = list(reversed(self.history.get(user_id, ())))[:20]
+        return 200, {'success': True, 'data': {'records': records,
+                                               'pagination': {'page': 1, 'pageSize': 20,
+                                                              'total': len(self.history.get(user_id, ()))}}}
+
+    # ---------- 路由 ----------
+
+    def dispatch(self, method, target, headers, body):
+        """返回 (状态码, 响应JSON)"""
+        path = urlsplit(target).path
+        if not path.startswith(self.prefix + '/'):
+            return 404, {'success': False, 'message': '接口不存在'}
+        path = path[len(self.prefix):]
+
+        auth = headers.get('authorization', '')
+        token = auth.split(' ')[1] if ' ' in auth else ''
+        if not token:
+            return 401, {'success': False, 'message': '未提供认证令牌'}
+        try:
+            user_id = verify_token(token, self.secret)['id']
+        except ValueError as e:
+            return 403, {'success': False, 'message': str(e)}
+
+        if method == 'POST' and path == '/payments/create':
+            return self.create_payment(user_id, body)
+        if method == 'POST' and path == '/payments/mock-success':
+            return self.mock_success(user_id, body)
+        if method == 'GET' and path.startswith('/payments/query/'):
+            return self.query_payment(user_id, path[len('/payments/query/'):])
+        if method == 'GET' and path == '/points/balance':
+            return self.balance(user_id)
+        if method == 'GET' and path == '/points/history':
+            return self.points_history(user_id)
+        return 404, {'success': False, 'message': '接口不存在'}
+
+    async def handle(self, reader, writer):
+        """一个客户端连接：循环处理 keep-alive 请求"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = await read_headers(reader)
+                data = await reader.readexactly(int(headers.get('content-length', 0)))
+                try:
+                    body = json.loads(data) if data else {}
+                except ValueError:
+                    body = None
+                if not isinstance(body, dict):
+                    status, payload = 400, {'success': False, 'message': '请求体不是有效的JSON'}
+                else:
+                    status, payload = self.dispatch(method, target, headers, body)
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                content = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                writer.write((f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                              f"Content-Type: application/json; charset=utf-8\r\n"
+                              f"Content-Length: {len(content)}\r\n"
+                              f"Connection: keep-alive\r\n\r\n").encode('latin-1') + content)
+                await writer.drain()
+        except (ConnectionError, HttpError, asyncio.IncompleteReadError, ValueError, asyncio.CancelledError):
+            pass  # 客户端断开或服务关闭
+        finally:
+            writer.close()
+
+
+async def start_stub_server(backend, host='127.0.0.1', port=0):
+    """启动替身服务，返回 (asyncio.Server, 基础URL)；port=0 时自动选择空闲端口"""
+    server = await asyncio.start_server(backend.handle, host, port)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://{host}:{port}{backend.prefix}"
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+替身服务冒烟测试：replay_traffic.py 的会话回放到 StubBackend 上应全部成功
+
+    cd backend/sql/test-data && python -m unittest datagen.test_stub_server   # 或 python -m pytest datagen
+"""
+
+import asyncio
+import random
+import unittest
+
+import generate_realistic_data as gen
+import replay_traffic
+from datagen.replay import replay, user_token, verify_token
+from datagen.stub_server import StubBackend, start_stub_server
+
+SEED = 20250930
+SESSIONS = 200
+USERS = 100  # 只需要少量用户，会话不足时循环使用
+
+
+def build_sessions():
+    num_users = gen.NUM_USERS
+    gen.NUM_USERS = USERS
+    try:
+        return replay_traffic.build_sessions(SESSIONS, SEED)
+    finally:
+        gen.NUM_USERS = num_users
+
+
+async def replay_on_stub(sessions, merchants, mode, **options):
+    """启动替身服务（随机端口）回放会话，返回 (后端, LatencyRecorder)"""
+    backend = StubBackend({m['id']: m for m in merchants}, secret='test-secret')
+    server, base_url = await start_stub_server(backend, port=0)
+    try:
+        recorder, _ = await replay(sessions, base_url, mode, rng=random.Random(SEED), secret='test-secret',
+                                   **options)
+    finally:
+        server.close()
+        await server.wait_closed()
+    return backend, recorder
+
+
+class StubServerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sessions, cls.merchants = build_sessions()
+        cls.paid = sum(session['pay'] for session in cls.sessions)
+
+    def test_sessions(self):
+        self.assertEqual(len(self.sessions), SESSIONS)
+        self.assertTrue(0 < self.paid < SESSIONS)  # 既有支付的也有只创建不支付的订单
+
+    def test_token_round_trip(self):
+        self.assertEqual(verify_token(user_token('user_1', 'test-secret'), 'test-secret')['id'], 'user_1')
+        with self.assertRaises(ValueError):
+            verify_token(user_token('user_1', 'test-secret'), 'other-secret')
+        with self.assertRaises(ValueError):
+            verify_token(user_token('user_1', 'test-secret', now=1), 'test-secret')  # 已过期
+
+    def check_replay(self, backend, recorder):
+        self.assertEqual(recorder.sessions, SESSIONS)
+        self.assertEqual(recorder.failed_sessions, 0)
+        summary = recorder.summary()
+        self.assertEqual(summary['create']['outcomes'], {200: SESSIONS})
+        self.assertEqual(summary['pay']['outcomes'], {200: self.paid})
+        self.assertEqual(len(backend.orders), SESSIONS)
+        self.assertEqual(sum(order['status'] == 'paid' for order in backend.orders.values()), self.paid)
+
+    def test_closed_loop(self):
+        backend, recorder = asyncio.run(replay_on_stub(self.sessions, self.merchants, 'closed', concurrency=8))
+        self.check_replay(backend, recorder)
+        self.assertEqual(recorder.queue_delays, [])
+
+    def test_open_loop(self):
+        # 目标速率远高于单个会话的处理速度，并发为1时后面的会话必须排队
+        backend, recorder = asyncio.run(replay_on_stub(self.sessions, self.merchants, 'open',
+                                                       qps=5000.0, concurrency=1, arrival='uniform'))
+        self.check_replay(backend, recorder)
+        self.assertEqual(len(recorder.queue_delays), SESSIONS)
+        self.assertTrue(all(delay >= 0 for delay in recorder.queue_delays))
+        self.assertGreater(max(recorder.queue_delays), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+订单时间流量模型
+按小时、星期、节假日和商户类别给每个小时时段加权，重现午/晚高峰和周末峰值。
+窗口内的时段权重预先计算成累积分布，单次抽样 O(log 时段数)，支持批量抽样。
+"""
+
+import bisect
+import json
+import re
+from datetime import timedelta
+
+# 全天24小时权重（0点~23点）：午高峰、晚高峰
+DEFAULT_HOURLY = [
+    0.3, 0.15, 0.1, 0.08, 0.08, 0.15, 0.4, 0.9, 1.2, 1.0, 1.1, 2.2,
+    2.8, 1.8, 1.0, 0.9, 1.0, 1.6, 2.5, 2.6, 2.0, 1.4, 0.9, 0.5,
+]
+
+# 星期权重（周一~周日）
+DEFAULT_WEEKDAY = [1.0, 0.95, 1.0, 1.0, 1.15, 1.45, 1.35]
+
+# 节假日倍数：'MM-DD' 每年重复，'YYYY-MM-DD' 只用于当天（优先）。
+# 相邻两个节日最多相隔54天，任意60天的生成窗口内都至少有一个；
+# 春节、中秋等农历节日每年日期不同，需要时在流量模型文件中按完整日期给出
+DEFAULT_HOLIDAYS = {
+    '01-01': 1.3,   # 元旦
+    '02-14': 1.5,   # 情人节
+    '03-08': 1.5,   # 女神节
+    '05-01': 1.6,   # 劳动节
+    '05-20': 1.5,   # 520
+    '06-18': 2.0,   # 618
+    '08-08': 1.4,   # 88会员节
+    '09-09': 1.6,   # 99大促
+    '10-01': 1.8,   # 国庆
+    '10-02': 1.7,
+    '10-03': 1.6,
+    '10-04': 1.5,
+    '10-05': 1.5,
+    '10-06': 1.5,
+    '10-07': 1.4,
+    '11-11': 2.5,   # 双11
+    '12-12': 1.8,   # 双12
+}
+
+HOLIDAY_KEY = re.compile(r'(\d{4}-)?\d{2}-\d{2}')
+
+# 类别专属曲线，未列出的类别使用默认曲线
+DEFAULT_CATEGORIES = {
+    '餐饮': {
+        'hourly': [0.2, 0.1, 0.05, 0.05, 0.05, 0.1, 0.5, 1.2, 1.0, 0.5, 0.8, 3.0,
+                   3.8, 2.0, 0.6, 0.5, 0.7, 2.2, 3.6, 3.2, 1.8, 1.0, 0.8, 0.5],
+    },
+    '教育': {
+        'hourly': [0, 0, 0, 0, 0, 0, 0, 0.05, 0.3, 1.0, 1.2, 0.8,
+                   0.3, 0.5, 1.0, 1.0, 1.4, 1.8, 2.2, 2.4, 1.6, 0.6, 0.1, 0],
+        'weekday': [0.7, 0.7, 0.7, 0.7, 0.8, 1.9, 1.8],
+    },
+    '娱乐': {
+        'hourly': [0.8, 0.5, 0.3, 0.1, 0.05, 0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9,
+                   1.0, 1.1, 1.2, 1.3, 1.5, 1.8, 2.2, 2.6, 2.8, 2.5, 1.9, 1.3],
+        'weekday': [0.8, 0.8, 0.9, 0.9, 1.3, 1.8, 1.5],
+    },
+}
+
+
+class TrafficProfile:
+    """
+    流量模型
+
+    hourly: 24个小时权重；weekday: 7个星期权重（周一开始）
+    holidays: {'MM-DD' 或 'YYYY-MM-DD': 倍数}，'MM-DD' 每年重复，完整日期优先
+    categories: {类别: {'hourly': [...], 'weekday': [...]}}，缺省项沿用全局曲线
+    """
+
+    def __init__(self, hourly=None, weekday=None, holidays=None, categories=None):
+        self.hourly = list(hourly or DEFAULT_HOURLY)
+        self.weekday = list(weekday or DEFAULT_WEEKDAY)
+        self.holidays = dict(DEFAULT_HOLIDAYS if holidays is None else holidays)
+        self.categories = dict(DEFAULT_CATEGORIES if categories is None else categories)
+        if len(self.hourly) != 24 or len(self.weekday) != 7:
+            raise ValueError("hourly 需要24个权重，weekday 需要7个权重")
+        invalid = [day for day in self.holidays if not HOLIDAY_KEY.fullmatch(day)]
+        if invalid:
+            raise ValueError(f"节假日日期格式应为 MM-DD 或 YYYY-MM-DD: {', '.join(invalid)}")
+        self._samplers = {}
+
+    @classmethod
+    def from_file(cls, path):
+        """从JSON文件读取（键：hourly / weekday / holidays / categories）"""
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(config.get('hourly'), config.get('weekday'),
+                   config.get('holidays'), config.get('categories'))
+
+    def curves(self, category=None):
+        """类别对应的 (小时权重, 星期权重)"""
+        custom = self.categories.get(category, {})
+        return custom.get('hourly', self.hourly), custom.get('weekday', self.weekday)
+
+    def holiday(self, day):
+        """某天（'YYYY-MM-DD'）的节假日倍数：先查完整日期，再查每年重复的 'MM-DD'"""
+        multiplier = self.holidays.get(day)
+        return self.holidays.get(day[5:], 1.0) if multiplier is None else multiplier
+
+    def sampler(self, start, end, category=None):
+        """[start, end) 窗口内的时间抽样器（按窗口和类别缓存）"""
+        key = (start, end, category)
+        sampler = self._samplers.get(key)
+        if sampler is None:
+            sampler = TimeSampler(self, start, end, category)
+            self._samplers[key] = sampler
+        return sampler
+
+    def __getstate__(self):
+        # 分片任务传给子进程时不带缓存
+        state = dict(self.__dict__)
+        state['_samplers'] = {}
+        return state
+
+
+class TimeSampler:
+    """窗口内按小时时段加权的时间抽样"""
+
+    def __init__(self, profile, start, end, category=None):
+        hourly, weekday = profile.curves(category)
+        self.start = start.replace(minute=0, second=0, microsecond=0)
+        slots = int((end - self.start).total_seconds() // 3600)
+        if slots <= 0:
+            raise ValueError("时间窗口至少需要1小时")
+        cumulative = []
+        total = 0.0
+        for i in range(slots):
+            slot = self.start + timedelta(hours=i)
+            weight = hourly[slot.hour] * weekday[slot.weekday()]
+            weight *= profile.holiday(slot.strftime('%Y-%m-%d'))
+            total += weight
+            cumulative.append(total)
+        if total <= 0:
+            raise ValueError("时间窗口内的权重全部为0")
+        self.cumulative = cumulative
+        self.total = total
+
+    def sample(self, rng):
+        """抽一个时间（datetime）；rng 为 random 模块或 random.Random"""
+        slot = bisect.bisect_right(self.cumulative, rng.random() * self.total)
+        slot = min(slot, len(self.cumulative) - 1)
+        return self.start + timedelta(hours=slot, seconds=rng.randrange(3600))
+
+    def sample_many(self, rng, count):
+        """批量抽样，返回 datetime 列表"""
+        slots = rng.choices(range(len(self.cumulative)), cum_weights=self.cumulative, k=count)
+        return [self.start + timedelta(hours=slot, seconds=rng.randrange(3600)) for slot in slots]
+
+    def sample_array(self, np_rng, count):
+        """NumPy 批量抽样，返回 datetime64[s] 数组"""
+        import numpy as np
+        cumulative = np.asarray(self.cumulative)
+        slots = np.searchsorted(cumulative, np_rng.random(count) * self.total, side='right')
+        slots = np.minimum(slots, len(cumulative) - 1)
+        seconds = slots * 3600 + np_rng.integers(0, 3600, size=count)
+        return np.datetime64(self.start, 's') + seconds.astype('timedelta64[s]')
+
+
+def load_profile(spec):
+    """
+    解析流量模型参数
+    'uniform' -> None（均匀分布）；'realistic' -> 默认模型；其余视为JSON文件路径
+    """
+    if spec in (None, 'uniform'):
+        return None
+    if spec == 'realistic':
+        return TrafficProfile()
+    return TrafficProfile.from_file(spec)
@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+NumPy向量化生成引擎
+按用户块整列生成订单和积分数据（用户、商户、金额、状态、时间、积分），
+替代逐行调用 random 的热循环。数据分布与逐行生成一致，但随机序列不同。
+
+产出的列直接交给写出器的 write_columns()：商户、状态、用户、关联订单等列是下标数组加取值表
+（datagen.columnar.CodeColumn），整数列是 numpy 数组，不构造逐行的字典或元组；
+统计按块用 numpy 分组汇总后计入 StatsAggregator。
+"""
+
+import string
+from datetime import timedelta
+
+from datagen.columnar import CodeColumn
+from datagen.events import (CLAWBACK_DELAY, EXPIRE_SHARE, MIN_REDEEM_POINTS, ORDER_STATUSES, REDEEM_MAX,
+                            REDEEM_SHARE, event_description)
+
+try:
+    import numpy as np
+except ImportError:  # numpy 是可选依赖，只有使用向量化引擎时才需要
+    np = None
+
+ID_SUFFIX_CHARS = string.digits + string.ascii_lowercase
+BLOCK_USERS = 100_000  # 每块处理的用户数，决定峰值内存
+
+
+def require_numpy():
+    """检查 numpy 是否可用"""
+    if np is None:
+        raise ImportError("向量化引擎需要 numpy：pip install numpy")
+
+
+def format_datetimes(values):
+    """datetime64[s] 数组 -> 'YYYY-MM-DD HH:MM:SS' 字符串列表"""
+    return np.char.replace(np.datetime_as_string(values, unit='s'), 'T', ' ').tolist()
+
+
+def legacy_ids(rng, prefix, timestamp, start, count):
+    """
+    批量生成与 random_id() 相同格式的ID：前缀 + 时间戳 + 6位计数 + 4位随机后缀
+    计数从 start 开始连续分配。
+    """
+    alphabet = np.array(list(ID_SUFFIX_CHARS))
+    suffixes = alphabet[rng.integers(0, len(ID_SUFFIX_CHARS), size=(count, 4))]
+    suffixes = np.ascontiguousarray(suffixes).view('<U4').ravel().tolist()
+    head = f"{prefix}{timestamp}"
+    return [f"{head}{counter:06d}{suffix}" for counter, suffix in zip(range(start, start + count), suffixes)]
+
+
+class VectorOrderEngine:
+    """
+    向量化订单/积分生成
+
+    merchants: 可选商户列表（dict，需含 id / merchant_name / merchant_category）
+    amount_buckets: [(最小金额, 最大金额, 概率), ...]，单位分
+    paid_ratio: 已支付订单比例，其余为已取消
+    orders_per_user: (最少, 最多) 每个用户的订单数，均匀分布
+    days_ago: 订单时间分布在 now 之前的天数
+    points_fn: 积分计算函数，需支持 numpy 数组
+    reserve_ids: reserve_ids(count) -> 起始计数，用于和逐行生成共享ID计数器
+    id_generator: datagen.ids 中的ID生成器，None 表示原有格式
+    traffic: datagen.traffic.TrafficProfile，None 表示订单时间均匀分布
+    order_count_table / merchant_table: datagen.distributions.AliasTable，
+        分别为每用户订单数（相对 orders_per_user 下限）和商户的别名表，None 表示均匀分布
+    events: datagen.events.EventModel，None 表示只生成支付获得积分
+    event_record_types: {事件: record_type}
+    opening_balances: datagen.state.UserBalances，按用户序号提供兑换时可用的期初积分
+    wechat_pool: datagen.pools.UniqueStringPool，按订单的ID计数取微信支付单号；None 表示随机生成
+    stats: datagen.stats.StatsAggregator，按块汇总订单和积分统计；None 表示不统计
+    """
+
+    def __init__(self, merchants, amount_buckets, paid_ratio, orders_per_user, days_ago,
+                 now, points_fn, reserve_ids, seed=None, id_generator=None, traffic=None,
+                 order_count_table=None, merchant_table=None, events=None, event_record_types=None,
+                 opening_balances=None, wechat_pool=None, stats=None):
+        require_numpy()
+        self.rng = np.random.default_rng(seed)
+        self.merchant_ids = np.array([m['id'] for m in merchants], dtype=object)
+        self.merchant_names = np.array([m['merchant_name'] for m in merchants], dtype=object)
+        self.merchant_categories = np.array([m['merchant_category'] for m in merchants], dtype=object)
+        self.bucket_low = np.array([b[0] for b in amount_buckets], dtype=np.int64)
+        self.bucket_high = np.array([b[1] for b in amount_buckets], dtype=np.int64)
+        weights = np.array([b[2] for b in amount_buckets], dtype=np.float64)
+        self.bucket_weights = weights / weights.sum()
+        self.paid_ratio = paid_ratio
+        self.orders_per_user = orders_per_user
+        self.window_seconds = (days_ago + 1) * 86400
+        self.now = np.datetime64(now.replace(microsecond=0), 's')
+        self.timestamp = now.strftime('%Y%m%d%H%M%S')
+        self.points_fn = points_fn
+        self.reserve_ids = reserve_ids
+        self.id_generator = id_generator
+        self.order_count_table = order_count_table
+        self.merchant_table = merchant_table
+        self.events = events
+        self.event_record_types = event_record_types or {}
+        self.opening_balances = opening_balances
+        self.wechat_pool = wechat_pool
+        self.stats = stats
+        self.traffic_samplers = None
+        if traffic is not None:
+            start = now - timedelta(seconds=self.window_seconds)
+            self.traffic_samplers = {
+                category: traffic.sampler(start, now, category)
+                for category in dict.fromkeys(self.merchant_categories.tolist())
+            }
+
+    def generate_block(self, user_start, user_end):
+        """
+        生成 [user_start, user_end) 用户的订单，返回各列（numpy 数组）
+
+        user_index 为用户序号（从0开始）；订单按用户顺序排列。
+        """
+        rng = self.rng
+        n_users = user_end - user_start
+        low, high = self.orders_per_user
+        if self.order_count_table is None:
+            counts = rng.integers(low, high, size=n_users, endpoint=True)
+        else:
+            counts = low + self.order_count_table.sample_array(rng, n_users)
+        n = int(counts.sum())
+
+        bucket = rng.choice(len(self.bucket_weights), size=n, p=self.bucket_weights)
+        amount = rng.integers(self.bucket_low[bucket], self.bucket_high[bucket], endpoint=True)
+        offset = rng.integers(0, self.window_seconds, size=n) if self.traffic_samplers is None else None
+        block = {
+            'user_index': np.repeat(np.arange(user_start, user_end), counts),
+            'order_counts': counts,
+            'merchant': self._merchants(n),
+            'amount': amount,
+            'points': self.points_fn(amount),
+            'paid': rng.random(n) < self.paid_ratio,
+            'created_at': None if offset is None else self.now - offset.astype('timedelta64[s]'),
+            'wechat_hi': rng.integers(0, 10 ** 12, size=n),
+            'wechat_lo': rng.integers(0, 10 ** 12, size=n),
+        }
+        if offset is None:
+            block['created_at'] = self._traffic_times(block['merchant'])
+        if self.events is not None:
+            # 已支付订单的后续：退款 / 支付后取消
+            rates = self.events.rates
+            outcome = rng.random(n)
+            block['refund'] = block['paid'] & (outcome < rates['refund'])
+            block['cancel'] = block['paid'] & ~block['refund'] & (outcome < rates['refund'] + rates['cancel'])
+        return block
+
+    def _merchants(self, count):
+        if self.merchant_table is None:
+            return self.rng.integers(0, len(self.merchant_ids), size=count)
+        return self.merchant_table.sample_array(self.rng, count)
+
+    def _traffic_times(self, merchant):
+        """按商户类别的流量曲线抽样订单时间"""
+        created_at = np.empty(len(merchant), dtype='datetime64[s]')
+        categories = self.merchant_categories[merchant]
+        for category, sampler in self.traffic_samplers.items():
+            mask = categories == category
+            count = int(mask.sum())
+            if count:
+                created_at[mask] = sampler.sample_array(self.rng, count)
+        return created_at
+
+    def iter_tables(self, user_start, user_end, user_id_fn, block_users=BLOCK_USERS):
+        """
+        按块生成并产出 (表名, 列数据字典)
+
+        列数据为列表、numpy 数组或 CodeColumn，交给写出器的 write_columns()；
+        每块依次产出 payment_orders、points_records、user_points。
+        """
+        for start in range(user_start, user_end, block_users):
+            end = min(start + block_users, user_end)
+            block = self.generate_block(start, end)
+            yield from self._block_tables(block, start, end, user_id_fn)
+
+    def _ids(self, prefix, count):
+        return self._reserve(prefix, count)[1]
+
+    def _reserve(self, prefix, count):
+        """预留 count 个ID计数，返回 (起始计数, ID列表)"""
+        start = self.reserve_ids(count)
+        if self.id_generator is None:
+            return start, legacy_ids(self.rng, prefix, self.timestamp, start, count)
+        return start, self.id_generator.format_many(prefix, start, count)
+
+    def _block_tables(self, block, start, end, user_id_fn):
+        n = len(block['amount'])
+        paid = block['paid']
+        n_paid = int(paid.sum())
+        merchant = block['merchant']
+        local = block['user_index'] - start
+
+        user_ids = [user_id_fn(i) for i in range(start, end)]
+        order_start, order_ids = self._reserve('ord_', n)
+        created_at = format_datetimes(block['created_at'])
+        amount = block['amount']
+        points = np.where(paid, block['points'], 0)
+        paid_list = paid.tolist()
+        if self.wechat_pool is None:
+            wechat_order_ids = [
+                f"4200{hi:012d}{lo:012d}" if is_paid else None
+                for hi, lo, is_paid in zip(block['wechat_hi'].tolist(), block['wechat_lo'].tolist(), paid_list)
+            ]
+        else:
+            wechat_order_ids = [
+                value if is_paid else None
+                for value, is_paid in zip(self.wechat_pool.render(order_start, n), paid_list)
+            ]
+
+        # 状态编号：0 已支付，1 已取消，2 退款，3 支付后取消
+        status = np.where(paid, 0, 1)
+        if self.events is not None:
+            status[block['refund']] = 2
+            status[block['cancel']] = 3
+        statuses = ['paid', 'cancelled', ORDER_STATUSES['refund'], ORDER_STATUSES['cancel']]
+        if self.stats is not None:
+            self._add_order_stats(status, statuses, amount, merchant, block['created_at'])
+
+        yield 'payment_orders', {
+            'id': order_ids,
+            'user_id': CodeColumn.from_codes(local, user_ids),
+            'merchant_id': CodeColumn.from_codes(merchant, self.merchant_ids),
+            'merchant_name': CodeColumn.from_codes(merchant, self.merchant_names),
+            'merchant_category': CodeColumn.from_codes(merchant, self.merchant_categories),
+            'amount': amount,
+            'points_awarded': points,
+            'payment_method': ['wechat_pay'] * n,
+            'status': CodeColumn.from_codes(status, statuses),
+            'wechat_order_id': wechat_order_ids,
+            'paid_at': [t if p else None for t, p in zip(created_at, paid_list)],
+            'created_at': created_at,
+        }
+
+        paid_index = np.flatnonzero(paid)
+        paid_points = block['points'][paid_index]
+        paid_merchant = merchant[paid_index]
+        if self.stats is not None:
+            self.stats.add_points_totals(int(paid_points.sum()), 0)
+        yield 'points_records', {
+            'id': self._ids('pts_', n_paid),
+            'user_id': CodeColumn.from_codes(local[paid_index], user_ids),
+            'points_change': paid_points,
+            'record_type': ['payment_reward'] * n_paid,
+            'related_order_id': CodeColumn.from_codes(paid_index, order_ids),
+            'merchant_id': CodeColumn.from_codes(paid_merchant, self.merchant_ids),
+            'merchant_name': CodeColumn.from_codes(paid_merchant, self.merchant_names),
+            'description': [f"支付¥{a/100:.2f}获得{p}积分"
+                            for a, p in zip(amount[paid_index].tolist(), paid_points.tolist())],
+            'created_at': CodeColumn.from_codes(paid_index, created_at),
+        }
+
+        earned = np.bincount(local, weights=points, minlength=end - start).astype(np.int64)
+        spent = np.zeros(end - start, dtype=np.int64)
+        if self.events is not None:
+            records, spent = self._event_records(block, start, end, earned, order_ids, user_ids)
+            yield 'points_records', records
+        yield 'user_points', {
+            'user_id': user_ids,
+            'available_points': earned - spent,
+            'total_earned': earned,
+            'total_spent': spent,
+        }
+
+    def _add_order_stats(self, status, statuses, amount, merchant, created_at):
+        """按状态、金额、商户、日期汇总本块订单，计入 stats（只有 paid 状态计为已支付）"""
+        counted = status == 0
+        paid_amount = amount[counted]
+        status_counts = {}
+        for code, count in enumerate(np.bincount(status, minlength=len(statuses)).tolist()):
+            if count:
+                status_counts[statuses[code]] = status_counts.get(statuses[code], 0) + count
+        values, counts = np.unique(paid_amount, return_counts=True)
+
+        def totals(index, size):
+            """按分组下标汇总 (订单数, 已支付数, 已支付金额) 三列"""
+            paid_index = index[counted]
+            return zip(np.bincount(index, minlength=size).tolist(),
+                       np.bincount(paid_index, minlength=size).tolist(),
+                       np.rint(np.bincount(paid_index, weights=paid_amount, minlength=size)).astype(np.int64).tolist())
+
+        merchant_totals = [
+            (self.merchant_ids[i], self.merchant_categories[i], *group)
+            for i, group in enumerate(totals(merchant, len(self.merchant_ids))) if group[0]
+        ]
+        days, day_index = np.unique(created_at.astype('datetime64[D]'), return_inverse=True)
+        day_totals = dict(zip(days.astype(str).tolist(), totals(day_index, len(days))))
+        self.stats.add_order_totals(status_counts, dict(zip(values.tolist(), counts.tolist())),
+                                    merchant_totals, day_totals)
+
+    def _event_records(self, block, start, end, earned, order_ids, user_ids):
+        """
+        积分事件（见 datagen.events）：扣回退款/取消订单的积分，再在最后一次活动之后兑换、过期
+        返回 (points_records 列数据, 每个用户扣除的积分)
+        """
+        rng = self.rng
+        n_users = end - start
+        local = block['user_index'] - start
+        created = block['created_at'].astype(np.int64)
+        now = self.now.astype(np.int64)
+
+        # 扣回：支付后 CLAWBACK_DELAY 内，扣回该订单发放的全部积分
+        claw = np.flatnonzero(block['refund'] | block['cancel'])
+        claw_points = block['points'][claw]
+        claw_time = np.minimum(created[claw] + rng.integers(*CLAWBACK_DELAY, size=len(claw), endpoint=True), now)
+        claw_kind = np.where(block['refund'][claw], 'refund', 'cancel')
+        spent = np.bincount(local[claw], weights=claw_points, minlength=n_users).astype(np.int64)
+
+        # 每个用户的最后活动时间（订单按用户连续排列，每个用户至少一笔订单）
+        offsets = np.concatenate(([0], np.cumsum(block['order_counts'])[:-1]))
+        last = np.maximum.reduceat(created, offsets)
+        np.maximum.at(last, local[claw], claw_time)
+
+        # 兑换、过期：在 [最后活动, now] 内抽样排序的时间点上依次扣除可用积分
+        available = earned - spent
+        if self.opening_balances is not None:
+            opening = np.frombuffer(self.opening_balances.fields['available_points'], dtype=np.int64)
+            available = available + opening[start:end]
+        rates = self.events.rates
+        redeem_count = np.where(rng.random(n_users) < rates['redeem'],
+                                rng.integers(1, REDEEM_MAX, size=n_users, endpoint=True), 0)
+        expire = rng.random(n_users) < rates['expire']
+        slots = np.sort(rng.random((n_users, REDEEM_MAX + 1)), axis=1)
+        slot_times = last[:, None] + (slots * (now - last + 1)[:, None]).astype(np.int64)
+
+        users = [local[claw]]
+        kinds = [claw_kind]
+        changes = [claw_points]
+        times = [claw_time]
+        for step in range(REDEEM_MAX + 1):
+            if step < REDEEM_MAX:
+                kind = 'redeem'
+                active = (redeem_count > step) & (available >= MIN_REDEEM_POINTS)
+                share = rng.uniform(*REDEEM_SHARE, size=n_users)
+                step_points = np.maximum(1, (available * share).astype(np.int64))
+                when = slot_times[:, step]
+            else:
+                kind = 'expire'
+                share = rng.uniform(*EXPIRE_SHARE, size=n_users)
+                step_points = (available * share).astype(np.int64)
+                active = expire & (step_points > 0)
+                when = slot_times[np.arange(n_users), redeem_count]
+            index = np.flatnonzero(active)
+            step_points = step_points[index]
+            available[index] -= step_points
+            spent[index] += step_points
+            users.append(index)
+            kinds.append(np.full(len(index), kind))
+            changes.append(step_points)
+            times.append(when[index])
+
+        users = np.concatenate(users)
+        kinds = np.concatenate(kinds).tolist()
+        changes = np.concatenate(changes)
+        count = len(users)
+        unrelated = count - len(claw)  # 兑换、过期记录没有关联订单和商户（取值表末尾的 None）
+        merchant = np.concatenate((block['merchant'][claw], np.full(unrelated, len(self.merchant_ids))))
+        if self.stats is not None:
+            spent_total = int(changes.sum())
+            self.stats.add_points_totals(-spent_total, spent_total)
+        records = {
+            'id': self._ids('pts_', count),
+            'user_id': CodeColumn.from_codes(users, user_ids),
+            'points_change': -changes,
+            'record_type': [self.event_record_types[kind] for kind in kinds],
+            'related_order_id': [order_ids[i] for i in claw.tolist()] + [None] * unrelated,
+            'merchant_id': CodeColumn.from_codes(merchant, [*self.merchant_ids, None]),
+            'merchant_name': CodeColumn.from_codes(merchant, [*self.merchant_names, None]),
+            'description': [event_description(kind, points) for kind, points in zip(kinds, changes.tolist())],
+            'created_at': format_datetimes(np.concatenate(times).astype('datetime64[s]')),
+        }
+        return records, spent
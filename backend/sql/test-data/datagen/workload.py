@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+查询负载与索引基准
+按后端接口（backend/routes）的真实访问模式生成参数化查询，在已导入的数据上逐条执行，
+按查询统计延迟分位数、返回行数和扫描量，用于评估复合索引、分区等改动。
+
+查询参数（用户、商户、订单、积分记录类型）取自从数据中均匀抽样的订单和积分记录：
+生成时的活跃度分布（--orders-dist / --merchant-dist）原样体现在查询的键分布中，
+下单多的用户、热门商户被查询得也多，和线上一致。
+
+扫描量：
+- MySQL：查询前后 SHOW SESSION STATUS 中 Handler_read_* 的差值（扣除 SHOW STATUS 本身的读取），
+  即存储引擎实际读取的行数
+- SQLite：没有行级计数，用虚拟机指令数近似（progress handler 每 PROGRESS_STEPS 条指令计一次）
+
+每个查询另记录一次执行计划（MySQL EXPLAIN 的索引和估算行数，SQLite EXPLAIN QUERY PLAN）。
+"""
+
+import re
+import time
+from datetime import datetime, timedelta
+
+from datagen.loader import MySQLBackend
+from datagen.replay import PERCENTILES, percentile
+from datagen.schema import strip_comments
+
+SAMPLE_ROWS = 10000  # 每张表抽样的行数（查询参数从中选取）
+PROGRESS_STEPS = 1000  # SQLite：每执行多少条虚拟机指令计数一次
+TREND_DAYS = 7  # 商户趋势查询的天数（同 routes/merchants.js）
+
+# 参数来源：抽样的表和列
+SAMPLE_SOURCES = {
+    'order': ('payment_orders', ('id', 'user_id', 'merchant_id')),
+    'record': ('points_records', ('user_id', 'record_type')),
+}
+
+# 查询：weight 默认权重；sample 参数来源；params 参数（按 SQL 中 ? 的顺序，since 为最近 TREND_DAYS 天的起点）
+# SQL 同 backend/routes 中对应接口，分页取第一页
+QUERIES = {
+    'user_orders': {
+        'weight': 0.25,
+        'description': '用户订单列表（最新在前）',
+        'sample': 'order',
+        'params': ('user_id',),
+        'sql': "SELECT id, merchant_name, amount, points_awarded, status, paid_at, created_at "
+               "FROM payment_orders WHERE user_id = ? ORDER BY created_at DESC LIMIT 20",
+    },
+    'order_detail': {
+        'weight': 0.15,
+        'description': '查询订单（routes/payments.js）',
+        'sample': 'order',
+        'params': ('id', 'user_id'),
+        'sql': "SELECT id, merchant_name, amount, points_awarded, status, paid_at, created_at "
+               "FROM payment_orders WHERE id = ? AND user_id = ?",
+    },
+    'points_balance': {
+        'weight': 0.2,
+        'description': '积分余额',
+        'sample': 'order',
+        'params': ('user_id',),
+        'sql': "SELECT available_points, total_earned, total_spent FROM user_points WHERE user_id = ?",
+    },
+    'points_history': {
+        'weight': 0.2,
+        'description': '按用户和类型的积分记录（routes/points.js）',
+        'sample': 'record',
+        'params': ('user_id', 'record_type'),
+        'sql': "SELECT pr.id, pr.points_change, pr.record_type, pr.related_order_id, pr.merchant_id, "
+               "pr.merchant_name, pr.description, pr.created_at, po.amount "
+               "FROM points_records pr LEFT JOIN payment_orders po ON pr.related_order_id = po.id "
+               "WHERE pr.user_id = ? AND pr.record_type = ? ORDER BY pr.created_at DESC LIMIT 20 OFFSET 0",
+    },
+    'points_history_count': {
+        'weight': 0.1,
+        'description': '积分记录总数（分页）',
+        'sample': 'record',
+        'params': ('user_id', 'record_type'),
+        'sql': "SELECT COUNT(*) AS total FROM points_records pr WHERE pr.user_id = ? AND pr.record_type = ?",
+    },
+    'merchant_daily_revenue': {
+        'weight': 0.05,
+        'description': '商户近7天每日订单数和收入（routes/merchants.js）',
+        'sample': 'order',
+        'params': ('merchant_id', 'since'),
+        'sql': "SELECT DATE(created_at) AS date, COUNT(*) AS orders, "
+               "COALESCE(SUM(CASE WHEN status = 'paid' THEN amount ELSE 0 END), 0) AS revenue "
+               "FROM payment_orders WHERE merchant_id = ? AND created_at >= ? "
+               "GROUP BY DATE(created_at) ORDER BY date ASC",
+    },
+    'merchant_overview': {
+        'weight': 0.05,
+        'description': '商户总体统计（routes/merchants.js）',
+        'sample': 'order',
+        'params': ('merchant_id',),
+        'sql': "SELECT COUNT(DISTINCT user_id) AS total_users, COUNT(*) AS total_orders, "
+               "COALESCE(SUM(CASE WHEN status = 'paid' THEN amount ELSE 0 END), 0) AS total_revenue "
+               "FROM payment_orders WHERE merchant_id = ?",
+    },
+}
+
+CREATE_INDEX = re.compile(r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?\s+ON\s+`?(\w+)`?',
+                          re.IGNORECASE)
+
+# ==================== 查询组合 ====================
+
+def parse_mix(spec):
+    """
+    解析查询组合
+
+    'default' -> 默认权重；'user_orders=0.5,points_history=0.5' -> 只运行列出的查询
+    """
+    spec = (spec or 'default').strip()
+    if spec == 'default':
+        return {name: query['weight'] for name, query in QUERIES.items()}
+    mix = {}
+    for item in spec.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in QUERIES:
+            raise ValueError(f"未知查询: {name}（可选 {', '.join(QUERIES)}）")
+        try:
+            mix[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"查询权重必须是数字: {item}")
+        if mix[name] < 0:
+            raise ValueError(f"查询权重不能为负: {item}")
+    if not any(mix.values()):
+        raise ValueError("查询组合的权重之和必须大于0")
+    return mix
+
+# ==================== 参数抽样 ====================
+
+def reservoir(rows, size, rng):
+    """蓄水池抽样：单遍从任意长的行序列中均匀抽取 size 行"""
+    sample = []
+    for i, row in enumerate(rows):
+        if i < size:
+            sample.append(row)
+        else:
+            j = rng.randrange(i + 1)
+            if j < size:
+                sample[j] = row
+    return sample
+
+
+class KeySampler:
+    """从数据中均匀抽样订单和积分记录，为查询提供参数"""
+
+    def __init__(self, backend, conn, rng, size=SAMPLE_ROWS):
+        self.rng = rng
+        self.samples = {}
+        for source, (table, columns) in SAMPLE_SOURCES.items():
+            rows = backend.stream_rows(conn, f"SELECT {', '.join(columns)} FROM {table}")
+            self.samples[source] = [dict(zip(columns, row)) for row in reservoir(rows, size, rng)]
+        latest = list(backend.stream_rows(conn, "SELECT MAX(created_at) FROM payment_orders"))[0][0]
+        if isinstance(latest, str):
+            latest = datetime.strptime(latest, '%Y-%m-%d %H:%M:%S')
+        self.since = (latest - timedelta(days=TREND_DAYS)).strftime('%Y-%m-%d %H:%M:%S') if latest else None
+
+    def empty_sources(self):
+        """没有数据的参数来源（对应的查询无法运行）"""
+        return [source for source, rows in self.samples.items() if not rows]
+
+    def params(self, query):
+        row = self.rng.choice(self.samples[query['sample']])
+        return tuple(self.since if name == 'since' else row[name] for name in query['params'])
+
+# ==================== 执行与计量 ====================
+
+class MySQLProbe:
+    """MySQL：按 Handler_read_* 计数统计存储引擎读取的行数"""
+
+    unit = '读取行数'
+
+    def __init__(self, conn):
+        self.cursor = conn.cursor()
+        first = self.handler_reads()
+        self.overhead = self.handler_reads() - first  # SHOW STATUS 本身产生的读取
+
+    def handler_reads(self):
+        self.cursor.execute("SHOW SESSION STATUS LIKE 'Handler_read%'")
+        return sum(int(value) for _, value in self.cursor.fetchall())
+
+    def run(self, sql, params):
+        """执行一条查询，返回 (秒, 返回行数, 读取行数)"""
+        before = self.handler_reads()
+        start = time.perf_counter()
+        self.cursor.execute(sql, params)
+        rows = self.cursor.fetchall()
+        elapsed = time.perf_counter() - start
+        return elapsed, len(rows), max(self.handler_reads() - before - self.overhead, 0)
+
+    def plan(self, sql, params):
+        self.cursor.execute('EXPLAIN ' + sql, params)
+        names = [d[0] for d in self.cursor.description]
+        steps = [dict(zip(names, row)) for row in self.cursor.fetchall()]
+        return '; '.join(f"{step['table']}: {step['key'] or '全表扫描'}（估算 {step['rows']} 行）"
+                         for step in steps)
+
+
+class SQLiteProbe:
+    """SQLite：按虚拟机指令数近似扫描量"""
+
+    unit = '虚拟机指令数'
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.ticks = 0
+        conn.set_progress_handler(self._tick, PROGRESS_STEPS)
+
+    def _tick(self):
+        self.ticks += 1
+        return 0
+
+    def run(self, sql, params):
+        """执行一条查询，返回 (秒, 返回行数, 虚拟机指令数)"""
+        self.ticks = 0
+        start = time.perf_counter()
+        rows = self.conn.execute(sql, params).fetchall()
+        elapsed = time.perf_counter() - start
+        return elapsed, len(rows), self.ticks * PROGRESS_STEPS
+
+    def plan(self, sql, params):
+        return '; '.join(row[-1] for row in self.conn.execute('EXPLAIN QUERY PLAN ' + sql, params))
+
+
+def open_probe(backend, conn):
+    if isinstance(backend, MySQLBackend):
+        conn.autocommit(True)
+        return MySQLProbe(conn)
+    return SQLiteProbe(conn)
+
+
+def query_sql(backend, name):
+    """查询SQL（? 换成驱动的占位符）"""
+    return QUERIES[name]['sql'].replace('?', backend.placeholder)
+
+
+def run_workload(backend, probe, sampler, mix, count, warmup, rng):
+    """
+    按组合权重随机执行 warmup + count 条查询（预热部分不计入），返回按查询的结果
+
+    {查询: {count, mean, p50, ..., max（毫秒）, rows, examined（平均每条）, plan}}
+    """
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    statements = {name: query_sql(backend, name) for name in names}
+    plans = {name: probe.plan(statements[name], sampler.params(QUERIES[name])) for name in names}
+    latencies = {name: [] for name in names}
+    totals = {name: [0, 0] for name in names}  # [返回行数, 扫描量]
+    for i in range(warmup + count):
+        name = rng.choices(names, weights)[0]
+        elapsed, rows, examined = probe.run(statements[name], sampler.params(QUERIES[name]))
+        if i < warmup:
+            continue
+        latencies[name].append(elapsed)
+        totals[name][0] += rows
+        totals[name][1] += examined
+
+    results = {}
+    for name in names:
+        values = sorted(latencies[name])
+        if not values:
+            continue
+        result = {'count': len(values), 'mean': sum(values) / len(values) * 1000}
+        for p in PERCENTILES:
+            result[f"p{p:g}"] = percentile(values, p) * 1000
+        result['max'] = values[-1] * 1000
+        result['rows'] = totals[name][0] / len(values)
+        result['examined'] = totals[name][1] / len(values)
+        result['plan'] = plans[name]
+        results[name] = result
+    return results
+
+# ==================== 索引 ====================
+
+def read_statements(path):
+    """读取SQL文件中的语句（按分号切分，去掉注释）"""
+    with open(path, encoding='utf-8') as f:
+        text = strip_comments(f.read())
+    return [statement.strip() for statement in text.split(';') if statement.strip()]
+
+
+def schema_index_statements(indexes, tables):
+    """
+    SQLite 替身：按建表脚本中的二级索引建索引（导入时只建了表）
+
+    indexes 为 datagen.schema.parse_indexes 的结果，只处理 tables 中存在的表；
+    SQLite 的索引名在全库唯一，加表名前缀
+    """
+    return [f"CREATE INDEX IF NOT EXISTS {table}_{name} ON {table} ({', '.join(columns)})"
+            for table, items in indexes.items() if table in tables
+            for name, columns in items]
+
+
+def drop_index_statement(backend, statement):
+    """CREATE INDEX 语句对应的 DROP INDEX；其他语句返回 None"""
+    match = CREATE_INDEX.match(statement)
+    if not match:
+        return None
+    name, table = match.groups()
+    if isinstance(backend, MySQLBackend):
+        return f"DROP INDEX {name} ON {table}"
+    return f"DROP INDEX IF EXISTS {name}"
+
+
+def execute_statements(conn, statements):
+    cursor = conn.cursor()
+    for statement in statements:
+        cursor.execute(statement)
+    conn.commit()
+
+
+def existing_tables(backend, conn):
+    """数据库中已有的表"""
+    if isinstance(backend, MySQLBackend):
+        return {row[0] for row in backend.stream_rows(conn, "SHOW TABLES")}
+    return {row[0] for row in backend.stream_rows(conn, "SELECT name FROM sqlite_master WHERE type = 'table'")}
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+流式SQL写入器
+按批次把行数据写成 INSERT ... VALUES 语句，内存占用与总行数无关
+"""
+
+import itertools
+
+from datagen.columnar import COLUMN_CHUNK_ROWS, column_chunks, column_values, format_column
+
+
+# 行序列化时的列类型
+#   int:   非空整数，原样输出
+#   raw:   非空且不含引号、反斜杠的字符串（生成的ID、时间、枚举值），直接加引号
+#   text:  任意字符串，可为空，按需转义（sql_escape）
+#   value: 类型不确定（默认），同 sql_value()
+COLUMN_KINDS = ('int', 'raw', 'text', 'value')
+
+
+def sql_escape(text):
+    """
+    SQL字符串转义：None -> NULL；单引号写成两个单引号，反斜杠写成两个反斜杠
+    （MySQL默认把反斜杠当转义符）。只有含引号或反斜杠时才做替换。
+    """
+    if text is None:
+        return 'NULL'
+    if text.__class__ is not str:
+        text = str(text)
+    if "'" in text or '\\' in text:
+        text = text.replace('\\', '\\\\').replace("'", "''")
+    return "'" + text + "'"
+
+
+def sql_value(value):
+    """把Python值转为SQL字面量：None -> NULL，整数原样输出，其余按字符串转义"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, int):
+        return str(value)
+    return sql_escape(value)
+
+
+def compile_row_serializer(columns, kinds=None):
+    """
+    预编译一张表的行序列化函数：row -> "(v1, v2, ...)"
+
+    按列类型生成一条 f-string（只编译一次）：int / raw 列直接嵌入，
+    text 列走 sql_escape()，其余走 sql_value()，省去逐行判断列类型和拼接格式。
+    函数在本模块的全局命名空间中求值，sql_escape / sql_value 在调用时查找。
+    """
+    kinds = kinds or {}
+    parts = []
+    for i, column in enumerate(columns):
+        kind = kinds.get(column, 'value')
+        if kind not in COLUMN_KINDS:
+            raise ValueError(f"未知列类型: {column}={kind}")
+        if kind == 'int':
+            parts.append(f"{{row[{i}]}}")
+        elif kind == 'raw':
+            parts.append(f"'{{row[{i}]}}'")
+        elif kind == 'text':
+            parts.append(f"{{sql_escape(row[{i}])}}")
+        else:
+            parts.append(f"{{sql_value(row[{i}])}}")
+    source = 'lambda row: f"(' + ', '.join(parts) + ')"'
+    return eval(source, globals())
+
+
+def compile_column_serializer(columns, kinds=None):
+    """
+    按列写出时的行模板和各列的格式化函数：(模板, [格式化函数或 None, ...])
+
+    与 compile_row_serializer 的输出相同：int / raw 列的值直接代入模板（None 表示不需要格式化），
+    text 列先整列 sql_escape，其余整列 sql_value；再用 map(模板.format, *各列) 拼成 "(v1, v2, ...)"
+    """
+    kinds = kinds or {}
+    parts = []
+    formatters = []
+    for column in columns:
+        kind = kinds.get(column, 'value')
+        if kind not in COLUMN_KINDS:
+            raise ValueError(f"未知列类型: {column}={kind}")
+        parts.append("'{}'" if kind == 'raw' else '{}')
+        formatters.append(sql_escape if kind == 'text' else sql_value if kind == 'value' else None)
+    return '(' + ', '.join(parts) + ')', formatters
+
+
+def additive_upsert(columns):
+    """ON DUPLICATE KEY UPDATE 子句：主键已存在时把各列累加到原值上（用于增量写入汇总表）"""
+    updates = ', '.join(f"{column} = {column} + VALUES({column})" for column in columns)
+    return f"ON DUPLICATE KEY UPDATE {updates}"
+
+
+class SQLBatchWriter:
+    """
+    分批写INSERT语句
+
+    每张表单独缓冲，缓冲满 batch_rows 行就写出一条完整的 INSERT 语句，
+    不同表的语句可以交错出现在同一个文件里。
+
+    指定 commit_every 时每 commit_every 条语句包在一个显式事务中，
+    事务开头写 "-- @chunk N" 标记：导入中断后可从最后一个未提交的
+    chunk 标记处继续导入，不必重新导入之前已提交的数据。
+
+    out 若提供 boundary(written_counts) 方法（如 datagen.output.RotatingOutput），
+    每条语句（有事务时为每个事务）写完后调用它，传入各表已写出的行数。
+    """
+
+    def __init__(self, out, tables, batch_rows=1000, commit_every=None, upserts=None, column_kinds=None):
+        """
+        out: 已打开的文本文件对象
+        tables: {表名: (列名, ...)}
+        batch_rows: 每条INSERT语句的最大行数，None 表示不限（每张表在 flush 时写一条）
+        commit_every: 每个事务包含的INSERT语句数，None 表示不写事务语句
+        upserts: {表名: "ON DUPLICATE KEY UPDATE ..."}，写在该表每条INSERT语句末尾
+        column_kinds: {表名: {列名: 列类型}}，见 COLUMN_KINDS；未指定的列按 value 处理
+        """
+        self.out = out
+        self.tables = tables
+        self.batch_rows = batch_rows
+        self.commit_every = commit_every
+        self.upserts = upserts or {}
+        column_kinds = column_kinds or {}
+        self.serializers = {
+            table: compile_row_serializer(columns, column_kinds.get(table))
+            for table, columns in tables.items()
+        }
+        self.column_serializers = {
+            table: compile_column_serializer(columns, column_kinds.get(table))
+            for table, columns in tables.items()
+        }
+        self.buffers = {table: [] for table in tables}
+        self.row_counts = {table: 0 for table in tables}
+        self.written_counts = {table: 0 for table in tables}
+        self.statements = 0
+        self.chunks = 0
+        self.in_transaction = False
+        self._boundary = getattr(out, 'boundary', None)
+
+    def write_row(self, table, values):
+        """追加一行（values 与 tables[table] 的列一一对应）"""
+        buffer = self.buffers[table]
+        buffer.append(self.serializers[table](values))
+        self.row_counts[table] += 1
+        if self.batch_rows and len(buffer) >= self.batch_rows:
+            self.flush(table)
+
+    def write_rows(self, table, rows):
+        """追加多行"""
+        for values in rows:
+            self.write_row(table, values)
+
+    def write_columns(self, table, columns):
+        """
+        追加整列数据（columns 与 tables[table] 的列一一对应，可为列表、numpy 数组或 datagen.columnar.CodeColumn）
+
+        按批切块（batch_rows 行，不分批时 COLUMN_CHUNK_ROWS 行），逐列格式化后按行模板拼接，
+        不构造逐行的元组；写出的语句与逐行 write_row 相同
+        """
+        template, formatters = self.column_serializers[table]
+        buffer = self.buffers[table]
+        for count, chunk in column_chunks(columns, self.batch_rows or COLUMN_CHUNK_ROWS):
+            fields = [column_values(column) if fmt is None else format_column(column, fmt)
+                      for column, fmt in zip(chunk, formatters)]
+            rows = map(template.format, *fields)
+            self.row_counts[table] += count
+            if not self.batch_rows:
+                buffer.extend(rows)
+                continue
+            while count:
+                take = min(self.batch_rows - len(buffer), count)
+                buffer.extend(itertools.islice(rows, take))
+                count -= take
+                if len(buffer) >= self.batch_rows:
+                    self.flush(table)
+
+    def comment(self, text):
+        """写一行注释"""
+        self.out.write(f"-- {text}\n")
+
+    def flush(self, table=None):
+        """写出缓冲区；table 为空时写出所有表"""
+        tables = [table] if table else list(self.buffers)
+        for name in tables:
+            buffer = self.buffers[name]
+            if not buffer:
+                continue
+            self._begin_statement()
+            columns = ', '.join(self.tables[name])
+            self.out.write(f"INSERT INTO {name} ({columns}) VALUES\n")
+            self.out.write(',\n'.join(buffer))
+            if name in self.upserts:
+                self.out.write(f"\n{self.upserts[name]}")
+            self.out.write(';\n\n')
+            self.statements += 1
+            self.written_counts[name] += len(buffer)
+            buffer.clear()
+            if self.commit_every and self.statements % self.commit_every == 0:
+                self.commit()
+            elif self._boundary and not self.in_transaction:
+                self._boundary(self.written_counts)
+
+    def finish(self, table):
+        """该表数据已全部产出"""
+        self.flush(table)
+
+    def _begin_statement(self):
+        if self.commit_every and not self.in_transaction:
+            self.chunks += 1
+            self.out.write(f"-- @chunk {self.chunks}\nSTART TRANSACTION;\n")
+            self.in_transaction = True
+
+    def commit(self):
+        """提交当前事务"""
+        if self.in_transaction:
+            self.out.write("COMMIT;\n\n")
+            self.in_transaction = False
+            if self._boundary:
+                self._boundary(self.written_counts)
+
+    def close(self):
+        """写出剩余数据并提交未完成的事务"""
+        self.flush()
+        self.commit()
@@ -6,15 +6,62 @@
 表：users, merchants, payment_orders, points_records, user_points
 """
 
+import argparse
+import os
 import random
+import re
 import string
+import sys
 from datetime import datetime, timedelta
+from fractions import Fraction
+
+from datagen.bulk import TSVBulkWriter, write_load_script
+from datagen.catalog import Catalog
+from datagen.columnar import ColumnStore
+from datagen.distributions import alias_table, parse_distribution
+from datagen.events import ORDER_STATUSES, TIME_FORMAT, event_description, parse_events
+from datagen.ids import ID_STRATEGIES, make_id_generator
+from datagen.instrument import PROFILE_MODES, PROGRESS_INTERVAL, Instrumentation, profiling
+from datagen.output import COMPRESSIONS, RotatingOutput
+from datagen.partition import (SORT_RUN_ROWS, PartitionSorter, add_partitions_ddl, month_partitions,
+                               next_month, partition_ddl)
+from datagen.scenario import apply_option_defaults, load_scenario
+from datagen.schema import check_schema
+from datagen.shard import SHARD_ID_STRIDE, derive_seed, part_filename, run_shards, split_range
+from datagen.stats import StatsAggregator
+from datagen.state import (BALANCE_FIELDS, BalanceRecorder, UserBalances, decode_random_state,
+                           encode_random_state, load_state, save_state)
+from datagen.traffic import load_profile
+from datagen.writer import SQLBatchWriter, additive_upsert
 
 # ==================== 配置 ====================
 NUM_USERS = 100
 NUM_MERCHANTS = 20
 NUM_ORDERS_PER_USER = 2  # 平均每个用户2笔订单
-POINTS_RATE = 0.1  # 积分比例：消费金额的10%
+POINTS_RATE = 1  # 积分比例：每消费1元获得的积分（可为小数，如 0.1 为每10元1积分），不足1积分舍去
+DATABASE = 'points_app_dev'
+OUTPUT_FILE = 'insert_realistic_data.sql'
+STREAM_BATCH_ROWS = 1000  # 流式模式下每条INSERT语句的行数
+LOAD_SCRIPT = 'load_data.sql'  # TSV格式的导入脚本文件名
+SCENARIO_DIR = 'scenarios'  # 预置场景目录（相对本脚本目录）
+# 场景文件 settings 中可以设置的项（见 apply_settings）
+SCENARIO_SETTINGS = ('users', 'merchants', 'orders_per_user', 'max_orders_per_user', 'order_days',
+                     'amount_buckets', 'points_rate', 'merchant_types', 'cities', 'database')
+REFERENCE_TIME = '2025-09-30 00:00:00'  # 可复现模式（指定种子/分片）下的默认时间基准
+
+# 订单分布
+ORDERS_PER_USER = (1, 4)  # 每个用户的订单数范围（均匀分布）
+MAX_ORDERS_PER_USER = 1000  # 幂律分布下每个用户的订单数上限（下限同 ORDERS_PER_USER）
+ORDER_DAYS = 60  # 订单时间分布在过去多少天内
+PAID_RATIO = 0.75  # 已支付订单比例，其余为已取消
+
+# 支付金额分布（分）：(最小值, 最大值, 概率)
+AMOUNT_BUCKETS = [
+    (500, 2000, 0.5),       # 小额消费 5-20元
+    (2000, 5000, 0.3),      # 中额消费 20-50元
+    (5000, 10000, 0.15),    # 大额消费 50-100元
+    (10000, 50000, 0.05),   # 特大消费 100-500元
+]
 
 # ==================== 数据源 ====================
 
@@ -31,17 +78,205 @@ MERCHANT_TYPES = {
     '教育': ['培训机构', '早教中心', '舞蹈班', '音乐教室', '美术班', '英语培训', '数学辅导', '跆拳道馆', '游泳培训', '钢琴教室']
 }
 
+# 手机号段
+PHONE_PREFIXES = ['130', '131', '132', '133', '134', '135', '136', '137', '138', '139',
+                  '150', '151', '152', '153', '155', '156', '157', '158', '159',
+                  '180', '181', '182', '183', '184', '185', '186', '187', '188', '189']
+
 CITIES = ['北京', '上海', '广州', '深圳', '成都', '杭州', '重庆', '西安', '苏州', '武汉', '南京', '天津', '郑州', '长沙', '东莞', '沈阳', '青岛', '合肥', '佛山', '济南']
 
+# 唯一值池（--unique-pools）：字段 -> (前缀, 字符集, 前缀后的长度, 其中唯一部分的长度)
+# 唯一部分的容量须大于编号上限：用户/商户按序号，微信支付单号按订单的ID计数（分片间隔 SHARD_ID_STRIDE）
+UNIQUE_FIELDS = {
+    'openid': (['o'], string.ascii_letters + string.digits, 27, 5),         # 62^5 ≈ 9.2亿
+    'phone': (PHONE_PREFIXES, string.digits, 8, 8),                         # 29 × 10^8
+    'contact_phone': (PHONE_PREFIXES, string.digits, 8, 8),
+    'merchant_no': (['MCH'], string.digits, 12, 9),                         # 10^9
+    'business_license': ([''], string.digits + string.ascii_uppercase, 18, 6),  # 36^6 ≈ 21.8亿
+    'wechat_order_id': (['4200'], string.digits, 24, 12),                   # 10^12
+}
+AVATAR_COUNT = 100  # 头像URL https://api.multiavatar.com/1..100.png
+CATALOG_NAME = 'points_app_dev'  # 目录缓存文件名前缀（见 datagen.catalog）
+
 # ==================== 辅助函数 ====================
 
 _id_counter = 0
+_fixed_now = None
+_id_strategy = 'legacy'
+_id_generator = None  # 非 legacy ID策略的生成器
+_traffic = None  # 订单时间流量模型，None 表示均匀分布
+_order_count_table = None  # 每用户订单数的别名表，None 表示均匀分布
+_merchant_dist = 'uniform'  # 商户热度分布
+_events = None  # 积分事件模型（datagen.events.EventModel），None 表示只生成支付获得积分
+_compression = None  # SQL输出压缩：None / gzip / zstd
+_rotate_bytes = None  # SQL输出分卷大小（未压缩字节数），None 表示不分卷
+_stats_report = None  # 统计报告JSON文件，None 表示不输出
+_string_pools = None  # 唯一值池 {字段: UniqueStringPool}，None 表示逐行随机拼接
+_partition_run_rows = None  # 按月分区输出时外部排序每段的行数，None 表示按生成顺序输出
+# 积分 = 金额（分）× 分子 // 分母，由 set_points_rate() 设置
+_points_numerator = Fraction(str(POINTS_RATE)).numerator
+_points_denominator = Fraction(str(POINTS_RATE)).denominator * 100
+_settings = {}  # 生效的场景设置（传给分片子进程）
+_catalog = None  # 展开后的目录（datagen.catalog.Catalog），第一次用到时创建，见 catalog()
+
+def reset_generator(seed, now=None, id_start=0):
+    """重置随机状态、ID计数器和时间基准，用于可复现生成"""
+    global _id_counter, _fixed_now
+    random.seed(seed)
+    _id_counter = id_start
+    _fixed_now = now
+
+def set_fixed_now(now):
+    """固定时间基准（不改变随机状态），None 恢复为当前时间"""
+    global _fixed_now
+    _fixed_now = now
+
+def current_time():
+    """当前时间；可复现模式或指定 --now 时固定为时间基准"""
+    return _fixed_now or datetime.now()
+
+def set_id_strategy(strategy):
+    """
+    选择ID策略：legacy（原格式）/ snowflake / ulid
+    新策略以当前时间基准为起始时间，只依赖ID计数器，需在 reset_generator() 之后调用
+    """
+    global _id_strategy, _id_generator
+    _id_strategy = strategy
+    _id_generator = make_id_generator(strategy, current_time())
+
+def set_traffic_profile(profile):
+    """设置订单时间流量模型（datagen.traffic.TrafficProfile），None 恢复均匀分布"""
+    global _traffic
+    _traffic = profile
+
+def set_activity_distributions(orders_dist='uniform', merchant_dist='uniform'):
+    """
+    设置活跃度分布：orders_dist 为每用户订单数，merchant_dist 为商户热度
+    取值 uniform / zipf:S / pareto:A；幂律下订单数取值 ORDERS_PER_USER[0] ~ MAX_ORDERS_PER_USER，
+    商户按列表顺序排名（靠前的商户最热）
+    """
+    global _order_count_table, _merchant_dist
+    _order_count_table = alias_table(orders_dist, MAX_ORDERS_PER_USER - ORDERS_PER_USER[0] + 1)
+    _merchant_dist = merchant_dist
+
+def set_event_model(model):
+    """设置积分事件模型（退款、支付后取消、兑换、过期），None 表示只生成支付获得积分"""
+    global _events
+    _events = model
+
+def set_string_pools(enabled):
+    """启用/关闭高基数字符串字段的唯一值池（openid、手机号、商户编号、营业执照号、微信支付单号）"""
+    global _string_pools
+    if not enabled:
+        _string_pools = None
+        return
+    from datagen.pools import make_pools  # 用到时才导入（会导入 numpy），不拖慢小规模运行的启动
+    _string_pools = make_pools(UNIQUE_FIELDS)
+
+def apply_settings(settings):
+    """
+    应用场景设置（数据规模和形态），未给出的项保持脚本中的默认值；取值不合法时抛出 ValueError
+
+    users / merchants: 用户数、商户数；orders_per_user: [最少, 最多] 每用户订单数；
+    max_orders_per_user: 幂律分布下的订单数上限；order_days: 订单时间窗口天数；
+    amount_buckets: [[最小金额, 最大金额, 概率], ...]（分）；points_rate: 每元积分；
+    merchant_types: {分类: [商户名, ...]}；cities: [城市, ...]；database: 库名
+    """
+    global NUM_USERS, NUM_MERCHANTS, NUM_ORDERS_PER_USER, ORDERS_PER_USER, MAX_ORDERS_PER_USER, ORDER_DAYS
+    global AMOUNT_BUCKETS, MERCHANT_TYPES, CITIES, DATABASE, _settings, _catalog
+    if 'users' in settings:
+        NUM_USERS = int(settings['users'])
+        if NUM_USERS < 1:
+            raise ValueError('用户数至少为1')
+    if 'orders_per_user' in settings:
+        low, high = (int(value) for value in settings['orders_per_user'])
+        if not 1 <= low <= high:
+            raise ValueError(f"每用户订单数范围不合法: {settings['orders_per_user']}")
+        ORDERS_PER_USER = (low, high)
+        NUM_ORDERS_PER_USER = (low + high) // 2
+    if 'max_orders_per_user' in settings:
+        MAX_ORDERS_PER_USER = int(settings['max_orders_per_user'])
+    if MAX_ORDERS_PER_USER < ORDERS_PER_USER[0]:
+        raise ValueError(f"max_orders_per_user 不能小于每用户最少订单数 {ORDERS_PER_USER[0]}")
+    if 'order_days' in settings:
+        ORDER_DAYS = int(settings['order_days'])
+        if ORDER_DAYS < 0:
+            raise ValueError('order_days 不能为负')
+    if 'amount_buckets' in settings:
+        buckets = [(int(low), int(high), float(weight)) for low, high, weight in settings['amount_buckets']]
+        if not buckets or any(low > high or weight < 0 for low, high, weight in buckets):
+            raise ValueError(f"金额分桶不合法: {settings['amount_buckets']}")
+        AMOUNT_BUCKETS = buckets
+    if 'points_rate' in settings:
+        set_points_rate(settings['points_rate'])
+    if 'merchant_types' in settings:
+        MERCHANT_TYPES = {category: list(names) for category, names in settings['merchant_types'].items()}
+    if 'cities' in settings:
+        CITIES = list(settings['cities'])
+        if not CITIES:
+            raise ValueError('cities 不能为空')
+    if 'merchant_types' in settings or 'cities' in settings:
+        _catalog = None  # 数据源变了，下次取表时按新的数据源打开目录
+    if 'database' in settings:
+        DATABASE = str(settings['database'])
+        if not re.fullmatch(r'\w+', DATABASE):
+            raise ValueError(f"库名不合法: {DATABASE}")
+    if 'merchants' in settings:
+        NUM_MERCHANTS = int(settings['merchants'])
+    catalog = sum(len(names) for names in MERCHANT_TYPES.values())
+    if not 1 <= NUM_MERCHANTS <= catalog:
+        raise ValueError(f"商户数须在 1~{catalog} 之间（不超过 merchant_types 中的商户名数）")
+    _settings = dict(settings)
+
+def build_catalog(sources):
+    """由数据源展开目录的各表（目录缓存未命中时才调用）"""
+    merchants = [(category, name) for category, names in sources['merchant_types'].items() for name in names]
+    return {
+        'full_names': [surname + given_name for surname in sources['surnames'] for given_name in sources['given_names']],
+        'avatar_urls': [f"https://api.multiavatar.com/{avatar_id}.png" for avatar_id in range(1, sources['avatars'] + 1)],
+        'merchant_categories': [category for category, _ in merchants],
+        'merchant_names': [name for _, name in merchants],
+        'cities': list(sources['cities']),
+    }
+
+def catalog():
+    """
+    姓名、头像、商户、城市目录：catalog()[表名] -> 字符串序列
+
+    展开结果缓存为二进制文件并 mmap 映射，数据源（SURNAMES、MERCHANT_TYPES、CITIES 等）变化时自动重建；
+    只在第一次取表时打开，不用目录的运行（如 --help、参数出错）不付出任何代价
+    """
+    global _catalog
+    if _catalog is None:
+        _catalog = Catalog(CATALOG_NAME, {
+            'surnames': SURNAMES,
+            'given_names': GIVEN_NAMES,
+            'avatars': AVATAR_COUNT,
+            'merchant_types': MERCHANT_TYPES,
+            'cities': CITIES,
+        }, build_catalog)
+    return _catalog
+
+def order_count():
+    """一个用户的订单数"""
+    if _order_count_table is None:
+        return random.randint(*ORDERS_PER_USER)
+    return ORDERS_PER_USER[0] + _order_count_table.sample(random)
+
+def reserve_ids(count):
+    """预留 count 个连续的ID计数，返回起始计数（供批量生成ID使用）"""
+    global _id_counter
+    start = _id_counter + 1
+    _id_counter += count
+    return start
 
 def random_id(prefix=''):
     """生成随机ID（保证唯一性）"""
     global _id_counter
     _id_counter += 1
-    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    if _id_generator is not None:
+        return _id_generator.format(prefix, _id_counter)
+    timestamp = current_time().strftime('%Y%m%d%H%M%S')
     random_str = ''.join(random.choices(string.digits + string.ascii_lowercase, k=4))
     return f"{prefix}{timestamp}{_id_counter:06d}{random_str}"
 
@@ -51,10 +286,7 @@ def random_openid():
 
 def random_phone():
     """生成手机号"""
-    prefixes = ['130', '131', '132', '133', '134', '135', '136', '137', '138', '139',
-                '150', '151', '152', '153', '155', '156', '157', '158', '159',
-                '180', '181', '182', '183', '184', '185', '186', '187', '188', '189']
-    return random.choice(prefixes) + ''.join(random.choices(string.digits, k=8))
+    return random.choice(PHONE_PREFIXES) + ''.join(random.choices(string.digits, k=8))
 
 def random_name():
     """生成中文姓名"""
@@ -64,12 +296,12 @@ def random_name():
 
 def random_avatar():
     """生成头像URL"""
-    avatar_id = random.randint(1, 100)
+    avatar_id = random.randint(1, AVATAR_COUNT)
     return f"https://api.multiavatar.com/{avatar_id}.png"
 
 def random_datetime(days_ago=90):
     """生成随机日期时间"""
-    now = datetime.now()
+    now = current_time()
     random_days = random.randint(0, days_ago)
     random_hours = random.randint(0, 23)
     random_minutes = random.randint(0, 59)
@@ -78,6 +310,14 @@ def random_datetime(days_ago=90):
     dt = now - timedelta(days=random_days, hours=random_hours, minutes=random_minutes, seconds=random_seconds)
     return dt.strftime('%Y-%m-%d %H:%M:%S')
 
+def order_datetime(category):
+    """生成订单时间：设置了流量模型时按类别曲线抽样，否则均匀分布在过去 ORDER_DAYS 天"""
+    if _traffic is None:
+        return random_datetime(ORDER_DAYS)
+    now = current_time()
+    sampler = _traffic.sampler(now - timedelta(days=ORDER_DAYS + 1), now, category)
+    return sampler.sample(random).strftime('%Y-%m-%d %H:%M:%S')
+
 def random_merchant_no():
     """生成商户编号"""
     return 'MCH' + ''.join(random.choices(string.digits, k=12))
@@ -88,77 +328,212 @@ def random_business_license():
 
 def random_amount():
     """生成随机支付金额（分）"""
-    amounts = [
-        random.randint(500, 2000),      # 小额消费 5-20元
-        random.randint(2000, 5000),     # 中额消费 20-50元
-        random.randint(5000, 10000),    # 大额消费 50-100元
-        random.randint(10000, 50000),   # 特大消费 100-500元
-    ]
-    weights = [0.5, 0.3, 0.15, 0.05]
+    amounts = [random.randint(low, high) for low, high, _ in AMOUNT_BUCKETS]
+    weights = [weight for _, _, weight in AMOUNT_BUCKETS]
     return random.choices(amounts, weights=weights)[0]
 
+def paid_status_choices(paid_ratio):
+    """
+    已支付比例 -> 逐行生成时 random.choice 的状态列表（如 0.75 -> 3个 paid + 1个 cancelled）
+
+    与 NumPy 引擎使用同一个 PAID_RATIO；比例不能用分母不超过1000的分数精确表示时抛出 ValueError
+    """
+    ratio = Fraction(paid_ratio).limit_denominator(1000)
+    if float(ratio) != paid_ratio or not 0 <= ratio <= 1:
+        raise ValueError(f"PAID_RATIO 应为0~1之间、可写成分母不超过1000的分数: {paid_ratio}")
+    return ['paid'] * ratio.numerator + ['cancelled'] * (ratio.denominator - ratio.numerator)
+
+PAID_STATUS_CHOICES = paid_status_choices(PAID_RATIO)
+
+def set_points_rate(rate):
+    """设置积分比例（每消费1元获得的积分），按分数保存，整数运算不产生浮点误差"""
+    global _points_numerator, _points_denominator
+    rate = Fraction(str(rate))
+    if rate < 0:
+        raise ValueError(f"积分比例不能为负: {rate}")
+    _points_numerator = rate.numerator
+    _points_denominator = rate.denominator * 100
+
 def calculate_points(amount):
-    """计算积分：1元=1分，小数舍去"""
+    """计算积分：金额（元）× POINTS_RATE，小数舍去（同样适用于 numpy 数组）"""
     # amount是以分为单位，除以100得到元，向下取整得到积分
-    return int(amount / 100)
-
-def sql_escape(text):
-    """SQL字符串转义"""
-    if text is None:
-        return 'NULL'
-    return f"'{str(text).replace(chr(39), chr(39)+chr(39))}'"
+    return amount * _points_numerator // _points_denominator
 
 # ==================== 生成数据 ====================
 
-def generate_users():
-    """生成用户数据"""
-    users = []
-    print(f"📊 生成 {NUM_USERS} 个用户...")
-    
-    for i in range(NUM_USERS):
-        user_id = f"user_{i+1:05d}"
-        wechat_id = random_openid()
-        nickname = random_name()
-        avatar = random_avatar()
-        phone = random_phone() if random.random() > 0.3 else None  # 70%有手机号
+# 各表写入的列（与服务器表结构一致）
+TABLE_COLUMNS = {
+    'users': ('id', 'wechat_id', 'nickname', 'avatar', 'phone', 'created_at'),
+    'merchants': ('id', 'merchant_name', 'merchant_no', 'contact_person', 'contact_phone', 'business_license', 'status', 'business_category', 'created_at'),
+    'payment_orders': ('id', 'user_id', 'merchant_id', 'merchant_name', 'merchant_category', 'amount', 'points_awarded', 'payment_method', 'status', 'wechat_order_id', 'paid_at', 'created_at'),
+    'points_records': ('id', 'user_id', 'points_change', 'record_type', 'related_order_id', 'merchant_id', 'merchant_name', 'description', 'created_at'),
+    'user_points': ('user_id', 'available_points', 'total_earned', 'total_spent'),
+}
+
+# 列类型（见 datagen.writer.COLUMN_KINDS）：int 非空整数，raw 生成的ID/时间/枚举（不含引号），
+# text 名称、描述等需要转义的文本；可能为空的列按 value 处理
+# （兑换、过期等积分记录没有关联订单和商户）
+COLUMN_KINDS = {
+    'users': {'id': 'raw', 'wechat_id': 'raw', 'nickname': 'text', 'avatar': 'raw',
+              'created_at': 'raw'},
+    'merchants': {'id': 'raw', 'merchant_name': 'text', 'merchant_no': 'raw', 'contact_person': 'text',
+                  'contact_phone': 'raw', 'business_license': 'raw', 'status': 'raw',
+                  'business_category': 'text', 'created_at': 'raw'},
+    'payment_orders': {'id': 'raw', 'user_id': 'raw', 'merchant_id': 'raw', 'merchant_name': 'text',
+                       'merchant_category': 'text', 'amount': 'int', 'points_awarded': 'int',
+                       'payment_method': 'raw', 'status': 'raw', 'created_at': 'raw'},
+    'points_records': {'id': 'raw', 'user_id': 'raw', 'points_change': 'int', 'record_type': 'raw',
+                       'merchant_name': 'text',
+                       'description': 'text', 'created_at': 'raw'},
+    'user_points': {'user_id': 'raw', 'available_points': 'int', 'total_earned': 'int', 'total_spent': 'int'},
+}
+
+# 表依赖：直接写库时子表在父表全部提交后才开始写入
+TABLE_PARENTS = {
+    'payment_orders': ('users', 'merchants'),
+    'points_records': ('users', 'merchants'),
+    'user_points': ('users',),
+}
+
+# 重新生成前需要清空的表
+TRUNCATE_TABLES = ('points_records', 'user_points', 'payment_orders', 'merchants', 'users')
+PARTITION_TABLES = ('payment_orders', 'points_records')  # 生产环境按 created_at 按月分区的表
+
+# 各类积分事件的 record_type（points_records.record_type 只允许 payment_reward / mall_consumption / admin_adjust）
+EVENT_RECORD_TYPES = {
+    'refund': 'admin_adjust',
+    'cancel': 'admin_adjust',
+    'redeem': 'mall_consumption',
+    'expire': 'admin_adjust',
+}
+
+# 列名与数据字段名不一致的情况
+COLUMN_FIELDS = {
+    'business_category': 'merchant_category',
+}
+
+# 非流式路径在内存中按列存储（datagen.columnar）：int 整数，code 低基数字符串（字典编码），
+# 未列出的字段为 text。商户只有几十个且按行查找，仍保留为字典列表
+COLUMN_STORAGE = {
+    'users': {'nickname': 'code', 'avatar': 'code'},
+    'payment_orders': {'merchant_id': 'code', 'merchant_name': 'code', 'merchant_category': 'code',
+                       'amount': 'int', 'points_awarded': 'int', 'payment_method': 'code', 'status': 'code'},
+    'points_records': {'points_change': 'int', 'record_type': 'code', 'merchant_id': 'code',
+                       'merchant_name': 'code'},
+    'user_points': {'available_points': 'int', 'total_earned': 'int', 'total_spent': 'int'},
+}
+
+# 表结构定义（相对本脚本目录）：生成前检查 TABLE_COLUMNS、COLUMN_KINDS 和 VALUE_DOMAINS（见 datagen.schema）
+SCHEMA_FILES = ('../create_all_tables.sql', '../create_merchants_table.sql')
+
+# 脚本可能产出的枚举值，须在表结构的 ENUM 取值中
+VALUE_DOMAINS = {
+    ('merchants', 'status'): ('active', 'inactive'),
+    ('payment_orders', 'status'): ('paid', 'cancelled', *ORDER_STATUSES.values()),
+    ('points_records', 'record_type'): ('payment_reward', *EVENT_RECORD_TYPES.values()),
+}
+
+def check_table_schema(paths=None):
+    """对照表结构检查写入的列和枚举值（paths 默认为 SCHEMA_FILES），不一致时抛出 datagen.schema.SchemaError"""
+    if paths is None:
+        base = os.path.dirname(os.path.abspath(__file__))
+        paths = [os.path.join(base, path) for path in SCHEMA_FILES]
+    check_schema(paths, TABLE_COLUMNS, COLUMN_KINDS, VALUE_DOMAINS)
+
+def row_values(table, row):
+    """按表的列顺序取出一行数据"""
+    return tuple(row[COLUMN_FIELDS.get(column, column)] for column in TABLE_COLUMNS[table])
+
+def column_store(table, rows=()):
+    """按列存储一张表（字段顺序同 TABLE_COLUMNS），rows 为行字典"""
+    store = ColumnStore([COLUMN_FIELDS.get(column, column) for column in TABLE_COLUMNS[table]],
+                        COLUMN_STORAGE.get(table))
+    store.extend(rows)
+    return store
+
+def table_rows(table, rows):
+    """按表的列顺序产出各行：ColumnStore 按列读取，字典列表逐行取值"""
+    if isinstance(rows, ColumnStore):
+        return rows.rows()
+    return (row_values(table, row) for row in rows)
+
+def user_id_of(index):
+    """用户序号（从0开始）-> 用户ID"""
+    return f"user_{index+1:05d}"
+
+def order_merchants(merchants):
+    """可以下单的商户：只选择活跃商户"""
+    active_merchants = [m for m in merchants if m['status'] == 'active']
+    if not active_merchants:
+        active_merchants = merchants[:10]  # 至少10个商户
+    return active_merchants
+
+def iter_users(start=0, end=None):
+    """逐个生成用户数据（可只生成 [start, end) 区间）；启用唯一值池时 openid、手机号按用户序号取值"""
+    pools = _string_pools
+    if pools is not None:
+        full_names = catalog()['full_names']
+        avatar_urls = catalog()['avatar_urls']
+    for i in range(start, NUM_USERS if end is None else end):
+        user_id = user_id_of(i)
+        if pools is None:
+            wechat_id = random_openid()
+            nickname = random_name()
+            avatar = random_avatar()
+            phone = random_phone() if random.random() > 0.3 else None  # 70%有手机号
+        else:
+            wechat_id = pools['openid'][i]
+            nickname = random.choice(full_names)
+            avatar = random.choice(avatar_urls)
+            phone = pools['phone'][i] if random.random() > 0.3 else None
         created_at = random_datetime(180)  # 过去6个月注册
         
-        users.append({
+        yield {
             'id': user_id,
             'wechat_id': wechat_id,
             'nickname': nickname,
             'avatar': avatar,
             'phone': phone,
             'created_at': created_at
-        })
-    
+        }
+
+def generate_users():
+    """生成用户数据（按列存储）"""
+    print(f"📊 生成 {NUM_USERS} 个用户...")
+    users = column_store('users', iter_users())
     print(f"✅ 生成 {len(users)} 个用户")
     return users
 
-def generate_merchants():
-    """生成商户数据"""
-    merchants = []
-    print(f"📊 生成 {NUM_MERCHANTS} 个商户...")
-    
-    merchant_list = []
-    for category, names in MERCHANT_TYPES.items():
-        for name in names:
-            merchant_list.append((category, name))
+def iter_merchants():
+    """逐个生成商户数据；启用唯一值池时商户编号、联系电话、营业执照号按商户序号取值"""
+    pools = _string_pools
+    categories = catalog()['merchant_categories']
+    names = catalog()['merchant_names']
+    cities = catalog()['cities']
+    full_names = catalog()['full_names']
     
-    selected_merchants = random.sample(merchant_list, NUM_MERCHANTS)
+    selected_merchants = random.sample(range(len(names)), NUM_MERCHANTS)  # 与按 (分类, 名称) 列表抽样结果相同
     
-    for i, (category, name) in enumerate(selected_merchants):
+    for i, index in enumerate(selected_merchants):
+        category = categories[index]
+        name = names[index]
         merchant_id = f"mch_{i+1:05d}"
-        city = random.choice(CITIES)
+        city = random.choice(cities)
         merchant_name = f"{city}{name}"
-        merchant_no = random_merchant_no()
-        contact_person = random_name()
-        contact_phone = random_phone()
-        business_license = random_business_license()
+        if pools is None:
+            merchant_no = random_merchant_no()
+            contact_person = random_name()
+            contact_phone = random_phone()
+            business_license = random_business_license()
+        else:
+            merchant_no = pools['merchant_no'][i]
+            contact_person = random.choice(full_names)
+            contact_phone = pools['contact_phone'][i]
+            business_license = pools['business_license'][i]
         status = random.choice(['active', 'active', 'active', 'inactive'])  # 75%活跃
         created_at = random_datetime(365)  # 过去1年
         
-        merchants.append({
+        yield {
             'id': merchant_id,
             'merchant_name': merchant_name,
             'merchant_no': merchant_no,
@@ -167,71 +542,87 @@ def generate_merchants():
             'business_license': business_license,
             'status': status,
             'merchant_category': category,
-            'created_at': created_at
-        })
-    
+            'created_at': created_at,
+            'city': city,  # 只用于统计，不写入数据库
+        }
+
+def generate_merchants():
+    """生成商户数据"""
+    print(f"📊 生成 {NUM_MERCHANTS} 个商户...")
+    merchants = list(iter_merchants())
     print(f"✅ 生成 {len(merchants)} 个商户")
     return merchants
 
-def generate_orders_and_points(users, merchants):
-    """生成订单和积分数据"""
-    orders = []
-    points_records = []
-    user_points_dict = {}
-    
-    total_orders = NUM_USERS * NUM_ORDERS_PER_USER
-    print(f"📊 生成约 {total_orders} 笔订单...")
+def iter_orders_and_points(user_ids, merchants, balances=None):
+    """
+    逐个生成订单和积分数据，产出 (表名, 行数据)
     
-    # 只选择活跃商户
-    active_merchants = [m for m in merchants if m['status'] == 'active']
-    if not active_merchants:
-        active_merchants = merchants[:10]  # 至少10个商户
+    外层按用户循环，一个用户的订单处理完后立即产出其 user_points 汇总，
+    因此只需保留当前用户的积分累计。
+    设置了事件模型时，用户的订单之后再产出扣回、兑换、过期积分记录；
+    balances（UserBalances，追加模式下为已有余额）提供兑换时可用的期初积分。
+    """
+    active_merchants = order_merchants(merchants)
+    merchant_table = alias_table(_merchant_dist, len(active_merchants))
+    wechat_pool = _string_pools['wechat_order_id'] if _string_pools is not None else None
     
-    for user in users:
-        user_id = user['id']
-        
+    for user_id in user_ids:
         # 初始化用户积分
-        user_points_dict[user_id] = {
+        user_points = {
+            'user_id': user_id,
             'available_points': 0,
             'total_earned': 0,
             'total_spent': 0
         }
         
-        # 每个用户生成1-4笔订单
-        num_orders = random.randint(1, 4)
+        # 每个用户生成1-4笔订单（幂律分布时少数用户订单极多）
+        num_orders = order_count()
+        clawbacks = []  # 事件模型：需要扣回积分的订单
+        last_active = ''
         
         for _ in range(num_orders):
             order_id = random_id('ord_')
-            merchant = random.choice(active_merchants)
+            if merchant_table is None:
+                merchant = random.choice(active_merchants)
+            else:
+                merchant = active_merchants[merchant_table.sample(random)]
             merchant_id = merchant['id']
             merchant_name = merchant['merchant_name']
             merchant_category = merchant['merchant_category']
             amount = random_amount()
             points_awarded = calculate_points(amount)
-            status = random.choice(['paid', 'paid', 'paid', 'cancelled'])  # 75%已支付
-            wechat_order_id = '4200' + ''.join(random.choices(string.digits, k=24))
+            status = random.choice(PAID_STATUS_CHOICES)  # PAID_RATIO 的订单已支付
+            paid = status == 'paid'
+            outcome = _events.paid_outcome(random) if paid and _events is not None else None
+            if outcome:
+                status = ORDER_STATUSES[outcome]  # 支付后退款/取消
+            if wechat_pool is None:
+                wechat_order_id = '4200' + ''.join(random.choices(string.digits, k=24))
+            else:
+                wechat_order_id = wechat_pool[_id_counter] if paid else None  # 按订单的ID计数取值
             
-            order_time = random_datetime(60)  # 过去2个月
-            paid_at = order_time if status == 'paid' else None
+            order_time = order_datetime(merchant_category)  # 过去2个月
+            paid_at = order_time if paid else None
+            last_active = max(last_active, order_time)
             
-            orders.append({
+            yield 'payment_orders', {
                 'id': order_id,
                 'user_id': user_id,
                 'merchant_id': merchant_id,
                 'merchant_name': merchant_name,
                 'merchant_category': merchant_category,
                 'amount': amount,
-                'points_awarded': points_awarded if status == 'paid' else 0,
+                'points_awarded': points_awarded if paid else 0,
                 'payment_method': 'wechat_pay',
                 'status': status,
-                'wechat_order_id': wechat_order_id if status == 'paid' else None,
+                'wechat_order_id': wechat_order_id if paid else None,
                 'paid_at': paid_at,
                 'created_at': order_time
-            })
+            }
             
             # 如果订单已支付，生成积分记录
-            if status == 'paid':
-                points_records.append({
+            if paid:
+                yield 'points_records', {
                     'id': random_id('pts_'),
                     'user_id': user_id,
                     'points_change': points_awarded,
@@ -241,159 +632,844 @@ def generate_orders_and_points(users, merchants):
                     'merchant_name': merchant_name,
                     'description': f"支付¥{amount/100:.2f}获得{points_awarded}积分",
                     'created_at': paid_at
-                })
+                }
                 
                 # 更新用户积分
-                user_points_dict[user_id]['available_points'] += points_awarded
-                user_points_dict[user_id]['total_earned'] += points_awarded
+                user_points['available_points'] += points_awarded
+                user_points['total_earned'] += points_awarded
+                if outcome:
+                    clawbacks.append((outcome, order_id, merchant_id, merchant_name, points_awarded, paid_at))
+        
+        if _events is not None:
+            opening = balances.get(user_index_of(user_id))[0] if balances is not None else 0
+            yield from iter_point_events(user_points, clawbacks, last_active, opening)
+        yield 'user_points', user_points
+
+def point_event_record(user_id, kind, points, when, order_id=None, merchant_id=None, merchant_name=None):
+    """扣除积分的记录（points_change 为负）"""
+    return {
+        'id': random_id('pts_'),
+        'user_id': user_id,
+        'points_change': -points,
+        'record_type': EVENT_RECORD_TYPES[kind],
+        'related_order_id': order_id,
+        'merchant_id': merchant_id,
+        'merchant_name': merchant_name,
+        'description': event_description(kind, points),
+        'created_at': when.strftime(TIME_FORMAT),
+    }
+
+def iter_point_events(user_points, clawbacks, last_active, opening=0):
+    """
+    一个用户的积分事件：先扣回退款/取消订单的积分（支付后），
+    再在最后一次活动之后兑换、过期；同时更新 user_points（扣除的积分计入 total_spent）
+    """
+    now = current_time()
+    user_id = user_points['user_id']
+    last = datetime.strptime(last_active, TIME_FORMAT)
+    for kind, order_id, merchant_id, merchant_name, points, paid_at in clawbacks:
+        when = _events.clawback_time(random, datetime.strptime(paid_at, TIME_FORMAT), now)
+        last = max(last, when)
+        user_points['available_points'] -= points
+        user_points['total_spent'] += points
+        yield 'points_records', point_event_record(user_id, kind, points, when, order_id, merchant_id, merchant_name)
     
-    print(f"✅ 生成 {len(orders)} 笔订单")
-    print(f"✅ 生成 {len(points_records)} 条积分记录")
+    available = opening + user_points['available_points']
+    for kind, points, when in _events.balance_events(random, available, last, now):
+        user_points['available_points'] -= points
+        user_points['total_spent'] += points
+        yield 'points_records', point_event_record(user_id, kind, points, when)
+
+def generate_orders_and_points(users, merchants, stats=None):
+    """生成订单和积分数据（按列存储，见 COLUMN_STORAGE）；stats 为 StatsAggregator 时同时累计统计"""
+    orders = column_store('payment_orders')
+    points_records = column_store('points_records')
+    user_points = column_store('user_points')
     
-    # 转换user_points_dict为列表
-    user_points = []
-    for user_id, points in user_points_dict.items():
-        user_points.append({
-            'user_id': user_id,
-            'available_points': points['available_points'],
-            'total_earned': points['total_earned'],
-            'total_spent': points['total_spent']
-        })
+    total_orders = NUM_USERS * NUM_ORDERS_PER_USER
+    print(f"📊 生成约 {total_orders} 笔订单...")
+    
+    collected = {
+        'payment_orders': orders,
+        'points_records': points_records,
+        'user_points': user_points,
+    }
+    for table, row in iter_orders_and_points(users.column('id'), merchants):
+        collected[table].append(row)
+        if stats is not None:
+            stats.add_row(table, row)
     
+    print(f"✅ 生成 {len(orders)} 笔订单")
+    print(f"✅ 生成 {len(points_records)} 条积分记录")
     print(f"✅ 生成 {len(user_points)} 个用户积分记录")
     
     return orders, points_records, user_points
 
 # ==================== 生成SQL ====================
 
-def generate_sql():
-    """生成SQL文件"""
+def set_stats_report(filename):
+    """设置统计报告JSON文件（所有生成模式结束时写出），None 表示不输出"""
+    global _stats_report
+    _stats_report = filename
+
+def set_output_options(compression=None, rotate_bytes=None):
+    """设置SQL输出的压缩方式和分卷大小（对 generate_sql / generate_sql_stream / generate_sql_append 生效）"""
+    global _compression, _rotate_bytes
+    _compression = compression
+    _rotate_bytes = rotate_bytes
+
+def set_partitioning(run_rows=None):
+    """
+    按月分区输出：分区表的行经外部排序（内存中每段 run_rows 行）按 (月份, 主键) 写出，
+    并输出分区DDL；None 表示按生成顺序输出（对流式、TSV、追加模式生效）
+    """
+    global _partition_run_rows
+    _partition_run_rows = run_rows
+
+def order_partitions():
+    """覆盖订单时间窗口（过去 ORDER_DAYS + 1 天）的按月分区，并预建下个月的分区"""
+    now = current_time()
+    return month_partitions(now - timedelta(days=ORDER_DAYS + 1), next_month(now))
+
+def partition_ddl_lines(previous_now=None):
+    """
+    分区DDL；未启用按月分区时为空
+    previous_now 为追加模式下上一次的时间基准：只从 MAXVALUE 分区拆出上一次没有建的月份
+    """
+    if _partition_run_rows is None:
+        return []
+    partitions = order_partitions()
+    lines = ["-- 按 created_at 按月分区（与生产环境一致）"]
+    if previous_now is None:
+        for table in PARTITION_TABLES:
+            lines += partition_ddl(table, partitions)
+    else:
+        covered = next_month(next_month(previous_now))  # 上一次建到 previous_now 的下个月
+        new_partitions = [(name, upper) for name, upper in partitions if upper and upper > covered]
+        if not new_partitions:
+            return []
+        for table in PARTITION_TABLES:
+            lines += add_partitions_ddl(table, new_partitions)
+    return lines
+
+def partitioned_writer(writer, directory):
+    """启用按月分区输出时包装写出器，分区表的行排序后在 close() 时写出（临时文件写在 directory）"""
+    if _partition_run_rows is None:
+        return writer
+    tables = {table: TABLE_COLUMNS[table] for table in PARTITION_TABLES}
+    return PartitionSorter(writer, tables, _partition_run_rows, directory)
+
+def open_sql_output(filename):
+    """打开SQL输出：默认为普通文本文件；指定压缩或分卷时为 RotatingOutput（结束时写清单）"""
+    if not _compression and not _rotate_bytes:
+        return open(filename, 'w', encoding='utf-8')
+    part_header = f"USE {DATABASE};\nSET FOREIGN_KEY_CHECKS = 0;\n\n"  # 第2个及以后的分卷文件头
+    return RotatingOutput(filename, _compression, _rotate_bytes, part_header)
+
+def print_output_files(f):
+    """压缩/分卷输出时打印分卷和清单"""
+    if isinstance(f, RotatingOutput):
+        for part in f.parts:
+            print(f"  📦 {part['file']}（{part['compressed_bytes'] / 1024 / 1024:.1f} MB）")
+        print(f"✅ 清单已生成: {f.manifest_path}（{len(f.parts)} 个文件）")
+
+def sql_header_lines():
+    """SQL文件头部：说明、选库、清空旧数据"""
+    return [
+        "-- ==========================================",
+        "-- 真实模拟数据 - 完全适配服务器表结构",
+        f"-- 生成时间: {current_time().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"-- 数据库: {DATABASE}",
+        "-- ==========================================\n",
+        f"USE {DATABASE};\n",
+        "-- 清空现有测试数据",
+        "SET FOREIGN_KEY_CHECKS = 0;",
+        *[f"TRUNCATE TABLE {table};" for table in TRUNCATE_TABLES],
+        "SET FOREIGN_KEY_CHECKS = 1;\n",
+    ]
+
+def sql_footer_lines():
+    """SQL文件尾部"""
+    return [
+        "\n-- ==========================================",
+        "-- 数据导入完成",
+        "-- ==========================================",
+    ]
+
+def generate_sql(filename=OUTPUT_FILE, batch_rows=None, commit_every=None):
+    """
+    生成SQL文件
+    
+    batch_rows: 每条INSERT语句的行数，默认每张表一条语句
+    commit_every: 每个显式事务包含的INSERT语句数，默认不写事务
+    """
     print("\n" + "="*60)
     print("🚀 开始生成测试数据")
     print("="*60 + "\n")
     
-    # 生成数据
+    # 生成数据（统计随生成增量累计）
+    stats = StatsAggregator()
     users = generate_users()
     merchants = generate_merchants()
-    orders, points_records, user_points = generate_orders_and_points(users, merchants)
+    for merchant in merchants:
+        stats.add_merchant(merchant)
+    orders, points_records, user_points = generate_orders_and_points(users, merchants, stats)
     
     # 生成SQL
     print(f"\n📝 生成SQL文件...")
     
-    sql_parts = []
+    with open_sql_output(filename) as f:
+        f.write('\n'.join(sql_header_lines()) + '\n')
+        writer = SQLBatchWriter(f, TABLE_COLUMNS, batch_rows, commit_every, column_kinds=COLUMN_KINDS)
+        
+        for table, rows, label in (
+            ('users', users, f"{len(users)} 个用户"),
+            ('merchants', merchants, f"{len(merchants)} 个商户"),
+            ('payment_orders', orders, f"{len(orders)} 笔订单"),
+            ('points_records', points_records, f"{len(points_records)} 条积分记录"),
+            ('user_points', user_points, f"{len(user_points)} 个用户积分"),
+        ):
+            writer.comment(f"插入 {label}")
+            writer.write_rows(table, table_rows(table, rows))
+            writer.flush(table)
+        writer.close()
+        
+        # SQL尾部
+        f.write('\n'.join(sql_footer_lines()))
     
-    # SQL头部
-    sql_parts.append("-- ==========================================")
-    sql_parts.append("-- 真实模拟数据 - 完全适配服务器表结构")
-    sql_parts.append(f"-- 生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    sql_parts.append("-- 数据库: points_app_dev")
-    sql_parts.append("-- ==========================================\n")
+    print(f"✅ SQL文件已生成: {filename}")
+    print_output_files(f)
     
-    sql_parts.append("USE points_app_dev;\n")
+    counts = {'users': len(users), 'merchants': len(merchants), 'payment_orders': len(orders),
+              'points_records': len(points_records), 'user_points': len(user_points)}
+    print_stream_summary(counts, stats)
+
+def merge_stream_stats(total, part):
+    """累加分片的各表行数"""
+    for key, value in part.items():
+        total[key] += value
+    return total
+
+def stream_users(writer, start=0, end=None):
+    """流式写出用户"""
+    for user in iter_users(start, end):
+        writer.write_row('users', row_values('users', user))
+    writer.finish('users')
+
+def stream_merchants(writer, merchants, stats):
+    """写出商户并统计状态"""
+    for merchant in merchants:
+        writer.write_row('merchants', row_values('merchants', merchant))
+        stats.add_merchant(merchant)
+    writer.finish('merchants')
+
+def stream_orders_and_points(writer, merchants, stats, start=0, end=None, engine='python', balances=None):
+    """
+    流式写出 [start, end) 用户的订单、积分记录和用户积分，并增量统计
     
-    sql_parts.append("-- 清空现有测试数据")
-    sql_parts.append("SET FOREIGN_KEY_CHECKS = 0;")
-    sql_parts.append("TRUNCATE TABLE points_records;")
-    sql_parts.append("TRUNCATE TABLE user_points;")
-    sql_parts.append("TRUNCATE TABLE payment_orders;")
-    sql_parts.append("TRUNCATE TABLE merchants;")
-    sql_parts.append("TRUNCATE TABLE users;")
-    sql_parts.append("SET FOREIGN_KEY_CHECKS = 1;\n")
+    engine 为 'numpy' 时使用向量化引擎整列生成；
+    balances 为已有积分余额（见 iter_orders_and_points），用于积分事件
+    """
+    end = NUM_USERS if end is None else end
+    stats.track_merchants(merchants)
+    if engine == 'numpy':
+        stream_orders_and_points_vector(writer, merchants, stats, start, end, balances)
+        return
     
-    # 插入用户
-    sql_parts.append(f"-- 插入 {len(users)} 个用户")
-    sql_parts.append("INSERT INTO users (id, wechat_id, nickname, avatar, phone, created_at) VALUES")
+    user_ids = (user_id_of(i) for i in range(start, end))
+    for table, row in iter_orders_and_points(user_ids, merchants, balances):
+        writer.write_row(table, row_values(table, row))
+        stats.add_row(table, row)
+
+def stream_orders_and_points_vector(writer, merchants, stats, start, end, balances=None):
+    """用 NumPy 向量化引擎按用户块生成订单和积分，整列写出（write_columns），统计由引擎按块汇总"""
+    from datagen.vector import VectorOrderEngine  # 用到时才导入（会导入 numpy）
+    active_merchants = order_merchants(merchants)
+    vector_engine = VectorOrderEngine(
+        active_merchants, AMOUNT_BUCKETS, PAID_RATIO, ORDERS_PER_USER, ORDER_DAYS,
+        current_time(), calculate_points, reserve_ids, seed=random.getrandbits(64),
+        id_generator=_id_generator, traffic=_traffic, order_count_table=_order_count_table,
+        merchant_table=alias_table(_merchant_dist, len(active_merchants)),
+        events=_events, event_record_types=EVENT_RECORD_TYPES, opening_balances=balances,
+        wechat_pool=_string_pools['wechat_order_id'] if _string_pools is not None else None, stats=stats)
+    for table, columns in vector_engine.iter_tables(start, end, user_id_of):
+        writer.write_columns(table, [columns[COLUMN_FIELDS.get(column, column)] for column in TABLE_COLUMNS[table]])
+
+def print_stream_summary(counts, stats):
+    """打印统计信息（counts 为各表行数，stats 为 StatsAggregator），并按需写出JSON报告"""
+    print("\n" + "="*60)
+    print("📊 数据统计")
+    print("="*60)
+    print(f"用户数量: {counts['users']}")
+    print(f"商户数量: {counts['merchants']}")
+    print(f"  - 活跃商户: {stats['merchants_active']}")
+    print(f"  - 禁用商户: {stats['merchants_inactive']}")
+    print(f"订单数量: {counts['payment_orders']}")
+    print(f"  - 已支付: {stats['orders_paid']}")
+    print(f"  - 已取消: {stats['orders_cancelled']}")
+    if stats['orders_refunded']:
+        print(f"  - 已退款: {stats['orders_refunded']}")
+    print(f"积分记录: {counts['points_records']}")
+    print(f"用户积分: {counts['user_points']}")
     
-    user_values = []
-    for user in users:
-        values = f"({sql_escape(user['id'])}, {sql_escape(user['wechat_id'])}, {sql_escape(user['nickname'])}, {sql_escape(user['avatar'])}, {sql_escape(user['phone'])}, {sql_escape(user['created_at'])})"
-        user_values.append(values)
+    print(f"\n总交易额: ¥{stats['total_amount']/100:.2f}")
+    print(f"总积分: {stats['total_points']}分")
+    if stats['points_spent']:
+        print(f"已消耗积分: {stats['points_spent']}分（兑换、扣回、过期）")
+    if stats['orders_paid']:
+        print(f"平均每单: ¥{stats['total_amount']/stats['orders_paid']/100:.2f}")
+    stats.write_report(_stats_report, counts)
     
-    sql_parts.append(',\n'.join(user_values) + ';\n')
+    print("\n" + "="*60)
+    print("✅ 完成！")
+    print("="*60)
+
+def generate_sql_stream(filename=OUTPUT_FILE, batch_rows=STREAM_BATCH_ROWS, commit_every=None, engine='python',
+                        state_file=None):
+    """
+    流式生成SQL文件
     
-    # 插入商户
-    sql_parts.append(f"-- 插入 {len(merchants)} 个商户")
-    sql_parts.append("INSERT INTO merchants (id, merchant_name, merchant_no, contact_person, contact_phone, business_license, status, business_category, created_at) VALUES")
+    边生成边写出，每张表按 batch_rows 行一批输出 INSERT 语句，
+    不在内存中保留用户、订单、积分记录，峰值内存与数据量无关。
+    随机数消耗顺序与 generate_sql() 相同，相同种子下数据一致
+    （engine='numpy' 时订单由向量化引擎生成，分布相同但数据不同）。
+    指定 state_file 时结束后保存状态文件，供 --append 继续生成。
+    """
+    print("\n" + "="*60)
+    print("🚀 开始流式生成测试数据")
+    print("="*60 + "\n")
     
-    merchant_values = []
-    for m in merchants:
-        values = f"({sql_escape(m['id'])}, {sql_escape(m['merchant_name'])}, {sql_escape(m['merchant_no'])}, {sql_escape(m['contact_person'])}, {sql_escape(m['contact_phone'])}, {sql_escape(m['business_license'])}, {sql_escape(m['status'])}, {sql_escape(m['merchant_category'])}, {sql_escape(m['created_at'])})"
-        merchant_values.append(values)
+    stats = StatsAggregator()
+    balances = UserBalances(NUM_USERS) if state_file else None
     
-    sql_parts.append(',\n'.join(merchant_values) + ';\n')
+    with open_sql_output(filename) as f:
+        f.write('\n'.join(sql_header_lines() + partition_ddl_lines()) + '\n')
+        writer = SQLBatchWriter(f, TABLE_COLUMNS, batch_rows, commit_every, column_kinds=COLUMN_KINDS)
+        writer = partitioned_writer(writer, os.path.dirname(os.path.abspath(filename)))
+        
+        print(f"📊 生成 {NUM_USERS} 个用户...")
+        stream_users(writer)
+        
+        # 商户数量很少，保留在内存中供订单选择
+        print(f"📊 生成 {NUM_MERCHANTS} 个商户...")
+        merchants = list(iter_merchants())
+        stream_merchants(writer, merchants, stats)
+        
+        print(f"📊 生成约 {NUM_USERS * NUM_ORDERS_PER_USER} 笔订单...")
+        stream_orders_and_points(record_balances(writer, balances), merchants, stats, engine=engine,
+                                 balances=balances)
+        writer.close()
+        
+        f.write('\n'.join(sql_footer_lines()))
     
-    # 插入订单
-    sql_parts.append(f"-- 插入 {len(orders)} 笔订单")
-    sql_parts.append("INSERT INTO payment_orders (id, user_id, merchant_id, merchant_name, merchant_category, amount, points_awarded, payment_method, status, wechat_order_id, paid_at, created_at) VALUES")
+    print(f"✅ SQL文件已生成: {filename}（{writer.statements} 条INSERT语句）")
+    print_output_files(f)
+    save_generator_state(state_file, merchants, balances)
+    print_stream_summary(writer.row_counts, stats)
+
+# ==================== 分片并行生成 ====================
+
+def generate_shard(task):
+    """
+    生成一个分片（在子进程中执行）
     
-    order_values = []
-    for o in orders:
-        values = f"({sql_escape(o['id'])}, {sql_escape(o['user_id'])}, {sql_escape(o['merchant_id'])}, {sql_escape(o['merchant_name'])}, {sql_escape(o['merchant_category'])}, {o['amount']}, {o['points_awarded']}, {sql_escape(o['payment_method'])}, {sql_escape(o['status'])}, {sql_escape(o['wechat_order_id'])}, {sql_escape(o['paid_at'])}, {sql_escape(o['created_at'])})"
-        order_values.append(values)
+    分片重置全局随机状态、ID计数器和时间基准，只生成 [start, end) 区间的用户
+    及其订单、积分记录，写入独立的分片文件。结果只由 task 决定。
+    返回 (各表行数, 统计, 写出的TSV文件)。
+    """
+    apply_settings(task['settings'])
+    reset_generator(task['seed'], task['now'], task['index'] * SHARD_ID_STRIDE)
+    set_id_strategy(task['id_strategy'])
+    set_traffic_profile(task['traffic'])
+    set_activity_distributions(task['orders_dist'], task['merchant_dist'])
+    set_event_model(task['events'])
+    set_string_pools(task['unique_pools'])
+    stats = StatsAggregator()
     
-    sql_parts.append(',\n'.join(order_values) + ';\n')
+    if task['format'] == 'tsv':
+        writer = TSVBulkWriter(task['directory'], TABLE_COLUMNS, f".part-{task['index']:04d}")
+        stream_users(writer, task['start'], task['end'])
+        stream_orders_and_points(writer, task['merchants'], stats, task['start'], task['end'], task['engine'])
+        writer.close()
+        return writer.row_counts, stats, writer.files
     
-    # 插入积分记录
-    sql_parts.append(f"-- 插入 {len(points_records)} 条积分记录")
-    sql_parts.append("INSERT INTO points_records (id, user_id, points_change, record_type, related_order_id, merchant_id, merchant_name, description, created_at) VALUES")
+    with open(task['filename'], 'w', encoding='utf-8') as f:
+        f.write(f"-- 分片 {task['index']}: user_{task['start']+1:05d} ~ user_{task['end']:05d}\n")
+        f.write(f"USE {DATABASE};\n\n")
+        writer = SQLBatchWriter(f, TABLE_COLUMNS, task['batch_rows'], task['commit_every'],
+                                column_kinds=COLUMN_KINDS)
+        stream_users(writer, task['start'], task['end'])
+        stream_orders_and_points(writer, task['merchants'], stats, task['start'], task['end'], task['engine'])
+        writer.close()
     
-    points_values = []
-    for p in points_records:
-        values = f"({sql_escape(p['id'])}, {sql_escape(p['user_id'])}, {p['points_change']}, {sql_escape(p['record_type'])}, {sql_escape(p['related_order_id'])}, {sql_escape(p['merchant_id'])}, {sql_escape(p['merchant_name'])}, {sql_escape(p['description'])}, {sql_escape(p['created_at'])})"
-        points_values.append(values)
+    return writer.row_counts, stats, {}
+
+def generate_sql_parallel(filename=OUTPUT_FILE, shards=4, workers=None, seed=None,
+                          now=None, batch_rows=STREAM_BATCH_ROWS, fmt='sql', commit_every=None,
+                          engine='python', id_strategy='legacy', traffic=None,
+                          orders_dist='uniform', merchant_dist='uniform', events=None):
+    """
+    分片并行生成SQL文件
     
-    sql_parts.append(',\n'.join(points_values) + ';\n')
+    分片文件 0 包含文件头（清空旧数据）和商户数据，需最先导入；
+    分片 1..N 各自包含一段用户及其订单、积分，可以按任意顺序并行导入。
+    相同的 seed 和 shards 下输出逐字节一致，与 workers 数量无关。
+    fmt 为 'tsv' 时各分片写 <表名>.part-NNNN.tsv，并生成统一的导入脚本。
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    now = now or datetime.strptime(REFERENCE_TIME, '%Y-%m-%d %H:%M:%S')
+    directory = bulk_directory(filename)
     
-    # 插入用户积分
-    sql_parts.append(f"-- 插入 {len(user_points)} 个用户积分")
-    sql_parts.append("INSERT INTO user_points (user_id, available_points, total_earned, total_spent) VALUES")
+    print("\n" + "="*60)
+    print(f"🚀 开始分片并行生成测试数据（{shards} 个分片，种子 {seed}）")
+    print("="*60 + "\n")
     
-    user_points_values = []
-    for up in user_points:
-        values = f"({sql_escape(up['user_id'])}, {up['available_points']}, {up['total_earned']}, {up['total_spent']})"
-        user_points_values.append(values)
+    # 商户由主进程生成，所有分片共享
+    reset_generator(derive_seed(seed, 'merchants'), now)
+    merchants = list(iter_merchants())
+    stats = StatsAggregator()
+    if fmt == 'tsv':
+        writer = TSVBulkWriter(directory, TABLE_COLUMNS, '.part-0000')
+        stream_merchants(writer, merchants, stats)
+        writer.close()
+        part_files = [writer.files]
+        print(f"✅ 分片文件已生成: {os.path.join(directory, writer.files['merchants'])}")
+    else:
+        header_file = part_filename(filename, 0)
+        with open(header_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(sql_header_lines()) + '\n')
+            writer = SQLBatchWriter(f, TABLE_COLUMNS, batch_rows, commit_every, column_kinds=COLUMN_KINDS)
+            stream_merchants(writer, merchants, stats)
+            writer.close()
+        print(f"✅ 分片文件已生成: {header_file}（{NUM_MERCHANTS} 个商户）")
+    counts = dict(writer.row_counts)
     
-    sql_parts.append(',\n'.join(user_points_values) + ';\n')
+    tasks = []
+    for index, (start, end) in enumerate(split_range(NUM_USERS, shards), start=1):
+        tasks.append({
+            'index': index,
+            'start': start,
+            'end': end,
+            'seed': derive_seed(seed, index),
+            'now': now,
+            'merchants': merchants,
+            'format': fmt,
+            'filename': part_filename(filename, index),
+            'directory': directory,
+            'batch_rows': batch_rows,
+            'commit_every': commit_every,
+            'engine': engine,
+            'id_strategy': id_strategy,
+            'traffic': traffic,
+            'orders_dist': orders_dist,
+            'merchant_dist': merchant_dist,
+            'events': events,
+            'unique_pools': _string_pools is not None,
+            'settings': _settings,
+        })
     
-    # SQL尾部
-    sql_parts.append("\n-- ==========================================")
-    sql_parts.append("-- 数据导入完成")
-    sql_parts.append("-- ==========================================")
+    print(f"📊 并行生成 {NUM_USERS} 个用户及其订单...")
+    for task, (part_counts, part_stats, files) in zip(tasks, run_shards(generate_shard, tasks, workers)):
+        if fmt == 'tsv':
+            part_files.append(files)
+            print(f"✅ 分片 {task['index']} 已生成（{part_counts['payment_orders']} 笔订单）")
+        else:
+            print(f"✅ 分片文件已生成: {task['filename']}（{part_counts['payment_orders']} 笔订单）")
+        merge_stream_stats(counts, part_counts)
+        stats.merge(part_stats)
     
-    sql_content = '\n'.join(sql_parts)
+    if fmt == 'tsv':
+        # 先按表、再按分片排列，保证父表先于子表导入
+        load_files = [(table, files[table]) for table in TABLE_COLUMNS for files in part_files if table in files]
+        load_script = os.path.join(directory, LOAD_SCRIPT)
+        write_load_script(load_script, DATABASE, TABLE_COLUMNS, load_files, TRUNCATE_TABLES)
+        print(f"✅ 导入脚本已生成: {load_script}")
     
-    # 写入文件
-    filename = 'insert_realistic_data.sql'
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(sql_content)
+    print_stream_summary(counts, stats)
+
+# ==================== 批量导入格式 ====================
+
+def bulk_directory(filename):
+    """TSV输出目录：insert_realistic_data.sql -> insert_realistic_data/"""
+    return os.path.splitext(filename)[0]
+
+def generate_bulk(filename=OUTPUT_FILE, engine='python', state_file=None):
+    """
+    流式生成TSV批量导入文件
     
-    print(f"✅ SQL文件已生成: {filename}")
+    每张表写一个 <表名>.tsv，并生成 load_data.sql（LOAD DATA LOCAL INFILE），
+    导入期间关闭 unique_checks / foreign_key_checks。
+    """
+    directory = bulk_directory(filename)
+    print("\n" + "="*60)
+    print(f"🚀 开始生成批量导入文件: {directory}/")
+    print("="*60 + "\n")
+    
+    stats = StatsAggregator()
+    balances = UserBalances(NUM_USERS) if state_file else None
+    writer = partitioned_writer(TSVBulkWriter(directory, TABLE_COLUMNS), directory)
+    
+    print(f"📊 生成 {NUM_USERS} 个用户...")
+    stream_users(writer)
+    
+    print(f"📊 生成 {NUM_MERCHANTS} 个商户...")
+    merchants = list(iter_merchants())
+    stream_merchants(writer, merchants, stats)
+    
+    print(f"📊 生成约 {NUM_USERS * NUM_ORDERS_PER_USER} 笔订单...")
+    stream_orders_and_points(record_balances(writer, balances), merchants, stats, engine=engine, balances=balances)
+    writer.close()
+    
+    load_script = os.path.join(directory, LOAD_SCRIPT)
+    load_files = [(table, writer.files[table]) for table in TABLE_COLUMNS if table in writer.files]
+    write_load_script(load_script, DATABASE, TABLE_COLUMNS, load_files, TRUNCATE_TABLES,
+                      partition_ddl_lines())
+    print(f"✅ 导入脚本已生成: {load_script}")
+    save_generator_state(state_file, merchants, balances)
+    print_stream_summary(writer.row_counts, stats)
+
+# ==================== 直接写入数据库 ====================
+
+def load_to_database(target, batch_rows=STREAM_BATCH_ROWS, pool_size=4, engine='python', state_file=None):
+    """
+    流式生成并直接写入数据库
     
-    # 统计信息
+    users、merchants 由各自的写入线程并发写入；payment_orders、points_records、
+    user_points 等父表全部提交后再写入。写入前清空相关表。
+    """
     print("\n" + "="*60)
-    print("📊 数据统计")
-    print("="*60)
-    print(f"用户数量: {len(users)}")
-    print(f"商户数量: {len(merchants)}")
-    print(f"  - 活跃商户: {len([m for m in merchants if m['status'] == 'active'])}")
-    print(f"  - 禁用商户: {len([m for m in merchants if m['status'] == 'inactive'])}")
-    print(f"订单数量: {len(orders)}")
-    print(f"  - 已支付: {len([o for o in orders if o['status'] == 'paid'])}")
-    print(f"  - 已取消: {len([o for o in orders if o['status'] == 'cancelled'])}")
-    print(f"积分记录: {len(points_records)}")
-    print(f"用户积分: {len(user_points)}")
-    
-    # 金额统计
-    total_amount = sum(o['amount'] for o in orders if o['status'] == 'paid')
-    total_points = sum(p['points_change'] for p in points_records)
-    
-    print(f"\n总交易额: ¥{total_amount/100:.2f}")
-    print(f"总积分: {total_points}分")
-    print(f"平均每单: ¥{total_amount/len([o for o in orders if o['status'] == 'paid'])/100:.2f}")
+    print(f"🚀 开始生成并写入数据库: {target.split('@')[-1]}")
+    print("="*60 + "\n")
+    
+    stats = StatsAggregator()
+    balances = UserBalances(NUM_USERS) if state_file else None
+    from datagen.loader import DatabaseWriter  # 只有直接写库时才导入（sqlite3、线程池等）
+    writer = DatabaseWriter(target, TABLE_COLUMNS, TABLE_PARENTS, batch_rows, pool_size, TRUNCATE_TABLES)
+    
+    print(f"📊 生成 {NUM_USERS} 个用户...")
+    stream_users(writer)
+    
+    print(f"📊 生成 {NUM_MERCHANTS} 个商户...")
+    merchants = list(iter_merchants())
+    stream_merchants(writer, merchants, stats)
+    
+    print(f"📊 生成约 {NUM_USERS * NUM_ORDERS_PER_USER} 笔订单...")
+    stream_orders_and_points(record_balances(writer, balances), merchants, stats, engine=engine, balances=balances)
+    writer.close()
+    
+    print("✅ 数据已写入数据库")
+    save_generator_state(state_file, merchants, balances)
+    print_stream_summary(writer.row_counts, stats)
+
+# ==================== 增量追加生成 ====================
+
+def user_index_of(user_id):
+    """用户ID -> 用户序号（user_id_of 的逆操作）"""
+    return int(user_id[5:]) - 1
+
+def record_balances(writer, balances):
+    """包装写出器，把写出的 user_points 累计到 balances；balances 为 None 时原样返回"""
+    if balances is None:
+        return writer
+    return BalanceRecorder(writer, balances, TABLE_COLUMNS['user_points'], user_index_of)
+
+def save_generator_state(state_file, merchants, balances):
+    """
+    保存生成结束时的状态：时间基准、ID计数器和策略、随机数状态、商户、每个用户的积分余额
+    state_file 为 None 时不保存
+    """
+    if not state_file:
+        return
+    save_state(state_file, {
+        'now': current_time().strftime('%Y-%m-%d %H:%M:%S'),
+        'id_counter': _id_counter,
+        'id_strategy': _id_strategy,
+        'random_state': encode_random_state(random.getstate()),
+        'num_users': len(balances),
+        'merchants': [
+            {key: m[key] for key in ('id', 'merchant_name', 'merchant_category', 'status', 'city') if key in m}
+            for m in merchants
+        ],
+        'balances': balances.to_json(),
+    })
+    print(f"💾 状态文件已保存: {state_file}")
+
+def restore_generator_state(state, now=None):
+    """
+    从状态恢复随机数、ID计数器、ID策略、时间基准和用户数，返回 (商户, 积分余额)
+    
+    时间基准默认顺延 ORDER_DAYS + 1 天，新订单落在上一批之后的时间窗口内。
+    """
+    global _id_counter, _fixed_now, NUM_USERS
+    random.setstate(decode_random_state(state['random_state']))
+    _id_counter = state['id_counter']
+    previous = datetime.strptime(state['now'], '%Y-%m-%d %H:%M:%S')
+    _fixed_now = now or previous + timedelta(days=ORDER_DAYS + 1)
+    NUM_USERS = state['num_users']
+    set_id_strategy(state['id_strategy'])
+    return state['merchants'], UserBalances.from_json(state['balances'])
+
+def append_header_lines(state_file):
+    """追加模式的SQL文件头部：不清空已有数据"""
+    return [
+        "-- ==========================================",
+        "-- 真实模拟数据 - 增量追加",
+        f"-- 生成时间: {current_time().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"-- 状态文件: {state_file}",
+        f"-- 数据库: {DATABASE}",
+        "-- ==========================================\n",
+        f"USE {DATABASE};\n",
+    ]
+
+def generate_sql_append(state_file, filename=OUTPUT_FILE, batch_rows=STREAM_BATCH_ROWS, commit_every=None,
+                        engine='python', now=None, save_to=None):
+    """
+    从状态文件继续生成（追加模式）
+    
+    不清空数据、不重复生成用户和商户，只为已有用户追加一轮订单和积分记录；
+    user_points 以 INSERT ... ON DUPLICATE KEY UPDATE 累加增量。
+    结束后把新状态写回 state_file（或 save_to），可以反复追加。
+    """
+    state = load_state(state_file)
+    merchants, balances = restore_generator_state(state, now)
     
     print("\n" + "="*60)
-    print("✅ 完成！")
-    print("="*60)
+    print(f"🚀 开始追加生成测试数据（{NUM_USERS} 个已有用户）")
+    print("="*60 + "\n")
+    
+    stats = StatsAggregator()
+    upserts = {'user_points': additive_upsert(BALANCE_FIELDS)}
+    
+    previous_now = datetime.strptime(state['now'], '%Y-%m-%d %H:%M:%S')
+    with open_sql_output(filename) as f:
+        f.write('\n'.join(append_header_lines(state_file) + partition_ddl_lines(previous_now)) + '\n')
+        writer = SQLBatchWriter(f, TABLE_COLUMNS, batch_rows, commit_every, upserts, COLUMN_KINDS)
+        writer = partitioned_writer(writer, os.path.dirname(os.path.abspath(filename)))
+        
+        print(f"📊 追加约 {NUM_USERS * NUM_ORDERS_PER_USER} 笔订单...")
+        stream_orders_and_points(record_balances(writer, balances), merchants, stats, engine=engine,
+                                 balances=balances)
+        writer.close()
+        
+        f.write('\n'.join(sql_footer_lines()))
+    
+    print(f"✅ SQL文件已生成: {filename}（{writer.statements} 条INSERT语句）")
+    print_output_files(f)
+    save_generator_state(save_to or state_file, merchants, balances)
+    print_stream_summary(writer.row_counts, stats)
+
+# ==================== 性能分析 ====================
+
+# 计入"生成"阶段的函数（写出器的转义、拼接、写出由 Instrumentation.wrap_writers() 包装）
+GENERATION_FUNCTIONS = ('iter_users', 'iter_merchants', 'iter_orders_and_points')
+
+def start_instrumentation(interval=PROGRESS_INTERVAL, engine='python'):
+    """包装生成函数和写出器，输出实时进度并统计各阶段耗时"""
+    instrumentation = Instrumentation(interval)
+    module = sys.modules[__name__]
+    for name in GENERATION_FUNCTIONS:
+        instrumentation.wrap(module, name, 'generation')
+    if engine == 'numpy':
+        from datagen.vector import VectorOrderEngine
+        instrumentation.wrap(VectorOrderEngine, 'iter_tables', 'generation')
+    instrumentation.wrap_writers()
+    return instrumentation
+
+def build_parser():
+    """命令行参数定义"""
+    parser = argparse.ArgumentParser(description=f'生成真实模拟数据SQL（{DATABASE}）')
+    parser.add_argument('--scenario', default=None,
+                        help=f'场景：{SCENARIO_DIR}/ 下的预置场景名（如 smoke、soak-50M、black-friday-peak）'
+                             f'或场景文件（.json / .toml / .yaml），提供数据规模、形态和命令行参数的默认值')
+    parser.add_argument('--users', type=int, default=None, help=f'用户数（默认 {NUM_USERS}）')
+    parser.add_argument('--merchants', type=int, default=None, help=f'商户数（默认 {NUM_MERCHANTS}）')
+    parser.add_argument('--points-rate', type=float, default=None,
+                        help=f'积分比例：每消费1元获得的积分（默认 {POINTS_RATE}）')
+    parser.add_argument('--stream', action=argparse.BooleanOptionalAction, default=False,
+                        help='流式生成：边生成边分批写出，内存占用恒定，适合大数据量')
+    parser.add_argument('--output', default=OUTPUT_FILE, help=f'输出文件（默认 {OUTPUT_FILE}）')
+    parser.add_argument('--format', choices=['sql', 'tsv'], default='sql',
+                        help='输出格式：sql 为INSERT语句；tsv 为每表一个TSV文件 + LOAD DATA 导入脚本'
+                             '（写入与输出文件同名的目录，始终流式生成）')
+    parser.add_argument('--batch-rows', type=int, default=None,
+                        help=f'每条INSERT语句的行数（默认：普通模式每表一条，流式/分片模式 {STREAM_BATCH_ROWS}）')
+    parser.add_argument('--commit-every', type=int, default=None,
+                        help='每 M 条INSERT语句包在一个显式事务中，并写 "-- @chunk N" 标记便于断点续导')
+    parser.add_argument('--compress', choices=COMPRESSIONS, default=None,
+                        help='边写边压缩SQL输出：gzip（.gz）或 zstd（.zst，需安装 zstandard）')
+    parser.add_argument('--rotate-mb', type=float, default=None,
+                        help='按未压缩大小分卷（MB）：写 .part-0001.sql[.gz] 等文件，并生成 .manifest.json 清单'
+                             '（各分卷行数、大小、sha256）')
+    parser.add_argument('--engine', choices=['python', 'numpy'], default='python',
+                        help='订单生成引擎：numpy 为向量化引擎（需安装 numpy，始终流式生成）')
+    parser.add_argument('--target', default=None,
+                        help='直接写入数据库，不生成文件：mysql://用户:密码@主机:端口/库名 或 sqlite:///文件.db（相对路径；绝对路径用 sqlite:////路径/文件.db）')
+    parser.add_argument('--pool-size', type=int, default=4, help='直接写库时的连接池大小（默认4）')
+    parser.add_argument('--id-strategy', choices=ID_STRATEGIES, default='legacy',
+                        help='订单/积分记录ID策略：legacy 原格式（28位）；snowflake 64位整数（约23位）；ulid 18位Base32 时间+计数（含前缀22位）')
+    parser.add_argument('--traffic', default='uniform',
+                        help='订单时间模型：uniform 均匀分布（默认）；realistic 午/晚高峰、周末和节假日峰值；'
+                             '或流量模型JSON文件路径（hourly / weekday / holidays / categories）')
+    parser.add_argument('--orders-dist', default='uniform',
+                        help=f'每用户订单数分布：uniform（默认 {ORDERS_PER_USER[0]}~{ORDERS_PER_USER[1]}）/ zipf:S / pareto:A，'
+                             f'幂律时上限 {MAX_ORDERS_PER_USER}，少数头部用户产生大部分订单')
+    parser.add_argument('--merchant-dist', default='uniform',
+                        help='商户热度分布：uniform（默认）/ zipf:S / pareto:A，靠前的商户最热')
+    parser.add_argument('--events', default='none',
+                        help='积分事件：none 只生成支付获得积分（默认）；default 按默认比例生成退款、支付后取消、'
+                             '兑换、过期；或 refund=0.03,cancel=0.02,redeem=0.4,expire=0.1 覆盖部分比例')
+    parser.add_argument('--save-state', default=None,
+                        help='生成结束后保存状态文件（ID计数器、随机数状态、商户、用户积分余额），供 --append 继续生成')
+    parser.add_argument('--append', metavar='STATE', default=None,
+                        help='追加模式：从状态文件继续，只生成新订单、积分记录和 user_points 增量'
+                             '（ON DUPLICATE KEY UPDATE），不清空数据；状态写回同一文件（或 --save-state）')
+    parser.add_argument('--stats-json', default=None,
+                        help='统计报告JSON文件：各表行数、订单/积分合计、按商户分类/城市/下单日期的直方图、'
+                             '金额精确分位数（生成时单遍累计，所有模式均可用）')
+    parser.add_argument('--unique-pools', action=argparse.BooleanOptionalAction, default=False,
+                        help='openid、手机号、商户编号、营业执照号、微信支付单号从唯一值池取值（保证不重复，且比逐行拼接快）')
+    parser.add_argument('--partition-by-month', action=argparse.BooleanOptionalAction, default=False,
+                        help='payment_orders、points_records 输出按月分区DDL，行按 (月份, 主键) 排序后写出（外部排序）')
+    parser.add_argument('--sort-run-rows', type=int, default=SORT_RUN_ROWS,
+                        help=f'--partition-by-month 外部排序时内存中每段的行数（默认 {SORT_RUN_ROWS}），超过时写入临时文件')
+    parser.add_argument('--schema', default=None,
+                        help=f'表结构定义（.sql 建表脚本或 .json 映射文件，逗号分隔；默认脚本目录下的 {",".join(SCHEMA_FILES)}），'
+                             '生成前检查写入的列和枚举值；none 跳过检查')
+    parser.add_argument('--progress', action=argparse.BooleanOptionalAction, default=False,
+                        help='输出按表的实时进度（行/秒），结束时打印生成/转义/拼接/写出各阶段耗时'
+                             '（分片模式下只统计主进程）')
+    parser.add_argument('--progress-interval', type=float, default=PROGRESS_INTERVAL,
+                        help=f'进度输出间隔秒数（默认 {PROGRESS_INTERVAL:g}）')
+    parser.add_argument('--profile', choices=PROFILE_MODES, default=None,
+                        help='性能采集：cprofile 写 pstats 文件；tracemalloc 写内存分配热点和峰值')
+    parser.add_argument('--profile-output', default=None,
+                        help='性能采集结果文件（默认 profile.prof / tracemalloc.txt）')
+    parser.add_argument('--shards', type=int, default=0,
+                        help='分片数：大于0时按用户分片并行生成，每个分片写一个 .part-NNNN 文件')
+    parser.add_argument('--workers', type=int, default=None, help='并行进程数（默认CPU核数）')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子：相同种子和分片数下输出一致')
+    parser.add_argument('--now', default=None,
+                        help=f'时间基准 YYYY-MM-DD HH:MM:SS，所有模式下生效（默认当前时间；指定种子或分片时默认 {REFERENCE_TIME}）')
+    return parser
+
+def load_generator_scenario(spec, parser=None):
+    """读取场景（预置场景名或文件路径），检查其中的设置项和命令行参数"""
+    parser = parser or build_parser()
+    directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), SCENARIO_DIR)
+    option_names = set(vars(parser.parse_known_args([])[0])) - {'scenario'}
+    return load_scenario(spec, directory, SCENARIO_SETTINGS, option_names, path_options=('traffic',))
+
+def parse_args(argv=None):
+    """
+    解析命令行参数
+
+    指定 --scenario 时场景中的 options 作为参数默认值（命令行上显式给出的优先，开关可用 --no-xxx 关闭），
+    settings 与 --users / --merchants / --points-rate 合并后由 apply_settings() 生效
+    """
+    parser = build_parser()
+    argv = sys.argv[1:] if argv is None else list(argv)
+    scenario = None
+    spec = parser.parse_known_args(argv)[0].scenario
+    if spec:
+        try:
+            scenario = load_generator_scenario(spec, parser)
+            apply_option_defaults(parser, scenario['options'])
+        except (ImportError, OSError, ValueError) as e:
+            parser.error(str(e))
+    args = parser.parse_args(argv)
+    args.scenario = scenario
+    settings = dict(scenario['settings']) if scenario else {}
+    for key in ('users', 'merchants', 'points_rate'):
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+    try:
+        apply_settings(settings)
+    except (TypeError, ValueError) as e:
+        parser.error(str(e))
+    if args.target and args.shards > 0:
+        parser.error('--target 不能与 --shards 同时使用')
+    if args.target:
+        from datagen.loader import open_backend
+        try:
+            open_backend(args.target)
+        except (ImportError, ValueError) as e:
+            parser.error(str(e))
+    if args.shards > 0 and (args.append or args.save_state):
+        parser.error('--append / --save-state 不能与 --shards 同时使用')
+    if (args.compress or args.rotate_mb) and (args.shards > 0 or args.target or args.format != 'sql'):
+        parser.error('--compress / --rotate-mb 只用于单个SQL文件输出，不能与 --shards / --target / --format tsv 同时使用')
+    if args.partition_by_month and (args.shards > 0 or args.target):
+        parser.error('--partition-by-month 只用于单进程的SQL/TSV文件输出，不能与 --shards / --target 同时使用')
+    if args.sort_run_rows < 1:
+        parser.error('--sort-run-rows 至少为1')
+    if args.now:
+        try:
+            datetime.strptime(args.now, '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            parser.error(f"--now 格式应为 YYYY-MM-DD HH:MM:SS: {args.now}")
+    if args.append and (args.target or args.format != 'sql' or args.seed is not None):
+        parser.error('--append 只支持SQL文件输出，且随机状态来自状态文件，不能指定 --target / --format tsv / --seed')
+    for spec in (args.orders_dist, args.merchant_dist):
+        try:
+            parse_distribution(spec)
+        except ValueError as e:
+            parser.error(str(e))
+    try:
+        args.events = parse_events(args.events)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.schema != 'none':
+        try:
+            check_table_schema(args.schema.split(',') if args.schema else None)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    return args
+
+def run(args):
+    """按命令行参数选择生成模式"""
+    if args.scenario:
+        print(f"📋 场景 {args.scenario['name']}: {args.scenario['description']}")
+    now = datetime.strptime(args.now, '%Y-%m-%d %H:%M:%S') if args.now else None
+    stream_batch_rows = args.batch_rows or STREAM_BATCH_ROWS
+    traffic = load_profile(args.traffic)
+    rotate_bytes = int(args.rotate_mb * 1024 * 1024) if args.rotate_mb else None
+    set_output_options(args.compress, rotate_bytes)
+    set_stats_report(args.stats_json)
+    set_string_pools(args.unique_pools)
+    set_partitioning(args.sort_run_rows if args.partition_by_month else None)
+    if args.shards > 0:
+        generate_sql_parallel(args.output, args.shards, args.workers, args.seed, now,
+                              stream_batch_rows, args.format, args.commit_every, args.engine,
+                              args.id_strategy, traffic, args.orders_dist, args.merchant_dist, args.events)
+    elif args.append:
+        set_traffic_profile(traffic)
+        set_activity_distributions(args.orders_dist, args.merchant_dist)
+        set_event_model(args.events)
+        generate_sql_append(args.append, args.output, stream_batch_rows, args.commit_every, args.engine,
+                            now, args.save_state)
+    else:
+        if args.seed is not None:
+            reset_generator(args.seed, now or datetime.strptime(REFERENCE_TIME, '%Y-%m-%d %H:%M:%S'))
+        elif now is not None:
+            set_fixed_now(now)
+        set_id_strategy(args.id_strategy)
+        set_traffic_profile(traffic)
+        set_activity_distributions(args.orders_dist, args.merchant_dist)
+        set_event_model(args.events)
+        if args.target:
+            load_to_database(args.target, stream_batch_rows, args.pool_size, args.engine, args.save_state)
+        elif args.format == 'tsv':
+            generate_bulk(args.output, args.engine, args.save_state)
+        elif args.stream or args.engine == 'numpy' or args.save_state or args.partition_by_month:
+            generate_sql_stream(args.output, stream_batch_rows, args.commit_every, args.engine, args.save_state)
+        else:
+            generate_sql(args.output, args.batch_rows, args.commit_every)
 
 if __name__ == '__main__':
-    generate_sql()
+    args = parse_args()
+    instrumentation = start_instrumentation(args.progress_interval, args.engine) if args.progress else None
+    with profiling(args.profile, args.profile_output):
+        run(args)
+    if instrumentation:
+        instrumentation.report()
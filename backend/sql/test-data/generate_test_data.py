@@ -5,13 +5,64 @@
 生成100组真实关联的测试数据
 """
 
+import argparse
+import os
 import random
 import datetime
 
+from datagen.bulk import TSVBulkWriter, write_load_script
+from datagen.catalog import Catalog
+from datagen.distributions import alias_table, parse_distribution
+from datagen.events import ORDER_STATUSES, TIME_FORMAT, PointsLedger, event_description, parse_events
+from datagen.output import COMPRESSION_SUFFIXES, COMPRESSIONS, RotatingOutput
+from datagen.schema import check_schema
+from datagen.shard import derive_seed, part_filename, run_shards, split_range
+from datagen.traffic import load_profile
+from datagen.writer import sql_value
+
 # 配置
 NUM_USERS = 100
 NUM_MERCHANTS = 20
 NUM_ORDERS = 200  # 平均每个用户2单
+OUTPUT_FILE = 'insert_merchants_orders_points.sql'
+LOAD_SCRIPT = 'load_data.sql'  # TSV格式的导入脚本文件名
+ORDER_WINDOW = (datetime.datetime(2025, 9, 1), datetime.datetime(2025, 10, 1))  # 订单时间范围（2025年9月）
+
+# 各表插入的列
+TABLE_COLUMNS = {
+    'merchants': ('id', 'merchant_name', 'mch_id', 'category', 'store_name', 'city', 'province', 'country', 'points_ratio', 'status', 'created_at', 'updated_at'),
+    'payment_orders': ('id', 'user_id', 'merchant_id', 'amount', 'points_earned', 'status', 'payment_method', 'transaction_id', 'created_at', 'updated_at'),
+    'point_records': ('id', 'user_id', 'type', 'points', 'order_id', 'description', 'created_at'),
+    'user_points': ('user_id', 'available_points', 'total_earned', 'total_spent', 'monthly_earned', 'updated_at'),
+}
+
+# 表依赖：直接写库时子表在父表全部提交后才开始写入
+TABLE_PARENTS = {
+    'payment_orders': ('merchants',),
+    'point_records': ('payment_orders',),
+    'user_points': ('payment_orders',),
+}
+
+# 各类积分事件的 point_records.type（支付获得积分为 earn）
+EVENT_RECORD_TYPES = {
+    'refund': 'adjust',
+    'cancel': 'adjust',
+    'redeem': 'spend',
+    'expire': 'expired',
+}
+
+# 重新生成前需要清空的表（用户数据来自 insert_test_data.sql，不清空）
+TRUNCATE_TABLES = ('point_records', 'user_points', 'payment_orders', 'merchants')
+
+# 表结构定义（相对本脚本目录）：仓库中没有 weixin_payment 的建表脚本，用映射文件描述（见 datagen.schema）
+SCHEMA_FILES = ('schema_weixin_payment.json',)
+
+# 脚本可能产出的枚举值，须在表结构的 ENUM 取值中
+VALUE_DOMAINS = {
+    ('merchants', 'status'): ('active',),
+    ('payment_orders', 'status'): ('completed', 'pending', *ORDER_STATUSES.values()),
+    ('point_records', 'type'): ('earn', *EVENT_RECORD_TYPES.values()),
+}
 
 # 真实的商户类型和名称
 MERCHANT_TYPES = {
@@ -31,39 +82,109 @@ CITIES = {
     '深圳': '广东省',
     '杭州': '浙江省'
 }
+CATALOG_NAME = 'weixin_payment'  # 目录缓存文件名前缀（见 datagen.catalog）
+
+_traffic = None  # 订单时间流量模型，None 表示原有的均匀分布
+_user_dist = 'uniform'  # 下单用户活跃度分布
+_merchant_dist = 'uniform'  # 商户热度分布
+_events = None  # 积分事件模型（datagen.events.EventModel），None 表示只生成支付获得积分
+_catalog = None  # 展开后的商户、城市目录（datagen.catalog.Catalog），第一次用到时创建
+
+def set_traffic_profile(profile):
+    """设置订单时间流量模型（datagen.traffic.TrafficProfile），None 恢复均匀分布"""
+    global _traffic
+    _traffic = profile
+
+def set_activity_distributions(user_dist='uniform', merchant_dist='uniform'):
+    """设置下单用户和商户的活跃度分布：uniform / zipf:S / pareto:A（编号靠前的最活跃）"""
+    global _user_dist, _merchant_dist
+    _user_dist = user_dist
+    _merchant_dist = merchant_dist
+
+def set_event_model(model):
+    """设置积分事件模型（退款、支付后取消、兑换、过期），None 表示只生成支付获得积分"""
+    global _events
+    _events = model
+
+def build_catalog(sources):
+    """由数据源展开目录的各表（目录缓存未命中时才调用）；商户按 mch_001 起的编号顺序"""
+    merchants = [(category, name) for category, names in sources['merchant_types'].items() for name in names]
+    return {
+        'merchant_categories': [category for category, _ in merchants],
+        'merchant_names': [name for _, name in merchants],
+        'cities': list(sources['cities']),
+        'provinces': list(sources['cities'].values()),
+    }
+
+def catalog():
+    """商户、城市目录：catalog()[表名] -> 字符串序列（与 generate_realistic_data.py 共用缓存目录）"""
+    global _catalog
+    if _catalog is None:
+        _catalog = Catalog(CATALOG_NAME, {'merchant_types': MERCHANT_TYPES, 'cities': CITIES}, build_catalog)
+    return _catalog
+
+def order_datetime(merchant_index):
+    """生成订单时间：设置了流量模型时按商户类别曲线在9月内抽样，否则9月每天8~22点均匀分布"""
+    if _traffic is None:
+        day = random.randint(1, 30)
+        hour = random.randint(8, 22)
+        minute = random.randint(0, 59)
+        return f"2025-09-{day:02d} {hour:02d}:{minute:02d}:00"
+    sampler = _traffic.sampler(*ORDER_WINDOW, catalog()['merchant_categories'][merchant_index - 1])
+    return sampler.sample(random).strftime('%Y-%m-%d %H:%M:00')
+
+def check_table_schema(paths=None):
+    """对照表结构检查写入的列和枚举值（paths 默认为 SCHEMA_FILES），不一致时抛出 datagen.schema.SchemaError"""
+    if paths is None:
+        base = os.path.dirname(os.path.abspath(__file__))
+        paths = [os.path.join(base, path) for path in SCHEMA_FILES]
+    check_schema(paths, TABLE_COLUMNS, value_domains=VALUE_DOMAINS)
+
+def sql_rows(rows):
+    """把行数据（元组）格式化为SQL VALUES 项"""
+    return ['(' + ', '.join(sql_value(v) for v in row) + ')' for row in rows]
 
 # 生成SQL文件
 def generate_merchants_sql():
-    """生成20个商户数据"""
+    """生成20个商户数据（每个商户一个元组，列顺序同 TABLE_COLUMNS['merchants']）"""
     merchants = []
-    merchant_id = 1
+    categories = catalog()['merchant_categories']
+    names = catalog()['merchant_names']
+    cities = catalog()['cities']
+    provinces = catalog()['provinces']
     
-    for category, names in MERCHANT_TYPES.items():
-        for name in names:
-            if merchant_id > NUM_MERCHANTS:
-                break
-            
-            # 随机选择城市
-            city = random.choice(list(CITIES.keys()))
-            province = CITIES[city]
-            
-            # 随机生成商户编号
-            mch_id = f"156{random.randint(100000, 999999)}"
-            
-            sql = f"""('mch_{merchant_id:03d}', '{name}', '{mch_id}', '{category}', '{city}{random.choice(['市中心店', '万达店', '购物中心店', '旗舰店'])}', '{city}', '{province}', '中国', '{random.randint(10, 50)}%', 'active', '2025-09-{random.randint(1, 28):02d} {random.randint(8, 18):02d}:00:00', '2025-09-30 12:00:00')"""
-            merchants.append(sql)
-            merchant_id += 1
-            
-            if merchant_id > NUM_MERCHANTS:
-                break
+    for index in range(min(NUM_MERCHANTS, len(names))):
+        merchant_id = index + 1
+        
+        # 随机选择城市（randrange 与 random.choice 的抽取方式相同）
+        city_index = random.randrange(len(cities))
+        city = cities[city_index]
+        province = provinces[city_index]
+        
+        # 随机生成商户编号
+        mch_id = f"156{random.randint(100000, 999999)}"
+        
+        merchants.append((
+            f"mch_{merchant_id:03d}", names[index], mch_id, categories[index],
+            f"{city}{random.choice(['市中心店', '万达店', '购物中心店', '旗舰店'])}",
+            city, province, '中国', f"{random.randint(10, 50)}%", 'active',
+            f"2025-09-{random.randint(1, 28):02d} {random.randint(8, 18):02d}:00:00",
+            '2025-09-30 12:00:00'
+        ))
     
     return merchants
 
-def generate_orders_and_points_sql():
-    """生成200个订单和对应的积分记录"""
+def generate_orders_and_points_sql(order_range=(0, NUM_ORDERS), user_range=(0, NUM_USERS)):
+    """
+    生成200个订单和对应的积分记录（行数据均为元组，列顺序同 TABLE_COLUMNS）
+    
+    order_range / user_range 用于分片：只生成区间内的订单，且只从区间内的用户中选择下单用户
+    用户积分记在按用户序号索引的 PointsLedger 中；设置了事件模型时，订单生成后
+    再为每个有积分的用户生成兑换、过期记录
+    """
     orders = []
     point_records = []
-    user_points = {}
+    ledger = PointsLedger(user_range[1] - user_range[0])
     
     # 支付金额范围（分）
     amounts = [
@@ -73,12 +194,23 @@ def generate_orders_and_points_sql():
         (10000, 50000, 0.05) # 100-500元，5%概率
     ]
     
-    for i in range(1, NUM_ORDERS + 1):
+    # 幂律分布的别名表（uniform 时为 None）
+    user_table = alias_table(_user_dist, user_range[1] - user_range[0])
+    merchant_table = alias_table(_merchant_dist, NUM_MERCHANTS)
+    
+    for i in range(order_range[0] + 1, order_range[1] + 1):
         # 随机选择用户
-        user_id = f"user_{random.randint(1, NUM_USERS):03d}"
+        if user_table is None:
+            user_id = f"user_{random.randint(user_range[0] + 1, user_range[1]):03d}"
+        else:
+            user_id = f"user_{user_range[0] + 1 + user_table.sample(random):03d}"
         
         # 随机选择商户
-        merchant_id = f"mch_{random.randint(1, NUM_MERCHANTS):03d}"
+        if merchant_table is None:
+            merchant_index = random.randint(1, NUM_MERCHANTS)
+        else:
+            merchant_index = 1 + merchant_table.sample(random)
+        merchant_id = f"mch_{merchant_index:03d}"
         
         # 根据概率选择金额
         rand = random.random()
@@ -97,47 +229,62 @@ def generate_orders_and_points_sql():
         points = amount // 100
         
         # 随机生成订单时间（2025年9月）
-        day = random.randint(1, 30)
-        hour = random.randint(8, 22)
-        minute = random.randint(0, 59)
-        order_time = f"2025-09-{day:02d} {hour:02d}:{minute:02d}:00"
+        order_time = order_datetime(merchant_index)
         
         # 订单状态（95%已完成，5%待支付）
         status = 'completed' if random.random() < 0.95 else 'pending'
+        completed = status == 'completed'
+        outcome = _events.paid_outcome(random) if completed and _events is not None else None
+        if outcome:
+            status = ORDER_STATUSES[outcome]  # 支付后退款/取消
         
-        # 生成订单SQL
-        order_sql = f"""('order_{i:06d}', '{user_id}', '{merchant_id}', {amount}, {points}, '{status}', 'wxpay', NULL, '{order_time}', '{order_time}')"""
-        orders.append(order_sql)
+        # 生成订单
+        orders.append((f"order_{i:06d}", user_id, merchant_id, amount, points, status, 'wxpay', None, order_time, order_time))
         
         # 如果订单已完成，生成积分记录
-        if status == 'completed':
-            point_record_sql = f"""('point_{i:06d}', '{user_id}', 'earn', {points}, 'order_{i:06d}', '支付订单获得积分', '{order_time}')"""
-            point_records.append(point_record_sql)
+        if completed:
+            point_records.append((f"point_{i:06d}", user_id, 'earn', points, f"order_{i:06d}", '支付订单获得积分', order_time))
             
             # 累计用户积分
-            if user_id not in user_points:
-                user_points[user_id] = {'earned': 0, 'spent': 0}
-            user_points[user_id]['earned'] += points
+            index = int(user_id[5:]) - 1 - user_range[0]
+            paid_at = datetime.datetime.strptime(order_time, TIME_FORMAT) if _events is not None else None
+            ledger.earn(index, points, paid_at)
+            if outcome:
+                # 扣回该订单发放的积分
+                when = _events.clawback_time(random, paid_at, ORDER_WINDOW[1])
+                point_records.append((f"point_{i:06d}_{outcome}", user_id, EVENT_RECORD_TYPES[outcome], -points,
+                                      f"order_{i:06d}", event_description(outcome, points), when.strftime(TIME_FORMAT)))
+                ledger.spend(index, points, when)
+    
+    # 兑换、过期：在用户最后一次活动之后
+    if _events is not None:
+        for index in ledger.active_users():
+            user_id = f"user_{user_range[0] + index + 1:03d}"
+            events = _events.balance_events(random, ledger.available(index), ledger.last_active_time(index),
+                                            ORDER_WINDOW[1])
+            for n, (kind, points, when) in enumerate(events, start=1):
+                point_records.append((f"point_{user_id}_{n}", user_id, EVENT_RECORD_TYPES[kind], -points, None,
+                                      event_description(kind, points), when.strftime(TIME_FORMAT)))
+                ledger.spend(index, points, when)
     
     # 生成用户积分汇总
-    user_points_sql = []
-    for user_id, points_data in user_points.items():
-        available = points_data['earned'] - points_data['spent']
-        total_earned = points_data['earned']
-        total_spent = points_data['spent']
+    user_points_rows = []
+    for index in ledger.active_users():
+        user_id = f"user_{user_range[0] + index + 1:03d}"
+        available, total_earned, total_spent = ledger.get(index)
         
         # 计算本月积分（假设本月是9月）
         monthly_earned = int(total_earned * random.uniform(0.2, 0.5))  # 本月占20-50%
         
         updated_time = f"2025-09-{random.randint(20, 30):02d} {random.randint(8, 22):02d}:{random.randint(0, 59):02d}:00"
         
-        points_sql = f"""('{user_id}', {available}, {total_earned}, {total_spent}, {monthly_earned}, '{updated_time}')"""
-        user_points_sql.append(points_sql)
+        user_points_rows.append((user_id, available, total_earned, total_spent, monthly_earned, updated_time))
     
-    return orders, point_records, user_points_sql
+    return orders, point_records, user_points_rows
 
 # 生成完整的SQL文件
-def generate_full_sql():
+def generate_full_sql(filename=OUTPUT_FILE, compression=None):
+    """生成完整SQL文件；compression 为 gzip / zstd 时边写边压缩并生成清单文件"""
     print("🚀 开始生成测试数据SQL...")
     
     # 生成商户
@@ -149,7 +296,7 @@ def generate_full_sql():
     orders, point_records, user_points = generate_orders_and_points_sql()
     
     # 写入SQL文件
-    sql_content = """-- ==========================================
+    sql_content = f"""-- ==========================================
 -- 商户、订单和积分数据
 -- 自动生成于 2025-09-30
 -- ==========================================
@@ -160,43 +307,43 @@ USE weixin_payment;
 -- 2. 插入20个商户数据
 -- ==========================================
 
-INSERT INTO merchants (id, merchant_name, mch_id, category, store_name, city, province, country, points_ratio, status, created_at, updated_at) VALUES
+INSERT INTO merchants ({', '.join(TABLE_COLUMNS['merchants'])}) VALUES
 """
     
-    sql_content += ',\n'.join(merchants) + ';\n\n'
+    sql_content += ',\n'.join(sql_rows(merchants)) + ';\n\n'
     sql_content += "SELECT '✅ 已插入20个商户数据' AS status;\n\n"
     
     # 订单数据
-    sql_content += """-- ==========================================
+    sql_content += f"""-- ==========================================
 -- 3. 插入200个支付订单
 -- ==========================================
 
-INSERT INTO payment_orders (id, user_id, merchant_id, amount, points_earned, status, payment_method, transaction_id, created_at, updated_at) VALUES
+INSERT INTO payment_orders ({', '.join(TABLE_COLUMNS['payment_orders'])}) VALUES
 """
     
-    sql_content += ',\n'.join(orders) + ';\n\n'
+    sql_content += ',\n'.join(sql_rows(orders)) + ';\n\n'
     sql_content += "SELECT '✅ 已插入200个支付订单' AS status;\n\n"
     
     # 积分记录
-    sql_content += """-- ==========================================
+    sql_content += f"""-- ==========================================
 -- 4. 插入积分记录
 -- ==========================================
 
-INSERT INTO point_records (id, user_id, type, points, order_id, description, created_at) VALUES
+INSERT INTO point_records ({', '.join(TABLE_COLUMNS['point_records'])}) VALUES
 """
     
-    sql_content += ',\n'.join(point_records) + ';\n\n'
+    sql_content += ',\n'.join(sql_rows(point_records)) + ';\n\n'
     sql_content += f"SELECT '✅ 已插入{len(point_records)}条积分记录' AS status;\n\n"
     
     # 用户积分汇总
-    sql_content += """-- ==========================================
+    sql_content += f"""-- ==========================================
 -- 5. 插入用户积分汇总
 -- ==========================================
 
-INSERT INTO user_points (user_id, available_points, total_earned, total_spent, monthly_earned, updated_at) VALUES
+INSERT INTO user_points ({', '.join(TABLE_COLUMNS['user_points'])}) VALUES
 """
     
-    sql_content += ',\n'.join(user_points) + ';\n\n'
+    sql_content += ',\n'.join(sql_rows(user_points)) + ';\n\n'
     sql_content += f"SELECT '✅ 已插入{len(user_points)}个用户的积分汇总' AS status;\n\n"
     
     # 生成统计信息
@@ -216,14 +363,264 @@ SELECT
 """
     
     # 保存文件
-    with open('insert_merchants_orders_points.sql', 'w', encoding='utf-8') as f:
-        f.write(sql_content)
+    if compression:
+        with RotatingOutput(filename, compression) as f:
+            f.write(sql_content)
+            f.boundary({'merchants': len(merchants), 'payment_orders': len(orders),
+                        'point_records': len(point_records), 'user_points': len(user_points)})
+        print(f"✅ 清单已生成：{f.manifest_path}")
+        filename += COMPRESSION_SUFFIXES[compression]
+    else:
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(sql_content)
     
-    print(f"✅ SQL文件已生成：insert_merchants_orders_points.sql")
+    print(f"✅ SQL文件已生成：{filename}")
     print(f"📊 商户数量：{len(merchants)}")
     print(f"📊 订单数量：{len(orders)}")
     print(f"📊 积分记录：{len(point_records)}")
     print(f"📊 用户积分：{len(user_points)}")
 
+# ==================== 分片并行生成 ====================
+
+def insert_statement(table, rows):
+    """单条INSERT语句；没有数据时返回空字符串"""
+    if not rows:
+        return ''
+    columns = ', '.join(TABLE_COLUMNS[table])
+    return f"INSERT INTO {table} ({columns}) VALUES\n" + ',\n'.join(sql_rows(rows)) + ';\n\n'
+
+def write_tables(task, tables):
+    """把分片数据写成SQL分片文件或TSV文件，返回写出的TSV文件"""
+    if task['format'] == 'tsv':
+        writer = TSVBulkWriter(task['directory'], TABLE_COLUMNS, f".part-{task['index']:04d}")
+        for table, rows in tables:
+            writer.write_rows(table, rows)
+        writer.close()
+        return writer.files
+    
+    with open(task['filename'], 'w', encoding='utf-8') as f:
+        f.write(task['comment'])
+        f.write("USE weixin_payment;\n\n")
+        for table, rows in tables:
+            f.write(insert_statement(table, rows))
+    return {}
+
+def generate_shard(task):
+    """
+    生成一个分片（在子进程中执行）
+    
+    使用分片种子重置随机状态，只生成分片区间内的订单；订单编号按全局序号生成，
+    分片之间互不重叠，用户积分汇总只涉及分片内的用户。
+    """
+    random.seed(task['seed'])
+    set_traffic_profile(task['traffic'])
+    set_activity_distributions(task['user_dist'], task['merchant_dist'])
+    set_event_model(task['events'])
+    orders, point_records, user_points = generate_orders_and_points_sql(
+        task['order_range'], task['user_range'])
+    files = write_tables(task, [
+        ('payment_orders', orders),
+        ('point_records', point_records),
+        ('user_points', user_points),
+    ])
+    return (len(orders), len(point_records), len(user_points)), files
+
+def generate_full_sql_parallel(filename=OUTPUT_FILE, shards=4, workers=None, seed=None, fmt='sql', traffic=None,
+                               user_dist='uniform', merchant_dist='uniform', events=None):
+    """
+    分片并行生成SQL文件
+    
+    分片文件 0 包含商户数据，需最先导入；分片 1..N 各自包含一段用户的订单、
+    积分记录和积分汇总，可并行导入。相同的 seed 和 shards 下输出逐字节一致。
+    fmt 为 'tsv' 时各分片写 <表名>.part-NNNN.tsv，并生成统一的导入脚本。
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    directory = bulk_directory(filename)
+    print(f"🚀 开始分片并行生成测试数据SQL（{shards} 个分片，种子 {seed}）...")
+    
+    random.seed(derive_seed(seed, 'merchants'))
+    merchants = generate_merchants_sql()
+    header = {
+        'index': 0,
+        'format': fmt,
+        'filename': part_filename(filename, 0),
+        'directory': directory,
+        'comment': "-- 分片 0: 商户\n",
+    }
+    part_files = [write_tables(header, [('merchants', merchants)])]
+    
+    tasks = []
+    shard_ranges = zip(split_range(NUM_ORDERS, shards), split_range(NUM_USERS, shards))
+    for index, (order_range, user_range) in enumerate(shard_ranges, start=1):
+        tasks.append({
+            'index': index,
+            'seed': derive_seed(seed, index),
+            'order_range': order_range,
+            'user_range': user_range,
+            'format': fmt,
+            'filename': part_filename(filename, index),
+            'directory': directory,
+            'comment': f"-- 分片 {index}: 订单 {order_range[0]+1} ~ {order_range[1]}\n",
+            'traffic': traffic,
+            'user_dist': user_dist,
+            'merchant_dist': merchant_dist,
+            'events': events,
+        })
+    
+    totals = [0, 0, 0]
+    for task, (counts, files) in zip(tasks, run_shards(generate_shard, tasks, workers)):
+        part_files.append(files)
+        totals = [a + b for a, b in zip(totals, counts)]
+    
+    if fmt == 'tsv':
+        # 先按表、再按分片排列
+        load_files = [(table, files[table]) for table in TABLE_COLUMNS for files in part_files if table in files]
+        load_script = os.path.join(directory, LOAD_SCRIPT)
+        write_load_script(load_script, 'weixin_payment', TABLE_COLUMNS, load_files, TRUNCATE_TABLES)
+        print(f"✅ TSV文件和导入脚本已生成：{directory}/")
+    else:
+        for task in [header] + tasks:
+            print(f"✅ SQL文件已生成：{task['filename']}")
+    
+    print(f"📊 商户数量：{len(merchants)}")
+    print(f"📊 订单数量：{totals[0]}")
+    print(f"📊 积分记录：{totals[1]}")
+    print(f"📊 用户积分：{totals[2]}")
+
+# ==================== 批量导入格式 ====================
+
+def bulk_directory(filename):
+    """TSV输出目录：insert_merchants_orders_points.sql -> insert_merchants_orders_points/"""
+    return os.path.splitext(filename)[0]
+
+def generate_full_bulk(filename=OUTPUT_FILE):
+    """
+    生成TSV批量导入文件
+    
+    每张表写一个 <表名>.tsv，并生成 load_data.sql（LOAD DATA LOCAL INFILE），
+    导入期间关闭 unique_checks / foreign_key_checks。
+    """
+    directory = bulk_directory(filename)
+    print(f"🚀 开始生成批量导入文件：{directory}/")
+    
+    merchants = generate_merchants_sql()
+    orders, point_records, user_points = generate_orders_and_points_sql()
+    
+    writer = TSVBulkWriter(directory, TABLE_COLUMNS)
+    writer.write_rows('merchants', merchants)
+    writer.write_rows('payment_orders', orders)
+    writer.write_rows('point_records', point_records)
+    writer.write_rows('user_points', user_points)
+    writer.close()
+    
+    load_script = os.path.join(directory, LOAD_SCRIPT)
+    load_files = [(table, writer.files[table]) for table in TABLE_COLUMNS if table in writer.files]
+    write_load_script(load_script, 'weixin_payment', TABLE_COLUMNS, load_files, TRUNCATE_TABLES)
+    
+    print(f"✅ 导入脚本已生成：{load_script}")
+    print(f"📊 商户数量：{len(merchants)}")
+    print(f"📊 订单数量：{len(orders)}")
+    print(f"📊 积分记录：{len(point_records)}")
+    print(f"📊 用户积分：{len(user_points)}")
+
+# ==================== 直接写入数据库 ====================
+
+def load_full_to_database(target, batch_rows=1000, pool_size=4):
+    """生成数据并直接写入数据库（父表提交后再写依赖表），写入前清空相关表"""
+    print(f"🚀 开始生成并写入数据库：{target.split('@')[-1]}")
+    
+    merchants = generate_merchants_sql()
+    orders, point_records, user_points = generate_orders_and_points_sql()
+    
+    from datagen.loader import DatabaseWriter  # 只有直接写库时才导入（sqlite3、线程池等）
+    writer = DatabaseWriter(target, TABLE_COLUMNS, TABLE_PARENTS, batch_rows, pool_size, TRUNCATE_TABLES)
+    for table, rows in (
+        ('merchants', merchants),
+        ('payment_orders', orders),
+        ('point_records', point_records),
+        ('user_points', user_points),
+    ):
+        writer.write_rows(table, rows)
+        writer.finish(table)
+    writer.close()
+    
+    print("✅ 数据已写入数据库")
+    print(f"📊 商户数量：{len(merchants)}")
+    print(f"📊 订单数量：{len(orders)}")
+    print(f"📊 积分记录：{len(point_records)}")
+    print(f"📊 用户积分：{len(user_points)}")
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='生成商户、订单和积分测试数据SQL（weixin_payment）')
+    parser.add_argument('--output', default=OUTPUT_FILE, help=f'输出文件（默认 {OUTPUT_FILE}）')
+    parser.add_argument('--format', choices=['sql', 'tsv'], default='sql',
+                        help='输出格式：sql 为INSERT语句；tsv 为每表一个TSV文件 + LOAD DATA 导入脚本'
+                             '（写入与输出文件同名的目录）')
+    parser.add_argument('--compress', choices=COMPRESSIONS, default=None,
+                        help='压缩SQL输出：gzip（.gz）或 zstd（.zst，需安装 zstandard），同时生成 .manifest.json 清单')
+    parser.add_argument('--target', default=None,
+                        help='直接写入数据库，不生成文件：mysql://用户:密码@主机:端口/库名 或 sqlite:///文件.db（相对路径；绝对路径用 sqlite:////路径/文件.db）')
+    parser.add_argument('--traffic', default='uniform',
+                        help='订单时间模型：uniform 每天8~22点均匀分布（默认）；realistic 午/晚高峰、周末峰值；'
+                             '或流量模型JSON文件路径')
+    parser.add_argument('--user-dist', default='uniform',
+                        help='下单用户活跃度分布：uniform（默认）/ zipf:S / pareto:A，编号靠前的用户下单最多')
+    parser.add_argument('--merchant-dist', default='uniform',
+                        help='商户热度分布：uniform（默认）/ zipf:S / pareto:A，编号靠前的商户最热')
+    parser.add_argument('--events', default='none',
+                        help='积分事件：none 只生成支付获得积分（默认）；default 按默认比例生成退款、支付后取消、'
+                             '兑换、过期；或 refund=0.03,cancel=0.02,redeem=0.4,expire=0.1 覆盖部分比例')
+    parser.add_argument('--schema', default=None,
+                        help=f'表结构定义（.sql 建表脚本或 .json 映射文件，逗号分隔；默认脚本目录下的 {",".join(SCHEMA_FILES)}），'
+                             '生成前检查写入的列和枚举值；none 跳过检查')
+    parser.add_argument('--shards', type=int, default=0,
+                        help='分片数：大于0时按用户分片并行生成，每个分片写一个 .part-NNNN 文件')
+    parser.add_argument('--workers', type=int, default=None, help='并行进程数（默认CPU核数）')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子：相同种子和分片数下输出一致')
+    args = parser.parse_args()
+    if args.target and args.shards > 0:
+        parser.error('--target 不能与 --shards 同时使用')
+    if args.target:
+        from datagen.loader import open_backend
+        try:
+            open_backend(args.target)
+        except (ImportError, ValueError) as e:
+            parser.error(str(e))
+    if args.compress and (args.shards > 0 or args.target or args.format != 'sql'):
+        parser.error('--compress 只用于单个SQL文件输出，不能与 --shards / --target / --format tsv 同时使用')
+    for spec in (args.user_dist, args.merchant_dist):
+        try:
+            parse_distribution(spec)
+        except ValueError as e:
+            parser.error(str(e))
+    try:
+        args.events = parse_events(args.events)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.schema != 'none':
+        try:
+            check_table_schema(args.schema.split(',') if args.schema else None)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    return args
+
 if __name__ == '__main__':
-    generate_full_sql()
+    args = parse_args()
+    traffic = load_profile(args.traffic)
+    if args.shards > 0:
+        generate_full_sql_parallel(args.output, args.shards, args.workers, args.seed, args.format, traffic,
+                                   args.user_dist, args.merchant_dist, args.events)
+    else:
+        set_traffic_profile(traffic)
+        set_activity_distributions(args.user_dist, args.merchant_dist)
+        set_event_model(args.events)
+        if args.seed is not None:
+            random.seed(args.seed)
+        if args.target:
+            load_full_to_database(args.target)
+        elif args.format == 'tsv':
+            generate_full_bulk(args.output)
+        else:
+            generate_full_sql(args.output, args.compress)
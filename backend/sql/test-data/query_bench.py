@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+查询负载与索引基准
+在已导入 generate_realistic_data.py 数据的库（MySQL，或 --target sqlite:///... 写入的 SQLite 替身）上，
+按后端接口的访问模式（用户订单列表、按用户和类型的积分记录、商户按日收入等）执行参数化查询组合，
+报告每个查询的延迟分位数、返回行数、扫描量和执行计划。
+
+--indexes 在基准前临时加上一组索引（如 composite_indexes.sql），结束后删除，
+配合 --baseline 与不加索引的结果对比，用数据评估复合索引、分区等改动。
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+from datetime import datetime
+
+from datagen.loader import open_backend
+from datagen.replay import PERCENTILES
+from datagen.schema import parse_indexes
+from datagen.workload import (QUERIES, KeySampler, drop_index_statement, execute_statements, existing_tables,
+                              open_probe, parse_mix, read_statements, run_workload, schema_index_statements)
+
+# ==================== 配置 ====================
+DEFAULT_QUERIES = 2000  # 计入结果的查询数
+DEFAULT_WARMUP = 200  # 预热查询数（不计入结果）
+OUTPUT_FILE = 'query_bench.json'
+SCHEMA_FILE = '../create_all_tables.sql'  # SQLite 替身按其中的二级索引建索引（相对本脚本目录）
+
+# ==================== 报告 ====================
+
+def print_report(results, unit):
+    """打印按查询的延迟分位数（毫秒）、平均返回行数和扫描量"""
+    print("\n" + "="*60)
+    print("📊 查询基准结果")
+    print("="*60)
+    header = f"{'查询':<24}{'次数':>7}{'均值':>9}" + ''.join(f"{'p%g' % p:>9}" for p in PERCENTILES)
+    print(header + f"{'返回行':>9}{unit:>12}  （毫秒）")
+    for name, r in results.items():
+        line = f"{name:<24}{r['count']:>7}{r['mean']:>9.2f}" + ''.join(f"{r[f'p{p:g}']:>9.2f}" for p in PERCENTILES)
+        print(line + f"{r['rows']:>9.1f}{r['examined']:>12,.0f}")
+    print("\n执行计划:")
+    for name, r in results.items():
+        print(f"  {name:<24}{r['plan']}")
+
+def compare_with_baseline(results, baseline):
+    """与基线对比 p50 / p99 和扫描量的变化"""
+    previous = baseline.get('results', {})
+    print("\n📊 与基线对比（负数为改善）")
+    for name, r in results.items():
+        base = previous.get(name)
+        if base is None:
+            continue
+        changes = []
+        for key, label in (('p50', 'p50'), ('p99', 'p99'), ('examined', '扫描量')):
+            if base.get(key):
+                change = r[key] / base[key] - 1
+                r[f"{key}_change"] = round(change, 4)
+                changes.append(f"{label} {change:+.1%}")
+        print(f"  {name:<24}{'，'.join(changes)}")
+        if base.get('plan') != r['plan']:
+            print(f"  {'':<24}计划: {base.get('plan')} -> {r['plan']}")
+
+# ==================== 命令行 ====================
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='在已导入的数据上运行接口查询组合，统计延迟、扫描量和执行计划')
+    parser.add_argument('--target', required=True,
+                        help='数据库：mysql://用户:密码@主机:端口/库名 或 sqlite:///文件.db（相对路径；绝对路径用 sqlite:////路径/文件.db）（generate_realistic_data.py --target 写入的库）')
+    parser.add_argument('--queries', type=int, default=DEFAULT_QUERIES, help=f'计入结果的查询数（默认 {DEFAULT_QUERIES}）')
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help=f'预热查询数（默认 {DEFAULT_WARMUP}）')
+    parser.add_argument('--mix', default='default',
+                        help=f"查询组合：default 默认权重；或 user_orders=0.5,points_history=0.5 只运行列出的查询"
+                             f"（可选 {', '.join(QUERIES)}）")
+    parser.add_argument('--indexes', default=None,
+                        help='基准前执行的索引语句文件（如 composite_indexes.sql），其中的 CREATE INDEX 在结束后删除')
+    parser.add_argument('--keep-indexes', action='store_true', help='结束后保留 --indexes 建的索引')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子（参数抽样和查询顺序）')
+    parser.add_argument('--output', default=OUTPUT_FILE, help=f'结果JSON文件（默认 {OUTPUT_FILE}）')
+    parser.add_argument('--baseline', default=None, help='基线JSON文件：打印各查询延迟和扫描量的变化')
+    args = parser.parse_args()
+    if args.queries < 1 or args.warmup < 0:
+        parser.error('--queries 至少为1，--warmup 不能为负')
+    try:
+        args.mix = parse_mix(args.mix)
+        open_backend(args.target)
+    except (ImportError, ValueError) as e:
+        parser.error(str(e))
+    return args
+
+def prepare_indexes(args, backend, conn, drops):
+    """
+    准备索引，结束后要执行的 DROP INDEX 语句追加到 drops（中途出错时已建的索引也能删除）
+
+    SQLite 替身导入时只建了表，先按建表脚本补上二级索引（与服务器一致），再执行 --indexes 中的语句
+    """
+    sqlite = backend.placeholder == '?'
+    if sqlite:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), SCHEMA_FILE), encoding='utf-8') as f:
+            indexes = parse_indexes(f.read())
+        execute_statements(conn, schema_index_statements(indexes, existing_tables(backend, conn)))
+    if args.indexes:
+        statements = read_statements(args.indexes)
+        print(f"🔧 执行 {args.indexes} 中的 {len(statements)} 条语句...")
+        for statement in statements:
+            execute_statements(conn, [statement])
+            drop = drop_index_statement(backend, statement)
+            if drop and not args.keep_indexes:
+                drops.append(drop)
+    if sqlite:
+        execute_statements(conn, ['ANALYZE'])  # 更新统计信息，查询规划器才会按数据分布选择索引
+
+def run(args, backend, conn):
+    """抽样参数并执行查询组合，返回 (结果, 扫描量单位)"""
+    rng = random.Random(args.seed)
+    print("🎲 抽样查询参数...")
+    sampler = KeySampler(backend, conn, rng)
+    empty = sampler.empty_sources()
+    if empty:
+        sys.exit(f"❌ 没有可用的数据: {', '.join(empty)}（先用 generate_realistic_data.py --target 导入数据）")
+    probe = open_probe(backend, conn)
+    print(f"🚀 执行 {args.queries} 条查询（预热 {args.warmup} 条）...")
+    return run_workload(backend, probe, sampler, args.mix, args.queries, args.warmup, rng), probe.unit
+
+if __name__ == '__main__':
+    args = parse_args()
+    backend = open_backend(args.target)
+    conn = backend.connect()
+
+    print("\n" + "="*60)
+    print(f"🚀 查询基准：{args.target.split('@')[-1]}")
+    print("="*60)
+    drops = []
+    try:
+        prepare_indexes(args, backend, conn, drops)
+        results, unit = run(args, backend, conn)
+    finally:
+        if drops:
+            print(f"🧹 删除 {len(drops)} 个临时索引")
+            execute_statements(conn, drops)
+        conn.close()
+
+    print_report(results, unit)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare_with_baseline(results, json.load(f))
+
+    report = {
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'target': args.target.split('@')[-1],
+        'indexes': args.indexes,
+        'queries': args.queries,
+        'examined_unit': unit,
+        'mix': args.mix,
+        'baseline': args.baseline,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 结果已保存: {args.output}")
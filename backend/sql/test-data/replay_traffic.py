@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+接口流量回放
+用 generate_realistic_data.py 的用户、商户、金额和订单状态模型生成订单，按时间表回放为
+对 Node 后端支付/积分接口（backend/routes/payments.js、points.js）的HTTP请求，
+测端到端吞吐和延迟分位数，而不只是数据库写入。
+
+每笔订单是一个会话：创建订单 ->（已支付订单）模拟支付成功 -> 按比例查询订单、积分余额、积分记录。
+相同 --seed 下商户与 generate_realistic_data.py --seed 生成的一致，可先导入同种子的数据再回放。
+--stub 启动内存中的替身服务，不需要后端和数据库。
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+from datetime import datetime, timedelta
+
+import generate_realistic_data as gen
+from datagen.replay import ARRIVALS, DEFAULT_BASE_URL, MODES, PERCENTILES, REQUEST_TIMEOUT, percentile, replay
+from datagen.stub_server import StubBackend, start_stub_server
+
+# ==================== 配置 ====================
+DEFAULT_ORDERS = 1000  # 回放的订单会话数
+DEFAULT_QPS = 50.0  # 开环目标速率（会话/秒）
+DEFAULT_CONCURRENCY = 32  # 同时执行的会话数上限
+QUERY_RATIO = 0.3  # 支付后查询订单结果的比例
+BALANCE_RATIO = 0.5  # 会话结束时查询积分余额的比例
+HISTORY_RATIO = 0.1  # 会话结束时查询积分记录的比例
+RATE_WARNING = 0.9  # 开环实际速率低于目标的90%时提示客户端或后端跟不上
+
+# ==================== 会话 ====================
+
+def build_sessions(count, seed, query_ratio=QUERY_RATIO, balance_ratio=BALANCE_RATIO, history_ratio=HISTORY_RATIO):
+    """
+    生成 count 个订单会话，返回 (会话列表, 商户列表)
+
+    随机数消耗顺序同 generate_realistic_data.py（用户 -> 商户 -> 订单），商户ID和状态与同种子生成的数据一致。
+    生成的订单不足 count 时循环使用，每一轮的订单时间顺延，保持 replay 到达模型的时间形状。
+    """
+    gen.reset_generator(seed, datetime.strptime(gen.REFERENCE_TIME, '%Y-%m-%d %H:%M:%S'))
+    for _ in gen.iter_users():
+        pass
+    merchants = list(gen.iter_merchants())
+    user_ids = (gen.user_id_of(i) for i in range(gen.NUM_USERS))
+
+    orders = []
+    for table, row in gen.iter_orders_and_points(user_ids, merchants):
+        if table != 'payment_orders':
+            continue
+        orders.append({
+            'user_id': row['user_id'],
+            'merchant_id': row['merchant_id'],
+            'amount': row['amount'],
+            'pay': row['paid_at'] is not None,  # 已取消（未支付）的订单只创建不支付
+            'time': datetime.strptime(row['created_at'], '%Y-%m-%d %H:%M:%S'),
+        })
+        if len(orders) >= count:
+            break
+
+    # 查询类请求用独立的随机数，不影响生成器的随机状态
+    rng = random.Random(seed)
+    sessions = []
+    if orders:
+        period = max(o['time'] for o in orders) - min(o['time'] for o in orders) + timedelta(seconds=1)
+    for i in range(count if orders else 0):
+        rounds, index = divmod(i, len(orders))
+        session = dict(orders[index])
+        session['time'] += period * rounds
+        session['query'] = session['pay'] and rng.random() < query_ratio
+        session['balance'] = rng.random() < balance_ratio
+        session['history'] = rng.random() < history_ratio
+        sessions.append(session)
+    return sessions, merchants
+
+# ==================== 报告 ====================
+
+def format_outcomes(outcomes):
+    return ', '.join(f"{outcome}×{count}" for outcome, count in sorted(outcomes.items(), key=str))
+
+def print_report(recorder, elapsed, args):
+    """打印按接口的延迟分位数和吞吐"""
+    summary = recorder.summary()
+    requests = sum(row['count'] for row in summary.values())
+    print("\n" + "="*60)
+    print("📊 回放结果")
+    print("="*60)
+    header = f"{'接口':<10}{'请求数':>8}{'成功':>8}{'均值':>9}" + ''.join(f"{'p%g' % p:>9}" for p in PERCENTILES) + f"{'max':>9}"
+    print(header + "  （毫秒）")
+    for endpoint, row in summary.items():
+        line = f"{endpoint:<10}{row['count']:>8}{row['ok']:>8}{row['mean']:>9.1f}"
+        line += ''.join(f"{row[f'p{p:g}']:>9.1f}" for p in PERCENTILES) + f"{row['max']:>9.1f}"
+        print(line)
+    for endpoint, row in summary.items():
+        if row['ok'] < row['count']:
+            print(f"  ⚠️  {endpoint} 状态: {format_outcomes(row['outcomes'])}")
+
+    session_rate = recorder.sessions / elapsed if elapsed else 0.0
+    print(f"\n会话: {recorder.sessions}（失败 {recorder.failed_sessions}），请求: {requests}，耗时 {elapsed:.2f} 秒")
+    print(f"吞吐: {session_rate:.1f} 会话/秒，{requests / elapsed if elapsed else 0:.1f} 请求/秒")
+    if args.mode == 'open':
+        delays = sorted(recorder.queue_delays)
+        print(f"排队等待（计划发起 -> 实际发起）: p50 {percentile(delays, 50) * 1000:.1f} 毫秒，"
+              f"p99 {percentile(delays, 99) * 1000:.1f} 毫秒")
+        if session_rate < args.qps * RATE_WARNING:
+            print(f"⚠️  实际速率低于目标 {args.qps:g} 会话/秒：后端或 --concurrency 已饱和，排队时间计入上面的等待")
+
+# ==================== 命令行 ====================
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='把生成的订单回放为对后端支付/积分接口的HTTP请求，统计吞吐和延迟分位数')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL,
+                        help=f'后端接口地址（默认 {DEFAULT_BASE_URL}）；JWT密钥取环境变量 JWT_SECRET（同后端）')
+    parser.add_argument('--stub', action='store_true', help='启动内存中的替身服务并回放到它（忽略 --base-url）')
+    parser.add_argument('--stub-latency-ms', type=float, default=0.0, help='替身服务每个请求的固定延迟（毫秒）')
+    parser.add_argument('--orders', type=int, default=DEFAULT_ORDERS,
+                        help=f'回放的订单会话数（默认 {DEFAULT_ORDERS}），超过生成的订单数时循环使用')
+    parser.add_argument('--users', type=int, default=None, help=f'生成订单的用户数（默认 {gen.NUM_USERS}，同生成脚本）')
+    parser.add_argument('--mode', choices=MODES, default='open',
+                        help='open 开环：按时间表发起会话，测目标速率下的延迟（默认）；closed 闭环：测最大吞吐')
+    parser.add_argument('--qps', type=float, default=DEFAULT_QPS, help=f'开环目标速率，会话/秒（默认 {DEFAULT_QPS:g}）')
+    parser.add_argument('--arrival', choices=ARRIVALS, default='poisson',
+                        help='开环到达模型：poisson 指数间隔（默认）；uniform 固定间隔；'
+                             'replay 按订单时间的高峰低谷形状压缩到目标速率')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'同时执行的会话数上限 / 闭环客户端数（默认 {DEFAULT_CONCURRENCY}）')
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT, help=f'单个请求超时秒数（默认 {REQUEST_TIMEOUT:g}）')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子：与导入数据时的 --seed 相同，商户才能对上')
+    args = parser.parse_args()
+    if args.orders < 1 or args.concurrency < 1:
+        parser.error('--orders / --concurrency 至少为1')
+    if args.qps <= 0:
+        parser.error('--qps 必须大于0')
+    return args
+
+async def run(args, sessions, merchants):
+    """按参数回放（--stub 时在同一个事件循环中运行替身服务）"""
+    rng = random.Random(args.seed)
+    if not args.stub:
+        return await replay(sessions, args.base_url, args.mode, args.qps, args.concurrency, args.arrival,
+                            rng, args.timeout)
+    backend = StubBackend({m['id']: m for m in merchants}, latency=args.stub_latency_ms / 1000)
+    server, base_url = await start_stub_server(backend)
+    print(f"🧪 替身服务: {base_url}")
+    try:
+        return await replay(sessions, base_url, args.mode, args.qps, args.concurrency, args.arrival,
+                            rng, args.timeout)
+    finally:
+        server.close()
+        await server.wait_closed()
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.seed is None:
+        args.seed = random.randrange(2 ** 32)
+    if args.users:
+        gen.NUM_USERS = args.users
+
+    print("\n" + "="*60)
+    print(f"🚀 开始回放接口流量（{args.mode}，种子 {args.seed}）")
+    print("="*60)
+    sessions, merchants = build_sessions(args.orders, args.seed)
+    paid = sum(s['pay'] for s in sessions)
+    print(f"📊 {len(sessions)} 个订单会话（{paid} 笔支付），"
+          + (f"目标 {args.qps:g} 会话/秒（{args.arrival}），" if args.mode == 'open' else '')
+          + f"并发上限 {args.concurrency}")
+
+    recorder, elapsed = asyncio.run(run(args, sessions, merchants))
+    print_report(recorder, elapsed, args)
+    sys.exit(1 if recorder.sessions and recorder.failed_sessions == recorder.sessions else 0)
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成数据一致性校验
+流式读取 generate_realistic_data.py 的输出（SQL文件 / 压缩分卷 / TSV目录）或已导入的数据库，
+交叉校验订单、积分记录和用户积分汇总：
+
+- 每笔已支付订单（paid_at 非空，含支付后退款/取消的订单）恰好有一条 payment_reward 积分记录，
+  且积分数与订单一致
+- 订单的 points_awarded == calculate_points(amount)（未支付订单为0）
+- 退款/支付后取消的订单恰好扣回发放的积分（关联该订单的负积分记录合计）
+- user_points 的 available_points / total_earned / total_spent 等于积分记录的合计
+  （口径同 fix_data_consistency.sql）
+
+读取时只做单行校验，需要关联的字段按 user_id 哈希分桶写入临时文件，
+再逐桶在内存中关联，内存占用约为 总量 / 桶数。
+多个输入文件（分卷、分片）在进程池中并行读取，各桶也并行关联。
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import zlib
+from collections import defaultdict
+
+import generate_realistic_data as gen
+from datagen.bulk import tsv_unescape, tsv_value
+from datagen.events import ORDER_STATUSES
+from datagen.loader import open_backend
+from datagen.reader import expand_inputs, read_input
+from datagen.shard import run_shards
+
+# ==================== 配置 ====================
+DEFAULT_BUCKETS = 64  # 分桶数：越大单桶内存越小，同时打开的临时文件越多
+MAX_EXAMPLES = 10  # 每类问题最多列出的示例数
+REWARD_RECORD_TYPE = 'payment_reward'
+CLAWBACK_STATUSES = frozenset(ORDER_STATUSES.values())  # 支付后需扣回积分的订单状态
+
+# 校验用到的列
+VERIFY_COLUMNS = {
+    'payment_orders': ('id', 'user_id', 'amount', 'points_awarded', 'status', 'paid_at'),
+    'points_records': ('id', 'user_id', 'points_change', 'record_type', 'related_order_id'),
+    'user_points': ('user_id', 'available_points', 'total_earned', 'total_spent'),
+}
+
+ISSUE_LABELS = {
+    'points_calculation': '订单积分与 calculate_points(amount) 不一致',
+    'unpaid_with_points': '未支付订单带有积分',
+    'missing_reward': '已支付订单缺少积分记录',
+    'duplicate_reward': '已支付订单有多条积分记录',
+    'reward_mismatch': '积分记录与订单积分不一致',
+    'orphan_reward': '积分记录没有对应的已支付订单',
+    'clawback_mismatch': '退款/取消订单扣回的积分与发放积分不一致',
+    'balance_mismatch': 'user_points 与积分记录合计不一致',
+    'missing_user_points': '有积分记录但没有 user_points',
+}
+
+# ==================== 问题汇总 ====================
+
+class IssueReport:
+    """按类别统计问题数量，每类保留前 max_examples 条示例"""
+
+    def __init__(self, max_examples=MAX_EXAMPLES):
+        self.max_examples = max_examples
+        self.counts = defaultdict(int)
+        self.examples = defaultdict(list)
+
+    def add(self, kind, message):
+        self.counts[kind] += 1
+        if len(self.examples[kind]) < self.max_examples:
+            self.examples[kind].append(message)
+
+    def merge(self, other):
+        """合并另一个进程的结果"""
+        for kind, count in other.counts.items():
+            self.counts[kind] += count
+            room = self.max_examples - len(self.examples[kind])
+            self.examples[kind].extend(other.examples[kind][:max(room, 0)])
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def print(self):
+        for kind, label in ISSUE_LABELS.items():
+            if self.counts.get(kind):
+                print(f"\n❌ {label}: {self.counts[kind]:,} 处")
+                for message in self.examples[kind]:
+                    print(f"   - {message}")
+
+# ==================== 分桶临时文件 ====================
+
+class BucketSpill:
+    """按 user_id 哈希把记录写入 buckets 个临时TSV文件（bucket-NNNN.tsv）"""
+
+    def __init__(self, directory, buckets):
+        os.makedirs(directory, exist_ok=True)
+        self.buckets = buckets
+        self.paths = [bucket_path(directory, i) for i in range(buckets)]
+        self.files = [open(path, 'w', encoding='utf-8', newline='\n') for path in self.paths]
+
+    def write(self, user_id, kind, *fields):
+        bucket = zlib.crc32(user_id.encode('utf-8')) % self.buckets
+        self.files[bucket].write('\t'.join([kind, tsv_value(user_id), *(tsv_value(v) for v in fields)]) + '\n')
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+def bucket_path(directory, index):
+    return os.path.join(directory, f"bucket-{index:04d}.tsv")
+
+def read_buckets(paths):
+    """读回同一个桶的所有文件（每个输入一个）：产出 [类型, user_id, 字段...]"""
+    for path in paths:
+        with open(path, encoding='utf-8', newline='\n') as f:
+            for line in f:
+                yield [tsv_unescape(field) for field in line.rstrip('\n').split('\t')]
+
+# ==================== 数据源 ====================
+
+def database_rows(target):
+    """从数据库逐表流式读取校验用到的列，产出 (表名, 列名, 值列表)"""
+    backend = open_backend(target)
+    conn = backend.connect()
+    try:
+        for table, columns in VERIFY_COLUMNS.items():
+            for row in backend.stream_rows(conn, f"SELECT {', '.join(columns)} FROM {table}"):
+                yield table, columns, row
+    finally:
+        conn.close()
+
+# ==================== 校验 ====================
+
+def as_int(value):
+    """TSV读回的值均为字符串"""
+    return None if value is None else int(value)
+
+def scan(rows, spill, report):
+    """
+    第一遍：流式读取所有行（已按 VERIFY_COLUMNS 取出需要的列）
+
+    单行即可判断的问题（订单积分计算）直接记录；需要关联的字段写入分桶文件。
+    返回各表行数。
+    """
+    counts = defaultdict(int)
+    for table, _, fields in rows:
+        counts[table] += 1
+        if table == 'payment_orders':
+            order_id, user_id, amount, points_awarded, status, paid_at = fields
+            amount, points_awarded = as_int(amount), as_int(points_awarded)
+            if paid_at is not None:
+                expected = gen.calculate_points(amount)
+                if points_awarded != expected:
+                    report.add('points_calculation',
+                               f"{order_id}: amount={amount} points_awarded={points_awarded}，应为 {expected}")
+                spill.write(user_id, 'O', order_id, points_awarded, int(status in CLAWBACK_STATUSES))
+            elif points_awarded:
+                report.add('unpaid_with_points', f"{order_id}: status={status} points_awarded={points_awarded}")
+        elif table == 'points_records':
+            record_id, user_id, points_change, record_type, related_order_id = fields
+            spill.write(user_id, 'R', record_id, as_int(points_change), record_type, related_order_id)
+        else:
+            user_id, available, earned, spent = fields
+            spill.write(user_id, 'U', as_int(available), as_int(earned), as_int(spent))
+    return counts
+
+def check_bucket(records, report):
+    """
+    第二遍：关联一个桶内的订单、积分记录和 user_points
+
+    同一用户的 user_points 出现多行时累加（增量追加文件用 ON DUPLICATE KEY UPDATE 累加到原值）。
+    """
+    paid_orders = {}  # 订单ID -> [user_id, points_awarded, 积分记录数, 记录积分, 是否需扣回, 扣回积分]
+    rewards = []
+    clawbacks = []
+    sums = defaultdict(lambda: [0, 0, 0])  # user_id -> [available, earned, spent]
+    balances = {}
+
+    for kind, user_id, *fields in records:
+        if kind == 'O':
+            order_id, points_awarded, clawback = fields
+            paid_orders[order_id] = [user_id, int(points_awarded), 0, 0, clawback == '1', 0]
+        elif kind == 'R':
+            record_id, points_change, record_type, related_order_id = fields
+            points_change = int(points_change)
+            total = sums[user_id]
+            total[0] += points_change
+            if points_change > 0:
+                total[1] += points_change
+            else:
+                total[2] -= points_change
+            if record_type == REWARD_RECORD_TYPE:
+                rewards.append((record_id, user_id, points_change, related_order_id))
+            elif related_order_id is not None and points_change < 0:
+                clawbacks.append((user_id, -points_change, related_order_id))
+        else:
+            balance = balances.setdefault(user_id, [0, 0, 0])
+            for i, value in enumerate(fields):
+                balance[i] += int(value)
+
+    for record_id, user_id, points_change, related_order_id in rewards:
+        order = paid_orders.get(related_order_id)
+        if order is None or order[0] != user_id:
+            report.add('orphan_reward', f"{record_id}: related_order_id={related_order_id} user_id={user_id}")
+            continue
+        order[2] += 1
+        order[3] += points_change
+
+    for user_id, points, related_order_id in clawbacks:
+        order = paid_orders.get(related_order_id)
+        if order is None or order[0] != user_id:
+            report.add('clawback_mismatch', f"扣回 {points} 积分的订单 {related_order_id} 不存在或未支付（{user_id}）")
+        else:
+            order[5] += points
+
+    for order_id, (user_id, points_awarded, count, points, clawback, returned) in paid_orders.items():
+        if count == 0:
+            report.add('missing_reward', f"{order_id}（{user_id}）")
+        elif count > 1:
+            report.add('duplicate_reward', f"{order_id}（{user_id}）: {count} 条")
+        elif points != points_awarded:
+            report.add('reward_mismatch', f"{order_id}: points_awarded={points_awarded}，积分记录 {points}")
+        if returned != (points_awarded if clawback else 0):
+            report.add('clawback_mismatch', f"{order_id}: points_awarded={points_awarded}，扣回 {returned}")
+
+    for user_id, total in sums.items():
+        if user_id not in balances:
+            report.add('missing_user_points', f"{user_id}: 积分记录合计 {total[0]}")
+    for user_id, balance in balances.items():
+        total = sums.get(user_id, [0, 0, 0])
+        if balance != total:
+            report.add('balance_mismatch',
+                       f"{user_id}: available/earned/spent = {balance[0]}/{balance[1]}/{balance[2]}，"
+                       f"积分记录合计 {total[0]}/{total[1]}/{total[2]}")
+
+def scan_input(task):
+    """读取一个输入并写入其分桶文件（在子进程中执行），返回 (各表行数, IssueReport)"""
+    report = IssueReport(task['max_examples'])
+    gen.set_points_rate(task['points_rate'])
+    if task['kind'] == 'db':
+        rows = database_rows(task['path'])
+    else:
+        tables = {table: gen.TABLE_COLUMNS[table] for table in VERIFY_COLUMNS}
+        rows = read_input(task['kind'], task['path'], tables, VERIFY_COLUMNS)
+    spill = BucketSpill(task['directory'], task['buckets'])
+    try:
+        counts = scan(rows, spill, report)
+    finally:
+        spill.close()
+    return dict(counts), report
+
+def check_bucket_files(task):
+    """关联一个桶（在子进程中执行），返回 IssueReport"""
+    report = IssueReport(task['max_examples'])
+    check_bucket(read_buckets(task['paths']), report)
+    return report
+
+def verify(inputs, buckets=DEFAULT_BUCKETS, spill_dir=None, max_examples=MAX_EXAMPLES, workers=None,
+           points_rate=gen.POINTS_RATE):
+    """
+    校验一组输入，返回 (各表行数, IssueReport)
+
+    inputs: [(类型, 路径), ...]，类型为 'sql' / 'tsv'（见 datagen.reader.expand_inputs）或 'db'（目标地址）
+    points_rate: 生成时的积分比例（每元积分）
+    """
+    report = IssueReport(max_examples)
+    counts = defaultdict(int)
+    directory = tempfile.mkdtemp(prefix='verify_', dir=spill_dir)
+    try:
+        tasks = [{
+            'kind': kind,
+            'path': path,
+            'directory': os.path.join(directory, f"input-{i:04d}"),
+            'buckets': buckets,
+            'max_examples': max_examples,
+            'points_rate': points_rate,
+        } for i, (kind, path) in enumerate(inputs)]
+        for part_counts, part_report in run_shards(scan_input, tasks, workers):
+            for table, count in part_counts.items():
+                counts[table] += count
+            report.merge(part_report)
+
+        bucket_tasks = [{
+            'paths': [bucket_path(task['directory'], index) for task in tasks],
+            'max_examples': max_examples,
+        } for index in range(buckets)]
+        for bucket_report in run_shards(check_bucket_files, bucket_tasks, workers):
+            report.merge(bucket_report)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return counts, report
+
+# ==================== 命令行 ====================
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='校验生成数据的一致性（订单、积分记录、用户积分汇总）')
+    parser.add_argument('inputs', nargs='*', default=None,
+                        help=f'SQL文件（可为 .gz / .zst、.manifest.json 或多个分片）或TSV目录（默认 {gen.OUTPUT_FILE}）')
+    parser.add_argument('--target', default=None,
+                        help='改为校验数据库：mysql://用户:密码@主机:端口/库名 或 sqlite:///文件.db（相对路径；绝对路径用 sqlite:////路径/文件.db）')
+    parser.add_argument('--buckets', type=int, default=DEFAULT_BUCKETS,
+                        help=f'关联时的分桶数（默认 {DEFAULT_BUCKETS}），数据量越大可设得越大以降低内存')
+    parser.add_argument('--spill-dir', default=None, help='分桶临时文件目录（默认系统临时目录）')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='并行进程数（默认CPU核数；1 为在当前进程顺序执行）')
+    parser.add_argument('--max-examples', type=int, default=MAX_EXAMPLES,
+                        help=f'每类问题列出的示例数（默认 {MAX_EXAMPLES}）')
+    parser.add_argument('--scenario', default=None,
+                        help='生成时使用的场景（预置场景名或场景文件）：取其积分比例，默认输入为场景的输出文件')
+    parser.add_argument('--points-rate', type=float, default=None,
+                        help=f'生成时的积分比例（每元积分，默认取场景或 {gen.POINTS_RATE}）')
+    args = parser.parse_args()
+    scenario = None
+    if args.scenario:
+        try:
+            scenario = gen.load_generator_scenario(args.scenario)
+        except (ImportError, OSError, ValueError) as e:
+            parser.error(str(e))
+    if args.points_rate is None:
+        args.points_rate = scenario['settings'].get('points_rate', gen.POINTS_RATE) if scenario else gen.POINTS_RATE
+    if args.target and args.inputs:
+        parser.error('--target 不能与输入文件同时使用')
+    if args.target:
+        try:
+            open_backend(args.target)
+        except (ImportError, ValueError) as e:
+            parser.error(str(e))
+    if args.buckets < 1:
+        parser.error('--buckets 至少为1')
+    if not args.target and not args.inputs:
+        output = scenario['options'].get('output', gen.OUTPUT_FILE) if scenario else gen.OUTPUT_FILE
+        if scenario and scenario['options'].get('format') == 'tsv':
+            output = gen.bulk_directory(output)
+        args.inputs = [output]
+    return args
+
+if __name__ == '__main__':
+    args = parse_args()
+    source = args.target.split('@')[-1] if args.target else ', '.join(args.inputs)
+
+    print("\n" + "="*60)
+    print(f"🔍 开始校验数据一致性: {source}")
+    print("="*60)
+
+    inputs = [('db', args.target)] if args.target else expand_inputs(args.inputs)
+    counts, report = verify(inputs, args.buckets, args.spill_dir, args.max_examples, args.workers,
+                            args.points_rate)
+
+    for table in VERIFY_COLUMNS:
+        print(f"  📊 {table}: {counts.get(table, 0):,} 行")
+    if report.total:
+        report.print()
+        print(f"\n❌ 共发现 {report.total:,} 处不一致")
+        sys.exit(1)
+    print("\n✅ 数据一致")